@@ -0,0 +1,131 @@
+"""
+Catalog Data
+Mock UCSC transfer requirements and Assist.org course equivalencies
+"""
+
+# ===================== UCSC TRANSFER REQUIREMENTS DATA =====================
+# This is mock data based on real UCSC requirements - in production, fetch from official sources
+
+UCSC_REQUIREMENTS = {
+    "Computer Science": {
+        "required_courses": [
+            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
+            {"name": "Calculus II", "equivalent_codes": ["MATH 1B", "MATH 3B", "MATH 182"]},
+            {"name": "Linear Algebra", "equivalent_codes": ["MATH 21", "MATH 6", "MATH 250"]},
+            {"name": "Introduction to Programming", "equivalent_codes": ["CS 1A", "CIS 22A", "COMSC 110"]},
+            {"name": "Data Structures", "equivalent_codes": ["CS 1B", "CIS 22B", "COMSC 165"]},
+            {"name": "Discrete Mathematics", "equivalent_codes": ["CS 18", "CIS 18", "MATH 55"]},
+            {"name": "Physics I (Mechanics)", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
+        ],
+        "igetc_areas": {
+            "1A": {"name": "English Composition", "required": True},
+            "1B": {"name": "Critical Thinking", "required": True},
+            "2": {"name": "Mathematical Concepts", "required": True},
+            "3A": {"name": "Arts", "required": True},
+            "3B": {"name": "Humanities", "required": True},
+            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
+            "5A": {"name": "Physical Science", "required": True},
+            "5B": {"name": "Biological Science", "required": True},
+            "5C": {"name": "Lab Science", "required": True},
+            "6A": {"name": "Language Other Than English", "required": True},
+        },
+        "min_gpa": 3.0,
+        "min_units": 60,
+        "max_units": 90,
+        "notes": [
+            "Selection to the major is highly competitive",
+            "A GPA above 3.4 is recommended for competitive applicants",
+            "All major prep courses should be completed with C or better",
+        ],
+        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
+    },
+    "Biology": {
+        "required_courses": [
+            {"name": "General Chemistry I", "equivalent_codes": ["CHEM 1A", "CHEM 101"]},
+            {"name": "General Chemistry II", "equivalent_codes": ["CHEM 1B", "CHEM 102"]},
+            {"name": "Organic Chemistry I", "equivalent_codes": ["CHEM 12A", "CHEM 201"]},
+            {"name": "Biology I", "equivalent_codes": ["BIOL 1A", "BIO 101", "BIOSCI 101"]},
+            {"name": "Biology II", "equivalent_codes": ["BIOL 1B", "BIO 102", "BIOSCI 102"]},
+            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
+            {"name": "Physics I", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
+        ],
+        "igetc_areas": {
+            "1A": {"name": "English Composition", "required": True},
+            "1B": {"name": "Critical Thinking", "required": True},
+            "2": {"name": "Mathematical Concepts", "required": True},
+            "3A": {"name": "Arts", "required": True},
+            "3B": {"name": "Humanities", "required": True},
+            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
+            "5A": {"name": "Physical Science", "required": True},
+            "5B": {"name": "Biological Science", "required": True},
+            "5C": {"name": "Lab Science", "required": True},
+            "6A": {"name": "Language Other Than English", "required": True},
+        },
+        "min_gpa": 2.8,
+        "min_units": 60,
+        "max_units": 90,
+        "notes": [
+            "Strong performance in science courses is expected",
+            "Research experience is recommended but not required",
+        ],
+        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
+    },
+    "Psychology": {
+        "required_courses": [
+            {"name": "Introduction to Psychology", "equivalent_codes": ["PSYCH 1", "PSYCH 101", "PSY 1A"]},
+            {"name": "Statistics", "equivalent_codes": ["STAT 1", "MATH 10", "PSYCH 7"]},
+            {"name": "Research Methods", "equivalent_codes": ["PSYCH 2", "PSY 2"]},
+        ],
+        "igetc_areas": {
+            "1A": {"name": "English Composition", "required": True},
+            "1B": {"name": "Critical Thinking", "required": True},
+            "2": {"name": "Mathematical Concepts", "required": True},
+            "3A": {"name": "Arts", "required": True},
+            "3B": {"name": "Humanities", "required": True},
+            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
+            "5A": {"name": "Physical Science", "required": True},
+            "5B": {"name": "Biological Science", "required": True},
+            "5C": {"name": "Lab Science", "required": True},
+            "6A": {"name": "Language Other Than English", "required": True},
+        },
+        "min_gpa": 2.5,
+        "min_units": 60,
+        "max_units": 90,
+        "notes": [
+            "Biology courses are recommended as preparation",
+        ],
+        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
+    }
+}
+
+# Sample course equivalencies (mock Assist.org data)
+ASSIST_EQUIVALENCIES = {
+    "De Anza College": {
+        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
+        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"], "prerequisites": ["MATH 1A"]},
+        "MATH 21": {"uc_equivalent": "MATH 21", "units": 5, "igetc": [], "prerequisites": ["MATH 1B"]},
+        "CIS 22A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
+        "CIS 22B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": [], "prerequisites": ["CIS 22A"]},
+        "PHYS 4A": {"uc_equivalent": "PHYS 6A", "units": 5, "igetc": ["5A", "5C"], "prerequisites": ["MATH 1A"]},
+        "EWRT 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
+        "EWRT 2": {"uc_equivalent": "Writing 2", "units": 5, "igetc": ["1B"], "prerequisites": ["EWRT 1A"]},
+        "BIOL 6A": {"uc_equivalent": "BIOE 20A", "units": 5, "igetc": ["5B", "5C"], "prerequisites": ["CHEM 1A"]},
+        "CHEM 1A": {"uc_equivalent": "CHEM 1A", "units": 5, "igetc": ["5A", "5C"]},
+        "CHEM 1B": {"uc_equivalent": "CHEM 1B", "units": 5, "igetc": ["5A"], "prerequisites": ["CHEM 1A"]},
+    },
+    "Foothill College": {
+        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
+        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"], "prerequisites": ["MATH 1A"]},
+        "CS 1A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
+        "CS 1B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": [], "prerequisites": ["CS 1A"]},
+        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
+        "PSYC 1": {"uc_equivalent": "PSYC 1", "units": 5, "igetc": ["4"]},
+    },
+    "Mission College": {
+        "MATH 3A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
+        "MATH 3B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"], "prerequisites": ["MATH 3A"]},
+        "COMSC 110": {"uc_equivalent": "CSE 20", "units": 4, "igetc": []},
+        "COMSC 165": {"uc_equivalent": "CSE 30", "units": 4, "igetc": [], "prerequisites": ["COMSC 110"]},
+        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 4, "igetc": ["1A"]},
+    }
+}
@@ -0,0 +1,194 @@
+"""
+Assist.org Import
+Streams articulation dumps (JSONL or CSV, optionally gzipped) into
+`course_equivalencies` in fixed-size upsert batches, so memory use does
+not grow with the size of the dump
+"""
+
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Callable
+from dataclasses import dataclass
+from datetime import datetime
+import csv
+import gzip
+import io
+import json
+import time
+
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import CourseEquivalency
+from app.services.igetc import AREA_BITS
+from app.services.requirement_plan import normalize_course_code
+
+
+UPSERT_KEY = ("community_college", "cc_course_code", "uc_campus")
+REQUIRED_FIELDS = ("community_college", "cc_course_code", "uc_campus", "uc_course_code", "units")
+OPTIONAL_FIELDS = ("cc_course_name", "uc_course_name", "source_url")
+
+
+@dataclass
+class ImportStats:
+    """Counters reported while an import runs"""
+    read: int = 0
+    written: int = 0
+    skipped: int = 0
+    batches: int = 0
+    started: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.written / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def open_dump(path: str) -> io.TextIOBase:
+    """Open a dump for streaming text reads (.gz is decompressed on the fly)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def dump_format(path: str) -> str:
+    """'jsonl' or 'csv', from the file name"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of '{path}' (expected .jsonl or .csv)")
+
+
+def read_records(stream: io.TextIOBase, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw records one at a time (an empty, unusable one for a malformed JSONL line)"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield {}
+
+
+def parse_list(value: Any) -> List[str]:
+    """Upper-cased items from a JSON list or a '2;5A' / '2,5A' string"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [" ".join(str(item).upper().split()) for item in value]
+    return [" ".join(item.upper().split()) for item in str(value).replace(",", ";").split(";") if item.strip()]
+
+
+def to_row(record: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+    """Map a raw record to a `course_equivalencies` row (None if unusable)"""
+    if any(record.get(name) in (None, "") for name in REQUIRED_FIELDS):
+        return None
+    try:
+        units = float(record["units"])
+    except (TypeError, ValueError):
+        return None
+    # The catalog cannot be built with an unknown area in it
+    igetc_areas = parse_list(record.get("igetc_areas", record.get("igetc")))
+    if any(area not in AREA_BITS for area in igetc_areas):
+        return None
+    row = {
+        "community_college": str(record["community_college"]).strip(),
+        "cc_course_code": normalize_course_code(str(record["cc_course_code"])),
+        "uc_campus": str(record["uc_campus"]).strip().upper(),
+        "uc_course_code": str(record["uc_course_code"]).strip(),
+        "units": units,
+        "igetc_areas": igetc_areas,
+        "prerequisites": parse_list(record.get("prerequisites")) or None,
+        "last_updated": now,
+    }
+    for name in OPTIONAL_FIELDS:
+        row[name] = record.get(name) or None
+    return row
+
+
+def batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """
+    Group rows into lists of at most `size`, keeping only the last row for
+    each upsert key within a batch (one statement cannot touch a row twice)
+    """
+    batch: Dict[tuple, Dict] = {}
+    for row in rows:
+        batch[tuple(row[name] for name in UPSERT_KEY)] = row
+        if len(batch) >= size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def upsert_batch(session, rows: List[Dict]) -> None:
+    """Insert-or-update one batch keyed by (community_college, cc_course_code, uc_campus)"""
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(CourseEquivalency)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(UPSERT_KEY),
+            set_={
+                name: stmt.excluded[name]
+                for name in rows[0]
+                if name not in UPSERT_KEY
+            },
+        )
+        # executemany: batched into multi-row VALUES by the driver layer
+        session.execute(stmt, rows)
+        return
+
+    # Portable fallback: replace the batch's keys inside the transaction
+    keys = [tuple(row[name] for name in UPSERT_KEY) for row in rows]
+    session.execute(delete(CourseEquivalency).where(
+        tuple_(*(getattr(CourseEquivalency, name) for name in UPSERT_KEY)).in_(keys)
+    ))
+    session.execute(insert(CourseEquivalency), rows)
+
+
+def import_dump(
+    session_factory: sessionmaker,
+    path: str,
+    batch_size: int = 5000,
+    fmt: Optional[str] = None,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+    progress_every: int = 100000
+) -> ImportStats:
+    """
+    Stream a dump into the database, committing once per batch.
+    `progress` is called roughly every `progress_every` written rows.
+    """
+    stats = ImportStats(started=time.perf_counter())
+    fmt = fmt or dump_format(path)
+    now = datetime.utcnow()
+
+    def rows(records: Iterable[Dict]) -> Iterator[Dict]:
+        for record in records:
+            stats.read += 1
+            row = to_row(record, now)
+            if row is None:
+                stats.skipped += 1
+                continue
+            yield row
+
+    next_report = progress_every
+    with open_dump(path) as stream, session_factory() as session:
+        for batch in batched(rows(read_records(stream, fmt)), batch_size):
+            upsert_batch(session, batch)
+            session.commit()
+            stats.written += len(batch)
+            stats.batches += 1
+            if progress is not None and stats.written >= next_report:
+                progress(stats)
+                next_report += progress_every
+    return stats
@@ -0,0 +1,143 @@
+"""
+Catalog Repository
+Loads the articulation catalog from the `uc_requirements` and
+`course_equivalencies` tables, and seeds them from the bundled data
+"""
+
+from typing import List, Dict, Tuple
+import json
+import sys
+
+from sqlalchemy import String, select, func, insert, type_coerce
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import CourseEquivalency, UCRequirement
+from app.services.catalog import Catalog
+
+
+# Requirement fields stored under each `requirement_type` row
+REQUIREMENT_FIELDS = {
+    "major_prep": ("required_courses",),
+    "igetc": ("igetc_areas",),
+    "gpa": ("min_gpa",),
+    "units": ("min_units", "max_units"),
+}
+
+LOAD_CHUNK_SIZE = 10000
+
+
+def catalog_signature(session_factory: sessionmaker) -> Tuple:
+    """Row counts and latest update time of both catalog tables"""
+    with session_factory() as session:
+        requirements = session.execute(
+            select(func.count(UCRequirement.id), func.max(UCRequirement.last_updated))
+        ).one()
+        equivalencies = session.execute(
+            select(func.count(CourseEquivalency.id), func.max(CourseEquivalency.last_updated))
+        ).one()
+    return tuple(requirements) + tuple(equivalencies)
+
+
+def load_catalog(session_factory: sessionmaker) -> Catalog:
+    """Build a Catalog snapshot, streaming the equivalency rows"""
+    requirements: Dict[str, Dict[str, Dict]] = {}
+    equivalencies: Dict[str, Dict[str, Dict]] = {}
+
+    with session_factory() as session:
+        rows = session.execute(select(
+            UCRequirement.uc_campus,
+            UCRequirement.major,
+            UCRequirement.requirement_data,
+            UCRequirement.notes,
+            UCRequirement.source_url,
+        ).order_by(UCRequirement.id))
+        for campus, major, data, notes, source_url in rows:
+            reqs = requirements.setdefault(campus, {}).setdefault(major, {})
+            reqs.update(data)
+            if notes is not None:
+                reqs["notes"] = notes
+            if source_url is not None:
+                reqs["source_url"] = source_url
+
+        # Core rows (no ORM loading); JSON lists are read as raw text and
+        # decoded once per distinct value, since only a few hundred IGETC
+        # and prerequisite combinations repeat across millions of rows
+        rows = session.connection().execute(select(
+            CourseEquivalency.uc_campus,
+            CourseEquivalency.community_college,
+            CourseEquivalency.cc_course_code,
+            CourseEquivalency.uc_course_code,
+            CourseEquivalency.units,
+            type_coerce(CourseEquivalency.igetc_areas, String),
+            type_coerce(CourseEquivalency.prerequisites, String),
+        ).execution_options(yield_per=LOAD_CHUNK_SIZE))
+        json_lists: Dict[str, List[str]] = {}
+
+        def decode(value) -> List[str]:
+            if not isinstance(value, str):
+                # Drivers that decode JSON themselves
+                return value or []
+            decoded = json_lists.get(value)
+            if decoded is None:
+                decoded = json_lists[value] = json.loads(value) or []
+            return decoded
+
+        for campus, college, code, uc_code, units, igetc, prerequisites in rows:
+            # Millions of rows repeat a few thousand campus/college names
+            campus, college = sys.intern(campus), sys.intern(college)
+            info = {"uc_equivalent": uc_code, "units": units, "igetc": decode(igetc)}
+            prerequisites = decode(prerequisites)
+            if prerequisites:
+                info["prerequisites"] = prerequisites
+            equivalencies.setdefault(campus, {}).setdefault(college, {})[code] = info
+
+    return Catalog(requirements, equivalencies)
+
+
+def seed_catalog(
+    session_factory: sessionmaker,
+    campus: str,
+    requirements: Dict[str, Dict],
+    equivalencies: Dict[str, Dict]
+) -> bool:
+    """Insert bundled catalog data for a campus if the tables are empty"""
+    with session_factory() as session:
+        if session.execute(select(UCRequirement.id).limit(1)).first() is not None:
+            return False
+
+        requirement_rows = []
+        for major, reqs in requirements.items():
+            for requirement_type, fields in REQUIREMENT_FIELDS.items():
+                requirement_rows.append({
+                    "uc_campus": campus,
+                    "major": major,
+                    "requirement_type": requirement_type,
+                    "requirement_data": {name: reqs[name] for name in fields if name in reqs},
+                    "notes": reqs.get("notes") if requirement_type == "major_prep" else None,
+                    "source_url": reqs.get("source_url"),
+                })
+        session.execute(insert(UCRequirement), requirement_rows)
+
+        equivalency_rows = [
+            {
+                "community_college": college,
+                "cc_course_code": code,
+                "uc_campus": campus,
+                "uc_course_code": info["uc_equivalent"],
+                "units": info["units"],
+                "igetc_areas": info.get("igetc", []),
+                "prerequisites": info.get("prerequisites"),
+            }
+            for college, courses in equivalencies.items()
+            for code, info in courses.items()
+        ]
+        try:
+            if equivalency_rows:
+                session.execute(insert(CourseEquivalency), equivalency_rows)
+            session.commit()
+        except IntegrityError:
+            # Another worker seeded first
+            session.rollback()
+            return False
+        return True
@@ -3,9 +3,10 @@ Database Configuration
 For demo: SQLite, for production: PostgreSQL via Firebase/Supabase
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 
 # Use environment variable or default to SQLite for demo
@@ -15,10 +16,35 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./transfer_verifier.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+
+def engine_options(url: str) -> dict:
+    """Connection pool settings for the configured database"""
+    if url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # In-memory databases exist per connection, so share one
+            options["poolclass"] = StaticPool
+        return options
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a writer commits"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,6 +61,15 @@ def get_db():
 
 
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (safe when several workers start at once)"""
+    from sqlalchemy.exc import OperationalError, ProgrammingError
     from app.models.models import Base
-    Base.metadata.create_all(bind=engine)
+    for attempt in range(5):
+        try:
+            Base.metadata.create_all(bind=engine)
+            return
+        except (OperationalError, ProgrammingError):
+            # Another worker created a table between the existence check
+            # and CREATE; the next pass skips it
+            if attempt == 4:
+                raise
@@ -0,0 +1,340 @@
+"""
+Firestore User Repository
+Stores users as `users/{email}` documents via the synchronous Firestore
+client, offloaded to the repository thread pool. The user document holds
+only the profile and transcript aggregates; transcript courses live in
+the `transcript` subcollection and verification history in `results`.
+A replaced transcript is written as a new generation of course documents
+that the user document switches to last, so a replace is all-or-nothing
+"""
+
+from typing import Any, Optional, List, Dict, Tuple
+import os
+import time
+import uuid
+
+from firebase_admin import firestore
+
+from app.db.repository import COURSE_FIELDS, DELETE_FIELD, UserRepository
+
+
+TRANSCRIPT = "transcript"
+RESULTS = "results"
+# Document-style fields stored as subcollections
+SUBCOLLECTION_FIELDS = ("transcript", "verification_results")
+# User document field naming the current generation of course documents
+TRANSCRIPT_GENERATION = "transcript_generation"
+
+# Values allowed in one `in` filter
+IN_FILTER_LIMIT = 30
+# Operations allowed in one write batch
+BATCH_LIMIT = 500
+
+# (batch method, document reference[, values]), e.g. ("set", ref, data)
+Write = Tuple[Any, ...]
+
+
+def course_id(generation: Optional[str], position: int) -> str:
+    """
+    Document id of a transcript course: its generation and position, so
+    identical rows stay separate documents (as in the transcript_stats
+    counts) and a new generation never overwrites the current one
+    """
+    return f"{generation}-{position}" if generation else str(position)
+
+
+def new_generation() -> str:
+    return uuid.uuid4().hex
+
+
+def commit_writes(client, writes: List[Write], batch_limit: int = BATCH_LIMIT) -> None:
+    """
+    Commit writes in order, in batches of at most `batch_limit`
+    operations. Each batch is atomic and a batch only starts once the one
+    before it committed, so a later write never lands before an earlier one
+    """
+    for start in range(0, len(writes), batch_limit):
+        batch = client.batch()
+        for method, ref, *values in writes[start:start + batch_limit]:
+            getattr(batch, method)(ref, *values)
+        batch.commit()
+
+
+class FirestoreUserRepository(UserRepository):
+    """Repository for `users/{email}` Firestore documents and their subcollections"""
+
+    def __init__(self, client, collection: str = "users", max_workers: Optional[int] = None):
+        super().__init__(
+            max_workers or int(os.getenv("FIRESTORE_MAX_WORKERS", "16")),
+            thread_name_prefix="firestore",
+        )
+        self._client = client
+        self._collection = collection
+
+    def _ref(self, email: str):
+        return self._client.collection(self._collection).document(email)
+
+    # ---------- subcollections ----------
+
+    @staticmethod
+    def _document_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+        """Field mask for the user document itself"""
+        if fields is None:
+            return None
+        mask = [name for name in fields if name not in SUBCOLLECTION_FIELDS]
+        if "transcript" in fields:
+            mask.append(TRANSCRIPT_GENERATION)
+        return mask
+
+    @staticmethod
+    def _course_doc(email: str, course: Dict, position: int, generation: Optional[str]) -> Dict:
+        # `email` lets collection-group queries fetch many users' courses
+        return {
+            **{name: course[name] for name in COURSE_FIELDS},
+            "email": email,
+            "position": position,
+            "generation": generation,
+        }
+
+    @staticmethod
+    def _course(data: Dict) -> Dict:
+        return {name: data[name] for name in COURSE_FIELDS}
+
+    def _transcript(self, ref, generation: Optional[str]) -> List[Dict]:
+        """Courses of the current generation (others are left over from an unfinished replace)"""
+        docs = ref.collection(TRANSCRIPT).order_by("position").stream()
+        return [
+            self._course(data) for data in (doc.to_dict() for doc in docs)
+            if data.get("generation") == generation
+        ]
+
+    def _transcripts(self, generations: Dict[str, Optional[str]]) -> Dict[str, List[Dict]]:
+        """Transcripts of many users (email -> generation), one collection-group query per 30 users"""
+        emails = list(generations)
+        rows: Dict[str, List[Dict]] = {email: [] for email in emails}
+        for start in range(0, len(emails), IN_FILTER_LIMIT):
+            query = self._client.collection_group(TRANSCRIPT).where(
+                "email", "in", emails[start:start + IN_FILTER_LIMIT]
+            )
+            for doc in query.stream():
+                data = doc.to_dict()
+                if data.get("email") in rows and data.get("generation") == generations[data["email"]]:
+                    rows[data["email"]].append(data)
+        return {
+            email: [self._course(data) for data in sorted(courses, key=lambda data: data["position"])]
+            for email, courses in rows.items()
+        }
+
+    def _latest_result(self, ref) -> Optional[Dict]:
+        query = (
+            ref.collection(RESULTS)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(1)
+            .select(["result"])
+        )
+        for doc in query.stream():
+            return doc.to_dict().get("result")
+        return None
+
+    def _writes(self, email: str, fields: Dict, create: bool = False) -> List[Write]:
+        """
+        The writes for document-style fields: user document fields, a
+        replaced transcript subcollection and a new result. A created user
+        document comes first (a conflict fails the first batch, before any
+        course is written). An updated one comes after the new generation
+        of courses and switches to it, so a replace that fails partway
+        leaves the old transcript in place; the old courses are deleted
+        after the switch
+        """
+        ref = self._ref(email)
+        values = self._encode({name: value for name, value in fields.items() if name not in SUBCOLLECTION_FIELDS})
+        stale = []
+        if "transcript" in fields:
+            generation = new_generation()
+            values[TRANSCRIPT_GENERATION] = generation
+            if not create:
+                stale = list(ref.collection(TRANSCRIPT).list_documents())
+        writes: List[Write] = [("create", ref, values)] if create else []
+
+        if "transcript" in fields:
+            writes.extend(
+                (
+                    "set",
+                    ref.collection(TRANSCRIPT).document(course_id(generation, position)),
+                    self._course_doc(email, course, position, generation),
+                )
+                for position, course in enumerate(fields["transcript"] or [])
+            )
+        if fields.get("verification_results"):
+            writes.append(("set", ref.collection(RESULTS).document(), {
+                "result": fields["verification_results"],
+                "verification_key": fields.get("verification_key"),
+                "created_at": firestore.SERVER_TIMESTAMP,
+            }))
+        if not create and values:
+            writes.append(("update", ref, values))
+        writes.extend(("delete", existing) for existing in stale)
+        return writes
+
+    # ---------- repository API ----------
+
+    async def get(self, email: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """One projected document read, plus subcollection reads only when requested"""
+        def _get():
+            ref = self._ref(email)
+            doc = ref.get(field_paths=self._document_fields(fields))
+            if not doc.exists:
+                return None
+            data = doc.to_dict() or {}
+            generation = data.pop(TRANSCRIPT_GENERATION, None)
+            if fields is None or "transcript" in fields:
+                data["transcript"] = self._transcript(ref, generation)
+            if fields is None or "verification_results" in fields:
+                data["verification_results"] = self._latest_result(ref)
+            return data
+        return await self._run(_get)
+
+    async def get_many(self, emails: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Fetch several user documents in one get_all round trip"""
+        def _get_many():
+            refs = [self._ref(email) for email in emails]
+            found = {
+                doc.id: doc.to_dict() or {}
+                for doc in self._client.get_all(refs, field_paths=self._document_fields(fields))
+                if doc.exists
+            }
+            generations = {email: data.pop(TRANSCRIPT_GENERATION, None) for email, data in found.items()}
+            if found and (fields is None or "transcript" in fields):
+                for email, courses in self._transcripts(generations).items():
+                    found[email]["transcript"] = courses
+            if fields is None or "verification_results" in fields:
+                for email, data in found.items():
+                    data["verification_results"] = self._latest_result(self._ref(email))
+            return found
+        return await self._run(_get_many)
+
+    async def create(self, email: str, data: Dict) -> bool:
+        """Create without a read first; the batch fails if the user exists"""
+        from google.api_core.exceptions import AlreadyExists, Conflict
+
+        def _create():
+            try:
+                commit_writes(self._client, self._writes(email, data, create=True))
+            except (AlreadyExists, Conflict):
+                return False
+            return True
+        return await self._run(_create)
+
+    async def create_many(self, users: Dict[str, Dict]) -> List[str]:
+        """
+        One masked get_all to skip existing users, then write batches of up
+        to 500 operations. Users are grouped whole into batches; a user with
+        more writes than one batch holds gets batches of their own
+        """
+        from google.api_core.exceptions import AlreadyExists, Conflict
+
+        def _create_many():
+            refs = [self._ref(email) for email in users]
+            existing = {doc.id for doc in self._client.get_all(refs, field_paths=[]) if doc.exists}
+            groups: List[Dict[str, List[Write]]] = [{}]
+            ops = 0
+            for email in users:
+                if email in existing:
+                    continue
+                writes = self._writes(email, users[email], create=True)
+                if groups[-1] and ops + len(writes) > BATCH_LIMIT:
+                    groups.append({})
+                    ops = 0
+                groups[-1][email] = writes
+                ops += len(writes)
+
+            created = []
+            for group in groups:
+                if not group:
+                    continue
+                try:
+                    commit_writes(self._client, [write for writes in group.values() for write in writes])
+                    created.extend(group)
+                except (AlreadyExists, Conflict):
+                    # Raced with another writer; retry this group one user at a time
+                    for email, writes in group.items():
+                        try:
+                            commit_writes(self._client, writes)
+                            created.append(email)
+                        except (AlreadyExists, Conflict):
+                            pass
+            return created
+        return await self._run(_create_many)
+
+    @staticmethod
+    def _encode(fields: Dict) -> Dict:
+        return {
+            path: firestore.DELETE_FIELD if value is DELETE_FIELD else value
+            for path, value in fields.items()
+        }
+
+    async def update(self, email: str, fields: Dict) -> None:
+        def _update():
+            commit_writes(self._client, self._writes(email, fields))
+        await self._run(_update)
+
+    async def edit_transcript(
+        self,
+        email: str,
+        remove: List[Dict],
+        add: List[Dict],
+        fields: Dict
+    ) -> None:
+        """
+        Course document deletes/sets in the current generation, then field
+        updates (one write batch for a single-course edit). Each removed
+        course deletes one matching document, as the stats count one
+        """
+        def _edit():
+            ref = self._ref(email)
+            generation = (ref.get(field_paths=[TRANSCRIPT_GENERATION]).to_dict() or {}).get(TRANSCRIPT_GENERATION)
+            writes: List[Write] = []
+            removed = set()
+            for course in remove:
+                wanted = self._course(course)
+                matches = []
+                for doc in ref.collection(TRANSCRIPT).where("course_code", "==", course["course_code"]).stream():
+                    data = doc.to_dict()
+                    if doc.id not in removed and data.get("generation") == generation and self._course(data) == wanted:
+                        matches.append((data["position"], doc.id))
+                if matches:
+                    _, doc_id = min(matches)
+                    removed.add(doc_id)
+                    writes.append(("delete", ref.collection(TRANSCRIPT).document(doc_id)))
+            # Positions after every existing course keep upload order
+            position = time.time_ns()
+            writes.extend(
+                (
+                    "set",
+                    ref.collection(TRANSCRIPT).document(course_id(generation, position + offset)),
+                    self._course_doc(email, course, position + offset, generation),
+                )
+                for offset, course in enumerate(add)
+            )
+            commit_writes(self._client, writes + self._writes(email, fields))
+        await self._run(_edit)
+
+    async def verified_users(self) -> Dict[str, Dict]:
+        """
+        Projected query: the transcript's course codes come from the stored
+        course counts, so neither results nor courses are read
+        """
+        def _verified():
+            query = (
+                self._client.collection(self._collection)
+                .where("verification_key", ">", "")
+                .select(["community_college", "major", "target_major", "transcript_stats.course_counts"])
+            )
+            found = {}
+            for doc in query.stream():
+                data = doc.to_dict()
+                counts = (data.pop("transcript_stats", None) or {}).get("course_counts", {})
+                data["transcript"] = [{"course_code": code} for code, count in counts.items() if count > 0]
+                found[doc.id] = data
+            return found
+        return await self._run(_verified)
@@ -0,0 +1,62 @@
+"""
+SQL Job Store
+Background job state in the `jobs` table, so job status survives the
+process and is visible to every server sharing DATABASE_URL
+"""
+
+from typing import Optional, Dict, List
+from datetime import datetime
+from dataclasses import fields
+
+from sqlalchemy import select, func, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import BackgroundJob
+from app.services.jobs import FINISHED, Job, JobStore
+
+
+JOB_FIELDS = [f.name for f in fields(Job)]
+# Fixed at submit time, so not rewritten on every status change
+INSERT_ONLY = ("id", "kind", "payload", "submitted_at")
+
+
+def _to_job(row: BackgroundJob) -> Job:
+    return Job(**{name: getattr(row, name) for name in JOB_FIELDS})
+
+
+class SqlJobStore(JobStore):
+    """JobStore backed by SQLAlchemy sessions"""
+
+    def __init__(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+
+    def save(self, job: Job) -> None:
+        with self._session_factory() as session:
+            changed = session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job.id)
+                .values({name: getattr(job, name) for name in JOB_FIELDS if name not in INSERT_ONLY})
+            ).rowcount
+            if not changed:
+                session.execute(insert(BackgroundJob), [{name: getattr(job, name) for name in JOB_FIELDS}])
+            session.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._session_factory() as session:
+            row = session.get(BackgroundJob, job_id)
+            return _to_job(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._session_factory() as session:
+            return dict(session.execute(
+                select(BackgroundJob.status, func.count()).group_by(BackgroundJob.status)
+            ).all())
+
+    def unfinished(self, submitted_before: datetime) -> List[Job]:
+        with self._session_factory() as session:
+            rows = session.scalars(
+                select(BackgroundJob)
+                .where(BackgroundJob.status.not_in(FINISHED), BackgroundJob.submitted_at < submitted_before)
+                .order_by(BackgroundJob.submitted_at)
+            ).all()
+            return [_to_job(row) for row in rows]
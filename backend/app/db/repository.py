@@ -0,0 +1,124 @@
+"""
+User Repository
+Async access to user documents, independent of the storage backend.
+Backend clients are synchronous, so every call is offloaded to a bounded
+thread pool instead of blocking the event loop
+"""
+
+from typing import Optional, List, Dict, Any, Callable
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import re
+
+
+# Marker value that deletes a field in update()
+DELETE_FIELD = object()
+
+# Fields of a transcript entry
+COURSE_FIELDS = ("course_code", "course_name", "units", "grade", "semester")
+
+_SIMPLE_FIELD = re.compile(r"^[A-Za-z_][A-Za-z_0-9]*$")
+
+
+def field_path(*parts: str) -> str:
+    """Build a dotted field path, quoting segments like `MATH 1A`"""
+    quoted = []
+    for part in parts:
+        if not _SIMPLE_FIELD.match(part):
+            part = "`" + part.replace("\\", "\\\\").replace("`", "\\`") + "`"
+        quoted.append(part)
+    return ".".join(quoted)
+
+
+def split_field_path(path: str) -> List[str]:
+    """Inverse of field_path: split a dotted path into its segments"""
+    parts, current, quoted, escaped = [], [], False, False
+    for char in path:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif quoted and char == "\\":
+            escaped = True
+        elif char == "`":
+            quoted = not quoted
+        elif char == "." and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+class UserRepository(ABC):
+    """
+    Base class for user storage backends.
+    Users are exchanged as plain dicts shaped like the Firestore
+    `users/{email}` document (transcript list, verification_results, ...).
+    At most `max_workers` backend calls run at once; further calls wait
+    for a free thread without holding up other requests.
+    Reads take an optional `fields` projection (top-level field names);
+    backends skip whatever is not requested, and `[]` only checks that
+    the user exists.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix,
+        )
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the repository's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    @abstractmethod
+    async def get(self, email: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Fetch a user (or only `fields` of it), or None if it does not exist"""
+
+    @abstractmethod
+    async def get_many(self, emails: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Fetch several users at once (missing users are omitted)"""
+
+    @abstractmethod
+    async def create(self, email: str, data: Dict) -> bool:
+        """Create a user; returns False if it already exists"""
+
+    @abstractmethod
+    async def create_many(self, users: Dict[str, Dict]) -> List[str]:
+        """
+        Create many users with batched writes, skipping those that already
+        exist; returns the emails that were created
+        """
+
+    @abstractmethod
+    async def update(self, email: str, fields: Dict) -> None:
+        """Update fields (dotted paths and DELETE_FIELD allowed) on an existing user"""
+
+    @abstractmethod
+    async def edit_transcript(
+        self,
+        email: str,
+        remove: List[Dict],
+        add: List[Dict],
+        fields: Dict
+    ) -> None:
+        """
+        Atomically remove/add transcript entries and update other fields,
+        without rewriting the rest of the transcript
+        """
+
+    @abstractmethod
+    async def verified_users(self) -> Dict[str, Dict]:
+        """
+        Every user with a stored verification result, projected to the
+        fields it depends on (community_college, major, target_major and
+        the transcript's course codes)
+        """
+
+    def close(self) -> None:
+        """Shut down the thread pool"""
+        self._executor.shutdown(wait=False)
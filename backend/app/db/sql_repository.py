@@ -0,0 +1,298 @@
+"""
+SQL User Repository
+Stores users in the SQLAlchemy models (SQLite locally, PostgreSQL in
+production). Transcripts live in `transcript_courses` rows and every
+verification is appended to `verification_results`
+"""
+
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+import copy
+import os
+
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.repository import COURSE_FIELDS, DELETE_FIELD, UserRepository, split_field_path
+from app.models.models import User, TranscriptCourse, VerificationResult
+
+
+USER_COLUMNS = ("name", "major", "community_college", "target_uc", "target_major", "verification_key")
+JSON_COLUMNS = ("transcript_stats",)
+
+
+def _set_path(data: Dict, parts: List[str], value: Any) -> None:
+    for part in parts[:-1]:
+        data = data.setdefault(part, {})
+    if value is DELETE_FIELD:
+        data.pop(parts[-1], None)
+    else:
+        data[parts[-1]] = value
+
+
+class SqlUserRepository(UserRepository):
+    """Repository backed by SQLAlchemy sessions"""
+
+    def __init__(self, session_factory: sessionmaker, max_workers: Optional[int] = None):
+        # One thread per pooled connection
+        pool_size = int(os.getenv("DB_POOL_SIZE", "10")) + int(os.getenv("DB_MAX_OVERFLOW", "20"))
+        super().__init__(max_workers or pool_size, thread_name_prefix="sql")
+        self._session_factory = session_factory
+
+    # ---------- row <-> document mapping ----------
+
+    @staticmethod
+    def _course_rows(user_id: int, courses: List[Dict]) -> List[Dict]:
+        return [
+            {"user_id": user_id, **{name: course[name] for name in COURSE_FIELDS}}
+            for course in courses
+        ]
+
+    @staticmethod
+    def _result_row(user_id: int, result: Dict) -> Dict:
+        return {
+            "user_id": user_id,
+            "eligibility_status": result["eligibility_status"],
+            "eligibility_message": result["eligibility_message"],
+            "summary_data": result["summary"],
+            "major_requirements": result["major_requirements"],
+            "igetc_status": result["igetc_status"],
+            "risks": result["risks"],
+            "sources": result["sources"],
+            "notes": result.get("notes"),
+            "disclaimer": result.get("disclaimer"),
+        }
+
+    @staticmethod
+    def _result_doc(row: VerificationResult) -> Dict:
+        return {
+            "eligibility_status": row.eligibility_status,
+            "eligibility_message": row.eligibility_message,
+            "summary": row.summary_data,
+            "major_requirements": row.major_requirements,
+            "igetc_status": row.igetc_status,
+            "risks": row.risks,
+            "notes": row.notes or [],
+            "sources": row.sources,
+            "disclaimer": row.disclaimer,
+        }
+
+    def _load(self, session: Session, users: List[User], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Assemble user documents with up to two extra queries for the whole
+        set (skipped when `fields` leaves out transcript or results)
+        """
+        ids = [user.id for user in users]
+
+        courses: Dict[int, List[Dict]] = {user_id: [] for user_id in ids}
+        if fields is None or "transcript" in fields:
+            for row in session.execute(
+                select(TranscriptCourse)
+                .where(TranscriptCourse.user_id.in_(ids))
+                .order_by(TranscriptCourse.id)
+            ).scalars():
+                courses[row.user_id].append({name: getattr(row, name) for name in COURSE_FIELDS})
+
+        results: Dict[int, Dict] = {}
+        if fields is None or "verification_results" in fields:
+            # Latest verification result per user
+            latest = (
+                select(func.max(VerificationResult.id))
+                .where(VerificationResult.user_id.in_(ids))
+                .group_by(VerificationResult.user_id)
+            )
+            results = {
+                row.user_id: self._result_doc(row)
+                for row in session.execute(
+                    select(VerificationResult).where(VerificationResult.id.in_(latest))
+                ).scalars()
+            }
+
+        docs = {}
+        for user in users:
+            doc = {
+                "email": user.email,
+                "name": user.name,
+                "major": user.major,
+                "community_college": user.community_college,
+                "created_at": user.created_at.isoformat() if user.created_at else None,
+                "transcript": courses[user.id],
+                "target_uc": user.target_uc,
+                "target_major": user.target_major,
+                "verification_results": results.get(user.id),
+                "verification_key": user.verification_key,
+                "transcript_stats": user.transcript_stats,
+            }
+            docs[user.email] = doc if fields is None else {name: doc[name] for name in fields if name in doc}
+        return docs
+
+    def _user(self, session: Session, email: str) -> User:
+        user = session.execute(select(User).where(User.email == email)).scalar_one_or_none()
+        if user is None:
+            raise KeyError(f"User '{email}' not found")
+        return user
+
+    def _apply(self, session: Session, user: User, fields: Dict) -> None:
+        """Apply document-style field updates to a user's rows"""
+        json_values: Dict[str, Dict] = {}
+        for path, value in fields.items():
+            parts = split_field_path(path)
+            name = parts[0]
+            if name in USER_COLUMNS and len(parts) == 1:
+                setattr(user, name, None if value is DELETE_FIELD else value)
+            elif name in JSON_COLUMNS:
+                if name not in json_values:
+                    json_values[name] = copy.deepcopy(getattr(user, name) or {})
+                if len(parts) == 1:
+                    json_values[name] = None if value is DELETE_FIELD else value
+                else:
+                    _set_path(json_values[name], parts[1:], value)
+            elif name == "transcript" and len(parts) == 1:
+                session.execute(delete(TranscriptCourse).where(TranscriptCourse.user_id == user.id))
+                if value:
+                    session.execute(insert(TranscriptCourse), self._course_rows(user.id, value))
+            elif name == "verification_results" and len(parts) == 1:
+                if value:
+                    session.execute(insert(VerificationResult), [self._result_row(user.id, value)])
+            else:
+                raise ValueError(f"Unsupported field '{path}'")
+
+        # Assign fresh objects so the JSON columns are flagged as modified
+        for name, value in json_values.items():
+            setattr(user, name, value)
+        user.updated_at = datetime.utcnow()
+
+    # ---------- repository API ----------
+
+    async def get(self, email: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        def _get():
+            with self._session_factory() as session:
+                user = session.execute(select(User).where(User.email == email)).scalar_one_or_none()
+                return self._load(session, [user], fields)[email] if user else None
+        return await self._run(_get)
+
+    async def get_many(self, emails: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        def _get_many():
+            with self._session_factory() as session:
+                found = session.execute(select(User).where(User.email.in_(emails))).scalars().all()
+                return self._load(session, found, fields) if found else {}
+        return await self._run(_get_many)
+
+    async def create(self, email: str, data: Dict) -> bool:
+        def _create():
+            with self._session_factory() as session:
+                user = User(
+                    email=email,
+                    name=data["name"],
+                    major=data["major"],
+                    community_college=data["community_college"],
+                    target_uc=data.get("target_uc"),
+                    target_major=data.get("target_major"),
+                    transcript_stats=data.get("transcript_stats"),
+                )
+                session.add(user)
+                try:
+                    session.flush()
+                except IntegrityError:
+                    session.rollback()
+                    return False
+                if data.get("transcript"):
+                    session.execute(insert(TranscriptCourse), self._course_rows(user.id, data["transcript"]))
+                session.commit()
+                return True
+        return await self._run(_create)
+
+    async def create_many(self, users: Dict[str, Dict]) -> List[str]:
+        """Bulk inserts of users then courses, in one transaction"""
+        def _create_many():
+            with self._session_factory() as session:
+                existing = set(session.execute(
+                    select(User.email).where(User.email.in_(list(users)))
+                ).scalars())
+                new = [email for email in users if email not in existing]
+                if not new:
+                    return []
+                try:
+                    session.execute(insert(User), [
+                        {"email": email, **{name: users[email].get(name) for name in USER_COLUMNS + JSON_COLUMNS}}
+                        for email in new
+                    ])
+                    ids = dict(session.execute(select(User.email, User.id).where(User.email.in_(new))).all())
+                    courses = [
+                        row
+                        for email in new
+                        for row in self._course_rows(ids[email], users[email].get("transcript") or [])
+                    ]
+                    if courses:
+                        session.execute(insert(TranscriptCourse), courses)
+                    session.commit()
+                except IntegrityError:
+                    # Raced with another writer; fall back to one user at a time
+                    session.rollback()
+                    return None
+                return new
+
+        created = await self._run(_create_many)
+        if created is None:
+            created = [email for email in users if await self.create(email, users[email])]
+        return created
+
+    async def update(self, email: str, fields: Dict) -> None:
+        def _update():
+            with self._session_factory() as session:
+                self._apply(session, self._user(session, email), fields)
+                session.commit()
+        await self._run(_update)
+
+    async def edit_transcript(
+        self,
+        email: str,
+        remove: List[Dict],
+        add: List[Dict],
+        fields: Dict
+    ) -> None:
+        def _edit():
+            with self._session_factory() as session:
+                user = self._user(session, email)
+                # One row per removed course, even if the transcript has
+                # duplicates; the stats are decremented once per course
+                for course in remove:
+                    course_id = session.scalar(
+                        select(TranscriptCourse.id).where(
+                            TranscriptCourse.user_id == user.id,
+                            *(getattr(TranscriptCourse, name) == course[name] for name in COURSE_FIELDS)
+                        ).order_by(TranscriptCourse.id).limit(1)
+                    )
+                    if course_id is not None:
+                        session.execute(delete(TranscriptCourse).where(TranscriptCourse.id == course_id))
+                if add:
+                    session.execute(insert(TranscriptCourse), self._course_rows(user.id, add))
+                self._apply(session, user, fields)
+                session.commit()
+        await self._run(_edit)
+
+    async def verified_users(self) -> Dict[str, Dict]:
+        def _verified():
+            with self._session_factory() as session:
+                found: Dict[int, Dict] = {}
+                for user_id, email, college, major, target_major in session.execute(
+                    select(User.id, User.email, User.community_college, User.major, User.target_major)
+                    .where(User.verification_key.is_not(None))
+                ):
+                    found[user_id] = {
+                        "email": email,
+                        "community_college": college,
+                        "major": major,
+                        "target_major": target_major,
+                        "transcript": [],
+                    }
+                for user_id, code in session.execute(
+                    select(TranscriptCourse.user_id, TranscriptCourse.course_code)
+                    .join(User, User.id == TranscriptCourse.user_id)
+                    .where(User.verification_key.is_not(None))
+                ):
+                    if user_id in found:
+                        found[user_id]["transcript"].append({"course_code": code})
+                return {doc["email"]: doc for doc in found.values()}
+        return await self._run(_verified)
@@ -3,28 +3,283 @@ UC Transfer Path Verifier - Main FastAPI Application
 A tool to help California community college students verify their UC transfer eligibility
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import io
 import json
+import logging
+import os
+import tempfile
+import time
+
+from app.db.database import SessionLocal, init_db
+from app.db.repository import DELETE_FIELD, UserRepository, field_path
+from app.db.catalog_repository import catalog_signature, load_catalog, seed_catalog
+from app.catalog_data import UCSC_REQUIREMENTS, ASSIST_EQUIVALENCIES
+from app.services.auth import AuthError, AuthTimings, Session, SessionStore, TokenCache, session_from_claims
+from app.services.catalog import Catalog, CatalogStore
+from app.services.course_planner import RemainingCoursePlanner
+from app.services.explainer import ResultExplainer
+from app.services.llm import ExplanationService, LLMError, create_llm_backend, render_user_prompt
+from app.services.jobs import FINISHED, SUCCEEDED, Job, JobQueue, JobQueueFull, JobStore, MemoryJobStore
+from app.services import job_tasks
+from app.services.scheduler import PrerequisiteCycle
+from app.services.plan_matrix import STATUSES
+from app.services.requirement_plan import RequirementPlan, normalize_course_code
+from app.services.http_cache import Conditional, make_etag
+from app.services.result_cache import ResultCache, content_hash, verification_key
+from app.services.roster_import import import_roster
+from app.services.shared_cache import TieredCache, create_shared_tier
+from app.services.singleflight import KeyedLock, SingleFlight
+from app.services.transcript_stats import TranscriptStats
+from app.services.verification import batch_verification_results, major_requirements, verification_result
+from app.services.verification_index import VerificationIndex, catalog_changes
+
+logger = logging.getLogger(__name__)
+
+# Storage backend: "firestore" (default) or "sql" (DATABASE_URL)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+
+
+def init_firebase() -> None:
+    """Initialize Firebase Admin if not already done"""
+    import firebase_admin
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+
+
+def create_user_repository(backend: str) -> UserRepository:
+    """Build the user repository for the configured storage backend"""
+    if backend == "sql":
+        from app.db.sql_repository import SqlUserRepository
+        return SqlUserRepository(SessionLocal)
+    if backend == "firestore":
+        from firebase_admin import firestore
+        from app.db.firestore_repository import FirestoreUserRepository
+
+        init_firebase()
+        return FirestoreUserRepository(firestore.client())
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
+
+
+def create_job_store(backend: str) -> JobStore:
+    """Build the job state store: "sql" (DATABASE_URL) or "memory" """
+    if backend == "sql":
+        from app.db.job_store import SqlJobStore
+        return SqlJobStore(SessionLocal)
+    if backend == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown JOB_STORE '{backend}'")
+
+
+# Catalog tables live in DATABASE_URL whatever the user storage backend
+init_db()
+users = create_user_repository(STORAGE_BACKEND)
+
+# Read projections, so endpoints only fetch the fields they use
+PROFILE_FIELDS = ["email", "name", "major", "community_college", "created_at", "target_uc", "target_major"]
+STATS_FIELDS = ["major", "community_college", "target_uc", "target_major", "verification_key", "transcript_stats"]
+
+# Cache tier and pub/sub shared by all uvicorn workers: "memory" (single
+# worker), "sqlite" (CACHE_SQLITE_PATH, one host) or "redis" (CACHE_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+shared_cache = create_shared_tier(CACHE_BACKEND)
+
+# Uvicorn worker processes (uvicorn reads the same variable for --workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Background jobs run on a process pool per uvicorn worker; by default the
+# workers split the cores between them
+jobs = JobQueue(
+    store=create_job_store(os.getenv("JOB_STORE", "sql").lower()),
+    handlers={"verify_batch": job_tasks.verify_batch},
+    workers=int(os.getenv("JOB_WORKERS", "0")) or max((os.cpu_count() or 1) // max(WEB_CONCURRENCY, 1), 1),
+    max_depth=int(os.getenv("JOB_QUEUE_DEPTH", "1000")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    timeout_seconds=float(os.getenv("JOB_TIMEOUT_SECONDS", "300")),
+    initializer=job_tasks.init_worker,
+)
+# On start, jobs an earlier run left queued or running are requeued by the
+# first worker to take this lock. Every worker sharing the job store is
+# expected to restart together.
+JOB_RECOVERY_LOCK_SECONDS = 60.0
+
+
+# ===================== CATALOG =====================
+
+# The bundled mock data seeds an empty catalog database
+seed_catalog(SessionLocal, "UCSC", UCSC_REQUIREMENTS, ASSIST_EQUIVALENCIES)
+
+# In-memory catalog snapshot, hot-swapped when the tables change
+catalogs = CatalogStore(
+    load=lambda: load_catalog(SessionLocal),
+    signature=lambda: catalog_signature(SessionLocal),
+)
+catalogs.refresh()
+
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
 
-import firebase_admin
-from firebase_admin import credentials, firestore
 
-# Initialize Firebase Admin if not already done
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
+# Students indexed by the catalog entries their stored results depend on
+verification_index = VerificationIndex()
 
-db = firestore.client()
+# Re-verifications run at once after a catalog change
+REVERIFY_CONCURRENCY = int(os.getenv("REVERIFY_CONCURRENCY", "8"))
 
+# Reports of recent catalog-triggered re-verifications, newest last
+reverifications: deque = deque(maxlen=20)
+_reverify_tasks: set = set()
+
+
+async def rebuild_verification_index() -> int:
+    """Index every student with stored results (one projected scan)"""
+    found = await users.verified_users()
+    for email, user in found.items():
+        verification_index.record(
+            email,
+            user.get("community_college", ""),
+            "UCSC",
+            user.get("target_major") or user.get("major", ""),
+            [course["course_code"] for course in user.get("transcript") or []],
+        )
+    return len(found)
+
+
+async def refresh_catalog(force: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Refresh the catalog snapshot; on a swap, queue re-verification of the
+    students it affects and return the (live) report
+    """
+    loop = asyncio.get_running_loop()
+    before = catalogs.current
+    if not await loop.run_in_executor(None, lambda: catalogs.refresh(force=force)):
+        return None
+    after = catalogs.current
+    # Other workers swap now instead of at their next poll
+    await shared_cache.apublish("catalog", {"version": after.version})
+    change = await loop.run_in_executor(None, catalog_changes, before, after)
+    emails = sorted(verification_index.affected(change))
+    if emails and not await shared_cache.aadd(f"reverify:{after.version}", os.getpid(), 3600):
+        # Another worker already re-verifies for this version
+        emails = []
+
+    report = {
+        "from_version": before.version,
+        "to_version": after.version,
+        "started_at": datetime.now().isoformat(),
+        "changed_courses": len(change.courses),
+        "changed_plans": len(change.plans),
+        "indexed_users": len(verification_index),
+        "affected_users": len(emails),
+        "reverified": 0,
+        "failed": 0,
+        "done": not emails,
+        "elapsed_ms": 0.0,
+    }
+    reverifications.append(report)
+    if not emails:
+        await shared_cache.apublish("reverified", report)
+    else:
+        task = asyncio.create_task(reverify_users(emails, report))
+        _reverify_tasks.add(task)
+        task.add_done_callback(_reverify_tasks.discard)
+    return report
+
+
+async def reverify_users(emails: List[str], report: Dict[str, Any]) -> None:
+    """Re-run verification for affected students, updating `report` as it goes"""
+    start = time.perf_counter()
+    limit = asyncio.Semaphore(REVERIFY_CONCURRENCY)
+
+    async def reverify(email: str) -> None:
+        async with limit:
+            try:
+                await verify_flight.do(email, lambda: _verify_user(email))
+                report["reverified"] += 1
+            except HTTPException:
+                # No longer verifiable (user, transcript or major gone)
+                verification_index.discard(email)
+                report["failed"] += 1
+            except Exception:
+                logger.exception("Re-verification of %s failed", email)
+                report["failed"] += 1
+
+    await asyncio.gather(*(reverify(email) for email in emails))
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    report["done"] = True
+    await shared_cache.apublish("reverified", report)
+
+
+def _on_catalog_message(message: Dict[str, Any]) -> None:
+    """Another worker swapped the catalog (runs on the listener thread)"""
+    if message["origin"] != shared_cache.origin and catalogs.current.version != message["version"]:
+        # Forced: the announced version may come from a forced reload that
+        # the cheap signature probe cannot see
+        catalogs.refresh(force=True)
+
+
+def _on_verified_message(message: Dict[str, Any]) -> None:
+    """Another worker stored a verification: keep the reverse index in step"""
+    if message["origin"] != shared_cache.origin:
+        verification_index.record(
+            message["email"], message["college"], message["campus"], message["major"], message["courses"]
+        )
+
+
+def _on_reverified_message(message: Dict[str, Any]) -> None:
+    if message["origin"] != shared_cache.origin:
+        report = dict(message)
+        del report["origin"]
+        reverifications.append(report)
+
+
+shared_cache.subscribe("catalog", _on_catalog_message)
+shared_cache.subscribe("verified", _on_verified_message)
+shared_cache.subscribe("reverified", _on_reverified_message)
+
+
+async def refresh_catalog_periodically():
+    """Poll the catalog tables and swap in a rebuilt snapshot on change"""
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            await refresh_catalog()
+        except Exception:
+            # Keep serving the current snapshot
+            logger.exception("Catalog refresh failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await rebuild_verification_index()
+    shared_cache.start()
+    jobs.start()
+    # Workers starting together share the store; the first one recovers it
+    if await shared_cache.aadd("jobs:recovery", True, JOB_RECOVERY_LOCK_SECONDS):
+        recovered = await jobs.recover()
+        if recovered["requeued"] or recovered["failed"]:
+            logger.warning(
+                "Recovered unfinished jobs: %d requeued, %d failed", recovered["requeued"], recovered["failed"]
+            )
+    refresher = asyncio.create_task(refresh_catalog_periodically())
+    yield
+    refresher.cancel()
+    await jobs.stop()
+    shared_cache.stop()
 
 
 app = FastAPI(
     title="UC Transfer Path Verifier",
     description="Verify your UC transfer eligibility using official sources",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for React frontend
@@ -36,8 +291,108 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory sessions (for demo, not used for persistent user data)
-sessions_db: Dict[str, str] = {}
+# ===================== AUTH =====================
+
+# Reject requests without credentials (otherwise credentials are optional,
+# but a request that sends them may only touch its own user)
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "false").lower() in ("1", "true", "yes")
+
+# Admins (tokens with an `admin: true` custom claim, or these emails) may
+# bulk-import users, reload the catalog and batch-verify any student
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+
+def verify_firebase_token(token: str) -> Dict[str, Any]:
+    """
+    Signature, expiry, audience and issuer check of a Firebase ID token.
+    firebase_admin fetches Google's public keys through an HTTP cache that
+    honors their Cache-Control max-age, so keys are fetched about hourly.
+    """
+    from firebase_admin import auth
+    init_firebase()
+    return auth.verify_id_token(token)
+
+
+token_cache = TokenCache(
+    verify_firebase_token,
+    max_entries=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+)
+sessions = SessionStore(ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")), shared=shared_cache)
+auth_timings = AuthTimings()
+
+
+async def current_session(request: Request, response: Response) -> Optional[Session]:
+    """
+    The caller's session, from an `X-Session-Id` header / `session_id`
+    cookie or an `Authorization: Bearer <Firebase ID token>` header.
+    None for anonymous requests when AUTH_REQUIRED is off.
+    """
+    start = time.perf_counter()
+    session_id = request.headers.get("X-Session-Id") or request.cookies.get("session_id")
+    authorization = request.headers.get("Authorization", "")
+    try:
+        if session_id:
+            source = "session"
+            session = await sessions.get(session_id)
+            if session is None:
+                raise AuthError("Session expired or unknown")
+        elif authorization.lower().startswith("bearer "):
+            token = authorization[7:].strip()
+            claims = token_cache.cached(token)
+            source = "token_cached"
+            if claims is None:
+                # Signature checks and key fetches stay off the event loop
+                source = "token_verified"
+                claims = await asyncio.to_thread(token_cache.verify, token)
+            session = session_from_claims(claims, claims["exp"])
+        else:
+            if AUTH_REQUIRED:
+                raise AuthError("Authentication required")
+            return None
+    except AuthError as exc:
+        raise HTTPException(status_code=401, detail=str(exc), headers={"WWW-Authenticate": "Bearer"})
+
+    elapsed = (time.perf_counter() - start) * 1000
+    auth_timings.record(source, elapsed)
+    response.headers["Server-Timing"] = f"auth;desc={source};dur={elapsed:.3f}"
+    return session
+
+
+def authorize_email(session: Optional[Session], email: str) -> None:
+    """403 unless the caller is anonymous (auth optional) or is `email`"""
+    if session is not None and session.email.lower() != email.lower():
+        raise HTTPException(status_code=403, detail="Not allowed to access another user")
+
+
+async def user_access(email: str, session: Optional[Session] = Depends(current_session)) -> Optional[Session]:
+    """Dependency for `/{email}` routes"""
+    authorize_email(session, email)
+    return session
+
+
+def is_admin(session: Session) -> bool:
+    return session.claims.get("admin") is True or session.email.lower() in ADMIN_EMAILS
+
+
+async def require_session(session: Optional[Session] = Depends(current_session)) -> Session:
+    """Dependency for routes that need a signed-in caller even when AUTH_REQUIRED is off"""
+    if session is None:
+        raise HTTPException(status_code=401, detail="Authentication required", headers={"WWW-Authenticate": "Bearer"})
+    return session
+
+
+async def require_admin(session: Session = Depends(require_session)) -> Session:
+    """Dependency for admin-only routes"""
+    if not is_admin(session):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return session
+
+
+def authorize_emails(session: Session, emails: List[str]) -> None:
+    """403 unless the caller is an admin or every email is their own"""
+    if not is_admin(session):
+        for email in emails:
+            authorize_email(session, email)
 
 
 # ===================== MODELS =====================
@@ -76,132 +431,160 @@ class UCSelection(BaseModel):
     target_major: str
 
 
-# ===================== UCSC TRANSFER REQUIREMENTS DATA =====================
-# This is mock data based on real UCSC requirements - in production, fetch from official sources
+class CourseEdit(BaseModel):
+    course_code: str
+    semester: str
+    course: TranscriptCourse
 
-UCSC_REQUIREMENTS = {
-    "Computer Science": {
-        "required_courses": [
-            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
-            {"name": "Calculus II", "equivalent_codes": ["MATH 1B", "MATH 3B", "MATH 182"]},
-            {"name": "Linear Algebra", "equivalent_codes": ["MATH 21", "MATH 6", "MATH 250"]},
-            {"name": "Introduction to Programming", "equivalent_codes": ["CS 1A", "CIS 22A", "COMSC 110"]},
-            {"name": "Data Structures", "equivalent_codes": ["CS 1B", "CIS 22B", "COMSC 165"]},
-            {"name": "Discrete Mathematics", "equivalent_codes": ["CS 18", "CIS 18", "MATH 55"]},
-            {"name": "Physics I (Mechanics)", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 3.0,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Selection to the major is highly competitive",
-            "A GPA above 3.4 is recommended for competitive applicants",
-            "All major prep courses should be completed with C or better",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    },
-    "Biology": {
-        "required_courses": [
-            {"name": "General Chemistry I", "equivalent_codes": ["CHEM 1A", "CHEM 101"]},
-            {"name": "General Chemistry II", "equivalent_codes": ["CHEM 1B", "CHEM 102"]},
-            {"name": "Organic Chemistry I", "equivalent_codes": ["CHEM 12A", "CHEM 201"]},
-            {"name": "Biology I", "equivalent_codes": ["BIOL 1A", "BIO 101", "BIOSCI 101"]},
-            {"name": "Biology II", "equivalent_codes": ["BIOL 1B", "BIO 102", "BIOSCI 102"]},
-            {"name": "Calculus I", "equivalent_codes": ["MATH 1A", "MATH 3A", "MATH 181"]},
-            {"name": "Physics I", "equivalent_codes": ["PHYS 4A", "PHYS 1A", "PHYSIC 4A"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 2.8,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Strong performance in science courses is expected",
-            "Research experience is recommended but not required",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    },
-    "Psychology": {
-        "required_courses": [
-            {"name": "Introduction to Psychology", "equivalent_codes": ["PSYCH 1", "PSYCH 101", "PSY 1A"]},
-            {"name": "Statistics", "equivalent_codes": ["STAT 1", "MATH 10", "PSYCH 7"]},
-            {"name": "Research Methods", "equivalent_codes": ["PSYCH 2", "PSY 2"]},
-        ],
-        "igetc_areas": {
-            "1A": {"name": "English Composition", "required": True},
-            "1B": {"name": "Critical Thinking", "required": True},
-            "2": {"name": "Mathematical Concepts", "required": True},
-            "3A": {"name": "Arts", "required": True},
-            "3B": {"name": "Humanities", "required": True},
-            "4": {"name": "Social Sciences", "required": True, "courses_needed": 3},
-            "5A": {"name": "Physical Science", "required": True},
-            "5B": {"name": "Biological Science", "required": True},
-            "5C": {"name": "Lab Science", "required": True},
-            "6A": {"name": "Language Other Than English", "required": True},
-        },
-        "min_gpa": 2.5,
-        "min_units": 60,
-        "max_units": 90,
-        "notes": [
-            "Biology courses are recommended as preparation",
-        ],
-        "source_url": "https://admissions.ucsc.edu/transfer/requirements"
-    }
-}
 
-# Sample course equivalencies (mock Assist.org data)
-ASSIST_EQUIVALENCIES = {
-    "De Anza College": {
-        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "MATH 21": {"uc_equivalent": "MATH 21", "units": 5, "igetc": []},
-        "CIS 22A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
-        "CIS 22B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": []},
-        "PHYS 4A": {"uc_equivalent": "PHYS 6A", "units": 5, "igetc": ["5A", "5C"]},
-        "EWRT 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
-        "EWRT 2": {"uc_equivalent": "Writing 2", "units": 5, "igetc": ["1B"]},
-        "BIOL 6A": {"uc_equivalent": "BIOE 20A", "units": 5, "igetc": ["5B", "5C"]},
-        "CHEM 1A": {"uc_equivalent": "CHEM 1A", "units": 5, "igetc": ["5A", "5C"]},
-        "CHEM 1B": {"uc_equivalent": "CHEM 1B", "units": 5, "igetc": ["5A"]},
-    },
-    "Foothill College": {
-        "MATH 1A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 1B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "CS 1A": {"uc_equivalent": "CSE 20", "units": 4.5, "igetc": []},
-        "CS 1B": {"uc_equivalent": "CSE 30", "units": 4.5, "igetc": []},
-        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 5, "igetc": ["1A"]},
-        "PSYC 1": {"uc_equivalent": "PSYC 1", "units": 5, "igetc": ["4"]},
-    },
-    "Mission College": {
-        "MATH 3A": {"uc_equivalent": "MATH 19A", "units": 5, "igetc": ["2", "5A"]},
-        "MATH 3B": {"uc_equivalent": "MATH 19B", "units": 5, "igetc": ["2"]},
-        "COMSC 110": {"uc_equivalent": "CSE 20", "units": 4, "igetc": []},
-        "COMSC 165": {"uc_equivalent": "CSE 30", "units": 4, "igetc": []},
-        "ENGL 1A": {"uc_equivalent": "Writing 1", "units": 4, "igetc": ["1A"]},
+class BatchTranscript(BaseModel):
+    email: Optional[str] = None
+    community_college: str
+    major: str
+    courses: List[TranscriptCourse]
+
+
+class BatchVerifyRequest(BaseModel):
+    emails: List[str] = []
+    transcripts: List[BatchTranscript] = []
+    explain: bool = False
+
+
+# ===================== COMPILED REQUIREMENTS =====================
+
+EMPTY_PLAN = RequirementPlan([])
+
+# Verification results keyed by (transcript, college, major, catalog version)
+result_cache = TieredCache("results", ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+), shared_cache)
+
+# In-flight verifications, keyed by email
+verify_flight = SingleFlight()
+
+# Rendered explanation bundles keyed by the fingerprint of the result fields they use
+explanation_cache = ResultCache(
+    max_entries=int(os.getenv("EXPLANATION_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.getenv("EXPLANATION_CACHE_TTL", "3600")),
+)
+
+
+def explain_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """ResultExplainer sections for a result, rendered once per distinct result"""
+    key = ResultExplainer.fingerprint(result)
+    bundle = explanation_cache.get(key)
+    if bundle is None:
+        bundle = ResultExplainer.explain_result(result)
+        explanation_cache.set(key, bundle)
+    return bundle
+
+# LLM explanations: "http" (OpenAI-compatible LLM_BASE_URL, e.g. the local
+# stub server) or "stub" (in-process), cached by prompt hash in every worker
+LLM_BACKEND = os.getenv("LLM_BACKEND", "http").lower()
+explanations = ExplanationService(
+    create_llm_backend(LLM_BACKEND),
+    model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+    cache=TieredCache("llm", ResultCache(
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", "4096")),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+    ), shared_cache),
+    max_tokens=int(os.getenv("LLM_MAX_TOKENS", "400")),
+    max_concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+)
+
+# Latency budget for building fan-out verification rows
+FANOUT_BUDGET_MS = float(os.getenv("FANOUT_BUDGET_MS", "200"))
+
+# Time allowed for an exact remaining-course plan before falling back to greedy
+PLANNER_BUDGET_MS = float(os.getenv("PLANNER_BUDGET_MS", "100"))
+
+# Default unit cap per term for generated schedules
+DEFAULT_TERM_UNITS = float(os.getenv("DEFAULT_TERM_UNITS", "15"))
+
+# Serializes transcript edits and verification writes (read-modify-write of
+# transcript_stats) per email
+transcript_locks = KeyedLock()
+
+# Roster import: students validated and written per chunk, chunks written at once
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "4"))
+# Largest roster body accepted, in bytes (larger uploads get a 413)
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+
+# ===================== VERIFICATION =====================
+
+GRADE_POINTS = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
+                "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "F": 0.0}
+
+
+def load_transcript_stats(user: Dict, catalog: Catalog) -> TranscriptStats:
+    """
+    Running transcript aggregates for a user, bound to their current
+    target major, college and catalog (built from the transcript if missing)
+    """
+    major = user.get("target_major") or user.get("major", "")
+    plan = catalog.plans.get(("UCSC", major), EMPTY_PLAN)
+    plan_key = f"UCSC|{major}"
+    college = user.get("community_college", "")
+    masks = catalog.igetc_masks.get(college, {})
+
+    stored = user.get("transcript_stats")
+    if not stored:
+        return TranscriptStats.from_transcript(
+            user.get("transcript") or [], GRADE_POINTS, plan_key, plan, college, masks, catalog.version
+        )
+    stats = TranscriptStats.from_dict(stored)
+    stats.bind(plan_key, plan, college, masks, catalog.version)
+    return stats
+
+
+async def get_user_stats(email: str) -> Optional[Dict]:
+    """
+    The user fields verification reads. The transcript itself is only
+    fetched for users without stored transcript_stats
+    """
+    user = await users.get(email, STATS_FIELDS)
+    if user is not None and not user.get("transcript_stats"):
+        user["transcript"] = (await users.get(email, ["transcript"]) or {}).get("transcript") or []
+    return user
+
+
+def has_courses(user: Dict) -> bool:
+    """Whether a user read by get_user_stats has any transcript courses"""
+    stored = user.get("transcript_stats")
+    if stored:
+        return bool(stored.get("course_counts"))
+    return bool(user.get("transcript"))
+
+
+def stats_update_fields(stats: TranscriptStats, before: Optional[Dict]) -> Dict[str, Any]:
+    """Firestore field updates for the parts of transcript_stats that changed"""
+    if before is None:
+        return {"transcript_stats": stats.to_dict()}
+    return {
+        field_path("transcript_stats", *path): DELETE_FIELD if value is None else value
+        for path, value in stats.changed_fields(before).items()
     }
-}
+
+
+def build_verification_result(
+    stats: TranscriptStats,
+    college: str,
+    major: str,
+    catalog: Catalog
+) -> Dict[str, Any]:
+    """Check transcript aggregates against a UCSC major's requirements"""
+    plan = catalog.plans[("UCSC", major)]
+    return verification_result(
+        catalog.campus_requirements("UCSC")[major],
+        major,
+        stats.gpa,
+        stats.total_units,
+        major_requirements(plan, stats.matches(plan)),
+        catalog.igetc_plans[("UCSC", major)].status_from_counts(stats.igetc_counts),
+    )
 
 
 # ===================== API ENDPOINTS =====================
@@ -212,12 +595,9 @@ async def root():
 
 
 @app.post("/api/auth/register")
-async def register_user(user: UserCreate):
+async def register_user(user: UserCreate, session: Optional[Session] = Depends(current_session)):
     """Register a new user after Google OAuth"""
-    user_ref = db.collection("users").document(user.email)
-    doc = user_ref.get()
-    if doc.exists:
-        raise HTTPException(status_code=400, detail="User already exists")
+    authorize_email(session, user.email)
     user_data = {
         "email": user.email,
         "name": user.name,
@@ -229,90 +609,178 @@ async def register_user(user: UserCreate):
         "target_major": user.major,
         "verification_results": None
     }
-    user_ref.set(user_data)
+    if not await users.create(user.email, user_data):
+        raise HTTPException(status_code=400, detail="User already exists")
     return {"success": True, "user": user_data}
 
 
-@app.get("/api/auth/user/{email}")
+@app.post("/api/users/import", dependencies=[Depends(require_admin)])
+async def import_users(request: Request, format: Optional[str] = None):
+    """
+    Bulk-register students from a JSONL or CSV roster sent as the request
+    body (format from `?format=` or the Content-Type); existing users are
+    skipped and every rejected row is reported
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("Content-Type", "") else "jsonl")
+    if fmt not in ("jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+
+    too_large = HTTPException(status_code=413, detail=f"Roster exceeds {IMPORT_MAX_BYTES} bytes")
+    length = request.headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > IMPORT_MAX_BYTES:
+        raise too_large
+
+    # Spooled to disk past 8 MB rather than held in memory
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as body:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise too_large
+            body.write(chunk)
+        body.seek(0)
+        catalog = catalogs.current
+        report = await import_roster(
+            users,
+            io.TextIOWrapper(body, encoding="utf-8", newline=""),
+            fmt,
+            chunk_size=IMPORT_CHUNK_SIZE,
+            concurrency=IMPORT_CONCURRENCY,
+            transcript_stats=lambda doc: load_transcript_stats(doc, catalog).to_dict(),
+        )
+    return report.to_dict()
+
+
+@app.post("/api/auth/session")
+async def create_session(request: Request, response: Response):
+    """
+    Exchange a Firebase ID token (Authorization: Bearer) for a session id,
+    so later requests skip token checks entirely
+    """
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Bearer token required", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        claims = await asyncio.to_thread(token_cache.verify, authorization[7:].strip())
+        session = await sessions.create(claims)
+    except AuthError as exc:
+        raise HTTPException(status_code=401, detail=str(exc), headers={"WWW-Authenticate": "Bearer"})
+    response.set_cookie(
+        "session_id", session.session_id,
+        max_age=int(sessions.ttl_seconds), httponly=True, samesite="lax",
+    )
+    return {"session_id": session.session_id, "email": session.email, "expires_at": session.expires_at}
+
+
+@app.delete("/api/auth/session")
+async def delete_session(request: Request, response: Response):
+    """Log out: drop the caller's session"""
+    session_id = request.headers.get("X-Session-Id") or request.cookies.get("session_id")
+    response.delete_cookie("session_id")
+    return {"success": bool(session_id) and await sessions.delete(session_id)}
+
+
+@app.get("/api/auth/stats", dependencies=[Depends(require_admin)])
+async def get_auth_stats():
+    """Token cache, session store and per-request auth overhead"""
+    return {
+        "required": AUTH_REQUIRED,
+        "tokens": token_cache.stats(),
+        "sessions": sessions.stats(),
+        "overhead": auth_timings.stats(),
+    }
+
+
+@app.get("/api/auth/user/{email}", dependencies=[Depends(user_access)])
 async def get_user(email: str):
     """Get user profile by email"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    user = await users.get(email, PROFILE_FIELDS)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return doc.to_dict()
+    return user
 
 
-@app.put("/api/auth/user/{email}")
+@app.put("/api/auth/user/{email}", dependencies=[Depends(user_access)])
 async def update_user(email: str, user: UserCreate):
     """Update user profile"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    current = await users.get(email, PROFILE_FIELDS)
+    if current is None:
         raise HTTPException(status_code=404, detail="User not found")
     update_data = {
         "name": user.name,
         "major": user.major,
         "community_college": user.community_college,
     }
-    user_ref.update(update_data)
-    # Return updated user
-    updated_doc = user_ref.get()
-    return updated_doc.to_dict()
+    await users.update(email, update_data)
+    # The update is all that changed; no second read
+    return {**current, **update_data}
+
+
+COMMUNITY_COLLEGES = {
+    "colleges": [
+        "De Anza College",
+        "Foothill College", 
+        "Mission College",
+        "West Valley College",
+        "Ohlone College",
+        "San Jose City College",
+        "Evergreen Valley College",
+    ]
+}
+
+UC_CAMPUSES = {
+    "campuses": [
+        {"id": "ucsc", "name": "UC Santa Cruz", "available": True},
+        {"id": "ucb", "name": "UC Berkeley", "available": False},
+        {"id": "ucla", "name": "UCLA", "available": False},
+        {"id": "ucsd", "name": "UC San Diego", "available": False},
+        {"id": "ucd", "name": "UC Davis", "available": False},
+        {"id": "uci", "name": "UC Irvine", "available": False},
+        {"id": "ucr", "name": "UC Riverside", "available": False},
+        {"id": "ucsb", "name": "UC Santa Barbara", "available": False},
+        {"id": "ucm", "name": "UC Merced", "available": False},
+    ]
+}
+
+# Static lists are versioned by their content, catalog lists by the catalog version
+STATIC_VERSION = content_hash(COMMUNITY_COLLEGES, UC_CAMPUSES)[:16]
+CATALOG_CACHE_CONTROL = f"public, max-age={os.getenv('CATALOG_MAX_AGE', '60')}"
+RESULTS_CACHE_CONTROL = "private, no-cache"
 
 
 @app.get("/api/colleges")
-async def get_community_colleges():
+async def get_community_colleges(conditional: Conditional = Depends()):
     """Get list of supported community colleges"""
-    return {
-        "colleges": [
-            "De Anza College",
-            "Foothill College", 
-            "Mission College",
-            "West Valley College",
-            "Ohlone College",
-            "San Jose City College",
-            "Evergreen Valley College",
-        ]
-    }
+    return conditional.respond(STATIC_VERSION, lambda: COMMUNITY_COLLEGES, CATALOG_CACHE_CONTROL, cache_body=True)
 
 
 @app.get("/api/majors")
-async def get_supported_majors():
+async def get_supported_majors(conditional: Conditional = Depends()):
     """Get list of supported majors for UCSC"""
-    return {
-        "majors": list(UCSC_REQUIREMENTS.keys())
-    }
+    catalog = catalogs.current
+    return conditional.respond(
+        catalog.version,
+        lambda: {"majors": list(catalog.campus_requirements("UCSC").keys())},
+        CATALOG_CACHE_CONTROL,
+        cache_body=True,
+    )
 
 
 @app.get("/api/uc-campuses")
-async def get_uc_campuses():
+async def get_uc_campuses(conditional: Conditional = Depends()):
     """Get list of UC campuses (demo: only UCSC)"""
-    return {
-        "campuses": [
-            {"id": "ucsc", "name": "UC Santa Cruz", "available": True},
-            {"id": "ucb", "name": "UC Berkeley", "available": False},
-            {"id": "ucla", "name": "UCLA", "available": False},
-            {"id": "ucsd", "name": "UC San Diego", "available": False},
-            {"id": "ucd", "name": "UC Davis", "available": False},
-            {"id": "uci", "name": "UC Irvine", "available": False},
-            {"id": "ucr", "name": "UC Riverside", "available": False},
-            {"id": "ucsb", "name": "UC Santa Barbara", "available": False},
-            {"id": "ucm", "name": "UC Merced", "available": False},
-        ]
-    }
+    return conditional.respond(STATIC_VERSION, lambda: UC_CAMPUSES, CATALOG_CACHE_CONTROL, cache_body=True)
 
 
 @app.post("/api/select-uc")
-async def select_target_uc(selection: UCSelection):
+async def select_target_uc(selection: UCSelection, session: Optional[Session] = Depends(current_session)):
     """Select target UC campus"""
-    user_ref = db.collection("users").document(selection.user_email)
-    doc = user_ref.get()
-    if not doc.exists:
+    authorize_email(session, selection.user_email)
+    if await users.get(selection.user_email, []) is None:
         raise HTTPException(status_code=404, detail="User not found")
     if selection.target_uc.lower() != "ucsc":
         raise HTTPException(status_code=400, detail="Only UCSC is available in demo")
-    user_ref.update({
+    await users.update(selection.user_email, {
         "target_uc": selection.target_uc,
         "target_major": selection.target_major
     })
@@ -320,227 +788,661 @@ async def select_target_uc(selection: UCSelection):
 
 
 @app.post("/api/transcript/upload")
-async def upload_transcript(transcript: TranscriptUpload):
+async def upload_transcript(transcript: TranscriptUpload, session: Optional[Session] = Depends(current_session)):
     """Upload/enter transcript courses"""
-    user_ref = db.collection("users").document(transcript.user_email)
-    doc = user_ref.get()
-    if not doc.exists:
-        raise HTTPException(status_code=404, detail="User not found")
-    user_ref.update({
-        "transcript": [course.dict() for course in transcript.courses]
-    })
+    authorize_email(session, transcript.user_email)
+    async with transcript_locks(transcript.user_email):
+        user = await users.get(transcript.user_email, STATS_FIELDS)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        courses = [course.dict() for course in transcript.courses]
+        stats = load_transcript_stats({**user, "transcript": courses, "transcript_stats": None}, catalogs.current)
+        await users.update(transcript.user_email, {
+            "transcript": courses,
+            "transcript_stats": stats.to_dict(),
+        })
     return {"success": True, "courses_count": len(transcript.courses)}
 
 
-@app.get("/api/transcript/{email}")
+def _find_course(transcript: List[Dict], course_code: str, semester: str) -> Optional[Dict]:
+    """Find a transcript entry by (course code, semester)"""
+    code = normalize_course_code(course_code)
+    for course in transcript:
+        if normalize_course_code(course["course_code"]) == code and course["semester"] == semester:
+            return course
+    return None
+
+
+async def _edit_transcript(
+    email: str,
+    user: Dict,
+    remove: Optional[Dict],
+    add: Optional[Dict]
+) -> Dict[str, Any]:
+    """Apply a single-course edit and write only what changed"""
+    transcript = user.get("transcript") or []
+    catalog = catalogs.current
+    stats = load_transcript_stats(user, catalog)
+    # Diffed against the stored stats, not the re-bound ones, so a major,
+    # college or catalog change since they were written is saved too
+    before = user.get("transcript_stats") or None
+
+    major = user.get("target_major") or user.get("major", "")
+    plan = catalog.plans.get(("UCSC", major), EMPTY_PLAN)
+    masks = catalog.igetc_masks.get(user.get("community_college", ""), {})
+    if remove is not None:
+        stats.remove_course(remove, GRADE_POINTS, plan, masks)
+    if add is not None:
+        stats.add_course(add, GRADE_POINTS, plan, masks)
+
+    await users.edit_transcript(
+        email,
+        remove=[remove] if remove is not None else [],
+        add=[add] if add is not None else [],
+        fields=stats_update_fields(stats, before),
+    )
+    count = len(transcript) + (add is not None) - (remove is not None)
+    return {
+        "success": True,
+        "courses_count": count,
+        "gpa": round(stats.gpa, 2),
+        "total_units": stats.total_units,
+    }
+
+
+@app.post("/api/transcript/{email}/courses", dependencies=[Depends(user_access)])
+async def add_transcript_course(email: str, course: TranscriptCourse):
+    """Add one course to a transcript"""
+    async with transcript_locks(email):
+        user = await users.get(email, STATS_FIELDS + ["transcript"])
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        if _find_course(user.get("transcript") or [], course.course_code, course.semester):
+            raise HTTPException(status_code=400, detail="Course already on transcript for that semester")
+        return await _edit_transcript(email, user, None, course.dict())
+
+
+@app.put("/api/transcript/{email}/courses", dependencies=[Depends(user_access)])
+async def modify_transcript_course(email: str, edit: CourseEdit):
+    """Replace one course (identified by course code and semester)"""
+    async with transcript_locks(email):
+        user = await users.get(email, STATS_FIELDS + ["transcript"])
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        existing = _find_course(user.get("transcript") or [], edit.course_code, edit.semester)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Course not found on transcript")
+        return await _edit_transcript(email, user, existing, edit.course.dict())
+
+
+@app.delete("/api/transcript/{email}/courses", dependencies=[Depends(user_access)])
+async def remove_transcript_course(email: str, course_code: str, semester: str):
+    """Remove one course (identified by course code and semester)"""
+    async with transcript_locks(email):
+        user = await users.get(email, STATS_FIELDS + ["transcript"])
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        existing = _find_course(user.get("transcript") or [], course_code, semester)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Course not found on transcript")
+        return await _edit_transcript(email, user, existing, None)
+
+
+@app.get("/api/transcript/{email}", dependencies=[Depends(user_access)])
 async def get_transcript(email: str):
     """Get user's transcript"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    user_data = await users.get(email, ["transcript"])
+    if user_data is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user_data = doc.to_dict()
     return {"courses": user_data.get("transcript", [])}
 
 
-@app.post("/api/verify/{email}")
+async def _batch_entries(request: BatchVerifyRequest):
+    """
+    (key, transcript, college, major) entries and per-entry errors for a
+    batch. Keys are emails, or `transcripts[i]` for inline transcripts
+    without one; entries /api/verify/{email} would reject become errors
+    """
+    entries = []
+    errors = []
+    keys = set()
+    majors = catalogs.current.campus_requirements("UCSC")
+
+    def add(key: str, transcript: List[Dict], college: str, major: str) -> None:
+        if major not in majors:
+            errors.append({"email": key, "error": f"Major '{major}' not supported in demo"})
+        elif key in keys:
+            errors.append({"email": key, "error": "Duplicate email in batch"})
+        else:
+            keys.add(key)
+            entries.append((key, transcript, college, major))
+
+    if request.emails:
+        found = await users.get_many(
+            request.emails, ["community_college", "major", "target_major", "target_uc", "transcript"]
+        )
+        for email in request.emails:
+            user = found.get(email)
+            if user is None:
+                errors.append({"email": email, "error": "User not found"})
+            elif not user.get("target_uc"):
+                errors.append({"email": email, "error": "Please select a target UC first"})
+            elif not user.get("transcript"):
+                errors.append({"email": email, "error": "Please upload your transcript first"})
+            else:
+                add(
+                    email,
+                    user["transcript"],
+                    user.get("community_college", ""),
+                    user.get("target_major") or user.get("major", "Computer Science"),
+                )
+
+    for index, item in enumerate(request.transcripts):
+        add(
+            item.email or f"transcripts[{index}]",
+            [course.dict() for course in item.courses],
+            item.community_college,
+            item.major,
+        )
+    return entries, errors
+
+
+@app.post("/api/verify/batch")
+async def verify_batch(request: BatchVerifyRequest, session: Session = Depends(require_session)):
+    """
+    Verify many students at once (e.g. a counseling cohort)
+    Accepts registered emails (admins: any student's) and/or inline
+    transcripts. `results` maps each key to the same result
+    /api/verify/{email} returns; rejected entries are listed in `errors`
+    """
+    authorize_emails(session, request.emails)
+    entries, errors = await _batch_entries(request)
+
+    start = time.perf_counter()
+    results = batch_verification_results(
+        catalogs.current,
+        [e[1] for e in entries],
+        [e[2] for e in entries],
+        [e[3] for e in entries],
+    )
+    response = {"results": {entry[0]: result for entry, result in zip(entries, results)}}
+    if request.explain:
+        response["explanations"] = {key: explain_result(result) for key, result in response["results"].items()}
+    elapsed = time.perf_counter() - start
+
+    return {
+        "count": len(results),
+        "elapsed_ms": round(elapsed * 1000, 2),
+        **response,
+        "errors": errors,
+    }
+
+
+@app.post("/api/verify/{email}", dependencies=[Depends(user_access)])
 async def verify_transfer_eligibility(email: str):
     """
     Main verification endpoint - checks transcript against requirements
     Uses mock Assist.org data and UCSC requirements
     """
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+    # Concurrent verifies for the same student share one get/compute/update
+    return await verify_flight.do(email, lambda: _verify_user(email))
+
+
+async def _verify_user(email: str) -> Dict[str, Any]:
+    """Load, verify and store results for one user"""
+    user = await get_user_stats(email)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user = doc.to_dict()
 
     if not user.get("target_uc"):
         raise HTTPException(status_code=400, detail="Please select a target UC first")
 
-    if not user.get("transcript"):
+    if not has_courses(user):
         raise HTTPException(status_code=400, detail="Please upload your transcript first")
 
+    catalog = catalogs.current
     major = user.get("target_major", user.get("major", "Computer Science"))
-    if major not in UCSC_REQUIREMENTS:
+    if major not in catalog.campus_requirements("UCSC"):
         raise HTTPException(status_code=400, detail=f"Major '{major}' not supported in demo")
 
-    requirements = UCSC_REQUIREMENTS[major]
     college = user["community_college"]
-    transcript = user["transcript"]
+    stats = load_transcript_stats(user, catalog)
+
+    # Identical inputs against the same catalog give the same result
+    key = verification_key(stats.fingerprint, college, major, catalog.version)
+    result = await result_cache.aget(key)
+    if result is None:
+        result = build_verification_result(stats, college, major, catalog)
+        await result_cache.aset(key, result)
+
+    # Store results in Firestore (skipped when the stored result is current)
+    if user.get("verification_key") != key:
+        async with transcript_locks(email):
+            # A transcript or profile edit since the read above makes this
+            # result stale; only store it if the stored inputs still match
+            current = await get_user_stats(email)
+            if current is not None and current.get("verification_key") != key and key == verification_key(
+                load_transcript_stats(current, catalog).fingerprint,
+                current.get("community_college", ""),
+                current.get("target_major", current.get("major", "Computer Science")),
+                catalog.version,
+            ):
+                update = {"verification_results": result, "verification_key": key}
+                if (current.get("transcript_stats") or {}).get("catalog_version") != catalog.version:
+                    update["transcript_stats"] = stats.to_dict()
+                await users.update(email, update)
+    courses = list(stats.course_counts)
+    if verification_index.record(email, college, "UCSC", major, courses):
+        await shared_cache.apublish("verified", {
+            "email": email, "college": college, "campus": "UCSC", "major": major, "courses": courses,
+        })
+    return result
 
-    # Get course equivalencies for the college
-    equivalencies = ASSIST_EQUIVALENCIES.get(college, {})
 
-    # Analyze completed courses
-    completed_codes = [c["course_code"].upper() for c in transcript]
-    total_units = sum(c["units"] for c in transcript)
+@app.post("/api/verify/{email}/matrix", dependencies=[Depends(user_access)])
+async def verify_all_plans(email: str, limit: int = 100, budget_ms: Optional[float] = None):
+    """
+    Fan-out verification: rank every (campus, major) plan in the catalog
+    for a student's transcript
+    """
+    user = await get_user_stats(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not has_courses(user):
+        raise HTTPException(status_code=400, detail="Please upload your transcript first")
 
-    # Calculate GPA
-    grade_points = {"A": 4.0, "A-": 3.7, "B+": 3.3, "B": 3.0, "B-": 2.7,
-                   "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "F": 0.0}
+    start = time.perf_counter()
+    budget = (budget_ms if budget_ms is not None else FANOUT_BUDGET_MS) / 1000
+    catalog = catalogs.current
+    matrix = catalog.plan_matrix
 
-    total_grade_points = 0
-    graded_units = 0
-    for course in transcript:
-        grade = course["grade"].upper()
-        if grade in grade_points:
-            total_grade_points += grade_points[grade] * course["units"]
-            graded_units += course["units"]
-
-    gpa = total_grade_points / graded_units if graded_units > 0 else 0.0
-
-    # Check major requirements
-    major_requirements_status = []
-    for req in requirements["required_courses"]:
-        completed = False
-        matched_course = None
-
-        for code in req["equivalent_codes"]:
-            if code.upper() in completed_codes:
-                completed = True
-                matched_course = code
-                break
-
-        major_requirements_status.append({
-            "requirement": req["name"],
-            "completed": completed,
-            "matched_course": matched_course,
-            "acceptable_courses": req["equivalent_codes"],
-        })
+    # Features are extracted once and shared by every plan
+    stats = load_transcript_stats(user, catalog)
+    scores = matrix.score(stats.course_counts, stats.gpa, stats.total_units, stats.igetc_counts)
+    rows, complete = matrix.ranked_rows(scores, max(limit, 0), start + budget)
 
-    # Check IGETC areas
-    igetc_status = {}
-    completed_igetc = set()
-
-    for code in completed_codes:
-        if code in equivalencies:
-            for area in equivalencies[code].get("igetc", []):
-                completed_igetc.add(area)
-
-    for area, info in requirements["igetc_areas"].items():
-        igetc_status[area] = {
-            "name": info["name"],
-            "completed": area in completed_igetc,
-            "required": info["required"],
-        }
-
-    # Identify risks and warnings
-    risks = []
-
-    if gpa < requirements["min_gpa"]:
-        risks.append({
-            "type": "GPA",
-            "severity": "high",
-            "message": f"Your GPA ({gpa:.2f}) is below the minimum requirement ({requirements['min_gpa']})",
-            "source": requirements["source_url"]
-        })
-    elif gpa < requirements["min_gpa"] + 0.3:
-        risks.append({
-            "type": "GPA",
-            "severity": "medium",
-            "message": f"Your GPA ({gpa:.2f}) is close to the minimum. A higher GPA improves your chances.",
-            "source": requirements["source_url"]
-        })
+    return {
+        "catalog_version": catalog.version,
+        "plans": len(matrix),
+        "gpa": round(stats.gpa, 2),
+        "total_units": stats.total_units,
+        "complete": complete,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "matrix": rows,
+    }
 
-    if total_units < requirements["min_units"]:
-        risks.append({
-            "type": "Units",
-            "severity": "high",
-            "message": f"You have {total_units} units but need at least {requirements['min_units']} to transfer",
-            "source": requirements["source_url"]
-        })
 
-    if total_units > requirements["max_units"]:
-        risks.append({
-            "type": "Units",
-            "severity": "medium",
-            "message": f"You have {total_units} units which exceeds the {requirements['max_units']} unit cap. Some units may not transfer.",
-            "source": requirements["source_url"]
-        })
+@app.get("/api/recommendations/{email}", dependencies=[Depends(user_access)])
+async def recommend_majors(email: str, k: int = 5):
+    """The k campus/major plans a student is closest to satisfying"""
+    user = await get_user_stats(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    # Missing major prep courses
-    missing_major_prep = [r for r in major_requirements_status if not r["completed"]]
-    if missing_major_prep:
-        risks.append({
-            "type": "Major Prep",
-            "severity": "high",
-            "message": f"You are missing {len(missing_major_prep)} required major preparation course(s)",
-            "source": "https://assist.org"
-        })
+    catalog = catalogs.current
+    matrix = catalog.plan_matrix
+    stats = load_transcript_stats(user, catalog)
+    scores = matrix.score(stats.course_counts, stats.gpa, stats.total_units, stats.igetc_counts)
 
-    # Missing IGETC areas
-    missing_igetc = [area for area, info in igetc_status.items()
-                    if info["required"] and not info["completed"]]
-    if missing_igetc:
-        risks.append({
-            "type": "IGETC",
-            "severity": "medium",
-            "message": f"IGETC areas not yet satisfied: {', '.join(missing_igetc)}",
-            "source": "https://assist.org/transfer/institution/113/115"
+    recommendations = []
+    for distance, plan_id in matrix.closest(scores, max(k, 0)):
+        campus, major = matrix.keys[plan_id]
+        recommendations.append({
+            "campus": campus,
+            "major": major,
+            "distance": round(distance, 2),
+            "eligibility_status": STATUSES[scores.status[plan_id]],
+            "gpa_margin": round(float(scores.gpa_margin[plan_id]), 2),
+            **matrix.gaps(plan_id, stats.course_counts, stats.igetc_counts),
         })
+    return {"catalog_version": catalog.version, "recommendations": recommendations}
 
-    # Overall eligibility determination
-    major_prep_complete = len(missing_major_prep) == 0
-    units_ok = requirements["min_units"] <= total_units <= requirements["max_units"]
-    gpa_ok = gpa >= requirements["min_gpa"]
-
-    if major_prep_complete and units_ok and gpa_ok:
-        eligibility_status = "likely_eligible"
-        eligibility_message = "Based on official requirements, you appear to meet the basic transfer eligibility criteria."
-    elif gpa_ok and units_ok:
-        eligibility_status = "conditional"
-        eligibility_message = "You meet some requirements but have missing coursework. Complete the missing courses before applying."
-    else:
-        eligibility_status = "not_yet_eligible"
-        eligibility_message = "You do not yet meet the transfer requirements. See the issues below."
-
-    # Build the result
-    result = {
-        "eligibility_status": eligibility_status,
-        "eligibility_message": eligibility_message,
-        "summary": {
-            "total_units": total_units,
-            "gpa": round(gpa, 2),
-            "min_gpa_required": requirements["min_gpa"],
-            "units_range": f"{requirements['min_units']}-{requirements['max_units']}",
-            "major": major,
-            "target_uc": "UC Santa Cruz",
-        },
-        "major_requirements": {
-            "completed": [r for r in major_requirements_status if r["completed"]],
-            "missing": missing_major_prep,
+
+async def _remaining_course_plan(email: str, budget_ms: Optional[float]):
+    """Load a user and plan their remaining courses for the target major"""
+    user = await get_user_stats(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    catalog = catalogs.current
+    major = user.get("target_major") or user.get("major", "")
+    if ("UCSC", major) not in catalog.plans:
+        raise HTTPException(status_code=400, detail=f"Major '{major}' not supported in demo")
+
+    college = user.get("community_college", "")
+    stats = load_transcript_stats(user, catalog)
+    planner = RemainingCoursePlanner(
+        plan=catalog.plans[("UCSC", major)],
+        igetc=catalog.igetc_plans[("UCSC", major)],
+        satisfied_slots=[int(slot_id) for slot_id in stats.satisfied],
+        igetc_counts=stats.igetc_counts,
+        offered=catalog.igetc_masks.get(college, {}),
+        taken=stats.course_counts,
+    )
+    budget = budget_ms if budget_ms is not None else PLANNER_BUDGET_MS
+    return catalog, major, college, stats, catalog.course_plans.plan(college, planner, budget / 1000)
+
+
+@app.get("/api/planner/{email}", dependencies=[Depends(user_access)])
+async def plan_remaining_courses(email: str, budget_ms: Optional[float] = None):
+    """
+    Smallest set of courses at the student's college that covers every
+    missing major prep requirement and IGETC area for their target major
+    """
+    _, major, college, _, course_plan = await _remaining_course_plan(email, budget_ms)
+    return {
+        "major": major,
+        "community_college": college,
+        **course_plan,
+        "explanation": ResultExplainer.explain_course_plan(course_plan),
+    }
+
+
+@app.get("/api/schedule/{email}", dependencies=[Depends(user_access)])
+async def schedule_remaining_courses(
+    email: str,
+    max_term_units: float = DEFAULT_TERM_UNITS,
+    budget_ms: Optional[float] = None
+):
+    """
+    Term-by-term schedule for the planned remaining courses (plus any
+    untaken prerequisites), topping up with electives to reach the
+    minimum transferable units. The major's max_units cap is advisory:
+    required courses are never dropped to stay under it, so a plan past
+    the cap is returned with a warning
+    """
+    if max_term_units <= 0:
+        raise HTTPException(status_code=400, detail="max_term_units must be positive")
+    catalog, major, college, stats, course_plan = await _remaining_course_plan(email, budget_ms)
+    requirements = catalog.campus_requirements("UCSC")[major]
+    scheduler = catalog.scheduler
+
+    planned = [course["course_code"] for course in course_plan["courses"]]
+    courses, unavailable = scheduler.closure(college, planned, stats.course_counts)
+    try:
+        schedule = scheduler.terms(college, courses, max_term_units)
+    except PrerequisiteCycle as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    terms = []
+    total_units = stats.total_units
+    for number, codes in enumerate(schedule, start=1):
+        term_courses = [
+            {
+                "course_code": code,
+                "units": scheduler.course_units(college, code),
+                "prerequisite_only": code not in planned,
+            }
+            for code in codes
+        ]
+        term_units = sum(course["units"] for course in term_courses)
+        total_units += term_units
+        terms.append({"term": number, "courses": term_courses, "units": term_units})
+
+    # Electives fill spare term capacity, then extra terms, up to min_units
+    min_units = requirements.get("min_units", 0)
+    for term in terms:
+        if total_units >= min_units:
+            break
+        electives = min(max_term_units - term["units"], min_units - total_units)
+        if electives > 0:
+            term["elective_units"] = electives
+            term["units"] += electives
+            total_units += electives
+    while total_units < min_units:
+        electives = min(max_term_units, min_units - total_units)
+        terms.append({"term": len(terms) + 1, "courses": [], "elective_units": electives, "units": electives})
+        total_units += electives
+
+    warnings = []
+    max_units = requirements.get("max_units")
+    if max_units is not None and total_units > max_units:
+        warnings.append(
+            f"This plan ends at {total_units} units, above the {max_units} unit cap. Some units may not transfer."
+        )
+    if course_plan["uncoverable"]:
+        warnings.append("Some requirements cannot be met with articulated courses at your college.")
+
+    return {
+        "major": major,
+        "community_college": college,
+        "max_term_units": max_term_units,
+        "terms": terms,
+        "total_units_after": total_units,
+        "unavailable_prerequisites": unavailable,
+        "uncoverable": course_plan["uncoverable"],
+        "unit_cap": {
+            "max_units": max_units,
+            "exceeded": max_units is not None and total_units > max_units,
+            "advisory": True,
         },
-        "igetc_status": igetc_status,
-        "risks": risks,
-        "notes": requirements["notes"],
-        "sources": {
-            "ucsc_transfer": requirements["source_url"],
-            "assist_org": f"https://assist.org/transfer/institution/113/115",
-            "igetc": "https://assist.org/transfer/igetc",
+        "warnings": warnings,
+    }
+
+
+@app.get("/api/cache/stats", dependencies=[Depends(require_admin)])
+async def get_cache_stats():
+    """Verification result cache counters"""
+    return {
+        "catalog_version": catalogs.current.version,
+        "results": result_cache.stats(),
+        "verify_coalescing": verify_flight.stats(),
+        "explanations": explanation_cache.stats(),
+        "course_plans": catalogs.current.course_plans.stats(),
+        "schedules": catalogs.current.scheduler.stats(),
+        "http": Conditional.stats(),
+    }
+
+
+@app.get("/api/explain/{email}", dependencies=[Depends(user_access), Depends(require_session)])
+async def explain_student(email: str):
+    """
+    LLM summary of a student's transfer profile (cached per rendered
+    prompt). Model calls are paid, so a signed-in caller is required
+    even when AUTH_REQUIRED is off
+    """
+    user = await users.get(email, PROFILE_FIELDS)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        explanation = await explanations.complete(render_user_prompt(user))
+    except LLMError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
+    return {
+        "email": email,
+        "summary": explanation["text"],
+        "model": explanation["model"],
+        "cached": explanation["cached"],
+        "usage": {
+            "prompt_tokens": explanation["prompt_tokens"],
+            "completion_tokens": explanation["completion_tokens"],
         },
-        "disclaimer": "This is a verification tool using official sources. It is NOT official advice. Always confirm with an academic counselor before making decisions."
+        "latency_ms": explanation["latency_ms"],
     }
 
-    # Store results in Firestore
-    user_ref.update({"verification_results": result})
-    return result
+
+def sse(event: str, data: Any) -> str:
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/api/verify/{email}/stream")
+async def stream_verification(email: str, llm: bool = True, session: Optional[Session] = Depends(user_access)):
+    """
+    Verification as server-sent events: the deterministic result first,
+    then each explanation section, then the LLM summary as it is generated
+    (`llm=false` skips it, and is the only option for anonymous callers).
+    Errors before the first event are plain HTTP errors.
+    """
+    if llm:
+        await require_session(session)
+    start = time.perf_counter()
+    result = await verify_flight.do(email, lambda: _verify_user(email))
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - start) * 1000, 2)
+
+    async def events():
+        yield sse("result", {"result": result, "elapsed_ms": elapsed_ms()})
+        for section, text in explain_result(result).items():
+            yield sse(section, text)
+        if llm:
+            user = await users.get(email, PROFILE_FIELDS)
+            try:
+                async for kind, value in explanations.stream(render_user_prompt(user or {})):
+                    if kind == "chunk":
+                        yield sse("llm", {"text": value})
+                    else:
+                        yield sse("llm_done", {
+                            "model": value["model"],
+                            "cached": value["cached"],
+                            "usage": {
+                                "prompt_tokens": value["prompt_tokens"],
+                                "completion_tokens": value["completion_tokens"],
+                            },
+                        })
+            except LLMError as exc:
+                yield sse("error", {"detail": str(exc)})
+        yield sse("done", {"elapsed_ms": elapsed_ms()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/llm/stats", dependencies=[Depends(require_admin)])
+async def get_llm_stats():
+    """LLM calls, cache hits, coalesced prompts, tokens and latency percentiles"""
+    return explanations.stats()
+
+
+@app.get("/api/catalog")
+async def get_catalog_info():
+    """Version and size of the in-memory catalog"""
+    return catalogs.stats()
+
+
+@app.post("/api/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog():
+    """Rebuild the catalog from the database now"""
+    report = await refresh_catalog(force=True)
+    return {"swapped": report is not None, "reverification": report, **catalogs.stats()}
+
+
+@app.get("/api/catalog/reverifications", dependencies=[Depends(require_admin)])
+async def get_reverifications():
+    """Recent catalog changes and how many students each re-verified"""
+    return {
+        "index": verification_index.stats(),
+        "reports": list(reverifications),
+    }
+
+
+@app.get("/api/equivalency")
+async def get_equivalency(community_college: str, course_code: str, uc_campus: str = "UCSC"):
+    """Look up how a community college course articulates to a UC campus"""
+    info = catalogs.current.lookup(community_college, course_code, uc_campus)
+    if info is None:
+        raise HTTPException(status_code=404, detail="No articulation found")
+    return {
+        "community_college": community_college,
+        "course_code": normalize_course_code(course_code),
+        "uc_campus": uc_campus,
+        **info,
+    }
+
+
+# ===================== BACKGROUND JOBS =====================
+
+@app.post("/api/jobs/verify-batch", status_code=202)
+async def submit_verify_batch_job(request: BatchVerifyRequest, session: Session = Depends(require_session)):
+    """Queue a batch verification; poll /api/jobs/{job_id} for progress"""
+    authorize_emails(session, request.emails)
+    entries, errors = await _batch_entries(request)
+    payload = {
+        "owner": session.email.lower(),
+        "catalog_version": catalogs.current.version,
+        "entries": [
+            {"email": email, "transcript": transcript, "college": college, "major": major}
+            for email, transcript, college, major in entries
+        ],
+    }
+    try:
+        job = await jobs.submit("verify_batch", payload)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {exc}", headers={"Retry-After": "5"})
+    return {**job.to_dict(), "errors": errors}
+
+
+@app.get("/api/jobs", dependencies=[Depends(require_admin)])
+async def get_job_queue_stats():
+    """Worker count, queue depth and jobs by status"""
+    return await asyncio.to_thread(jobs.stats)
+
+
+async def owned_job(job_id: str, session: Session = Depends(require_session)) -> Job:
+    """Dependency for `/api/jobs/{job_id}` routes: the job, if the caller submitted it (or is an admin)"""
+    job = await jobs.get(job_id)
+    # Other callers' jobs look missing rather than forbidden
+    if job is None or not (is_admin(session) or job.payload.get("owner") == session.email.lower()):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
-@app.get("/api/results/{email}")
-async def get_verification_results(email: str):
-    """Get stored verification results"""
-    user_ref = db.collection("users").document(email)
-    doc = user_ref.get()
-    if not doc.exists:
+@app.get("/api/jobs/{job_id}")
+async def get_job(job: Job = Depends(owned_job)):
+    """Status and timing of a job"""
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job: Job = Depends(owned_job)):
+    """Result of a finished job"""
+    if job.status not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=500, detail=f"Job failed after {job.attempts} attempt(s): {job.error}")
+    return job.result
+
+
+@app.get("/api/results/{email}", dependencies=[Depends(user_access)])
+async def get_verification_results(email: str, conditional: Conditional = Depends()):
+    """
+    Get stored verification results. The ETag is the stored verification
+    key, so a matching If-None-Match is answered from that field alone.
+    """
+    # A verify in flight for this user is about to replace the stored
+    # results, so wait for it instead of returning stale data (then read
+    # what it stored, so the ETag is its verification key)
+    inflight = verify_flight.pending(email)
+    if inflight is not None:
+        try:
+            await asyncio.shield(inflight)
+        except HTTPException:
+            pass
+
+    fields = ["verification_key", "verification_results"]
+    user = await users.get(email, ["verification_key"] if conditional.if_none_match else fields)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user = doc.to_dict()
+    key = user.get("verification_key")
+    if key and conditional.matches(make_etag(key)):
+        return conditional.not_modified(make_etag(key), RESULTS_CACHE_CONTROL)
+    if "verification_results" not in user:
+        user = await users.get(email, fields)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        key = user.get("verification_key")
     results = user.get("verification_results")
     if not results:
         raise HTTPException(status_code=404, detail="No verification results found. Run verification first.")
-    return results
+    return conditional.respond(key or content_hash(results), lambda: results, RESULTS_CACHE_CONTROL)
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WEB_CONCURRENCY > 1 and CACHE_BACKEND == "memory":
+        logger.warning("CACHE_BACKEND=memory is not shared; use sqlite or redis with several workers")
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY)
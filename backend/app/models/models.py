@@ -3,7 +3,7 @@ Database Models for UC Transfer Verifier
 Using SQLAlchemy ORM
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,17 +21,27 @@ class User(Base):
     major = Column(String, nullable=False)
     community_college = Column(String, nullable=False)
     target_uc = Column(String, nullable=True)
+    target_major = Column(String, nullable=True)
+    transcript_stats = Column(JSON, nullable=True)
+    verification_key = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    transcript_courses = relationship("TranscriptCourse", back_populates="user")
-    verification_results = relationship("VerificationResult", back_populates="user")
+    transcript_courses = relationship(
+        "TranscriptCourse", back_populates="user", cascade="all, delete-orphan"
+    )
+    verification_results = relationship(
+        "VerificationResult", back_populates="user", cascade="all, delete-orphan"
+    )
 
 
 class TranscriptCourse(Base):
     """Model for storing individual transcript courses"""
     __tablename__ = "transcript_courses"
+    __table_args__ = (
+        Index("ix_transcript_courses_user_course", "user_id", "course_code", "semester"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -49,6 +59,9 @@ class TranscriptCourse(Base):
 class VerificationResult(Base):
     """Model for storing verification results"""
     __tablename__ = "verification_results"
+    __table_args__ = (
+        Index("ix_verification_results_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -59,6 +72,8 @@ class VerificationResult(Base):
     igetc_status = Column(JSON, nullable=False)
     risks = Column(JSON, nullable=False)
     sources = Column(JSON, nullable=False)
+    notes = Column(JSON, nullable=True)
+    disclaimer = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -68,6 +83,13 @@ class VerificationResult(Base):
 class CourseEquivalency(Base):
     """Model for caching Assist.org course equivalencies"""
     __tablename__ = "course_equivalencies"
+    __table_args__ = (
+        Index(
+            "ix_course_equivalencies_lookup",
+            "community_college", "cc_course_code", "uc_campus",
+            unique=True,
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     community_college = Column(String, nullable=False, index=True)
@@ -78,13 +100,17 @@ class CourseEquivalency(Base):
     uc_course_name = Column(String, nullable=True)
     units = Column(Float, nullable=False)
     igetc_areas = Column(JSON, nullable=True)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    prerequisites = Column(JSON, nullable=True)  # CC course codes at the same college
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     source_url = Column(String, nullable=True)
 
 
 class UCRequirement(Base):
     """Model for storing UC transfer requirements by major"""
     __tablename__ = "uc_requirements"
+    __table_args__ = (
+        Index("ix_uc_requirements_campus_major", "uc_campus", "major", "requirement_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     uc_campus = Column(String, nullable=False, index=True)
@@ -93,4 +119,23 @@ class UCRequirement(Base):
     requirement_data = Column(JSON, nullable=False)
     notes = Column(JSON, nullable=True)
     source_url = Column(String, nullable=True)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class BackgroundJob(Base):
+    """Model for background job state (see app.services.jobs)"""
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    submitted_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    queue_ms = Column(Float, nullable=True)
+    run_ms = Column(Float, nullable=True)
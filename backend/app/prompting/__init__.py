@@ -0,0 +1 @@
+# Prompting module
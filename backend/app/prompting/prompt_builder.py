@@ -1,11 +1,10 @@
-from prompting.prompts import USER_PROMPT_TEMPLATE
+from app.prompting.prompts import USER_PROMPT_TEMPLATE
 
 def build_user_prompt(user_data: dict) -> str:
     """
     user_data: dictionary with keys: name, community_college, target_uc, major
     """
-    # Ensure all required fields exist
-    for key in ["name", "community_college", "target_uc", "major"]:
-        user_data.setdefault(key, "N/A")
+    # Ensure all required fields exist (without changing the caller's dict)
+    values = {key: user_data.get(key) or "N/A" for key in ["name", "community_college", "target_uc", "major"]}
 
-    return USER_PROMPT_TEMPLATE.substitute(**user_data)
+    return USER_PROMPT_TEMPLATE.substitute(**values)
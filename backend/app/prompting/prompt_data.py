@@ -1,15 +1,13 @@
-from app.db import get_db
-from app.models import User
-from sqlalchemy.orm import Session
-
-def get_user_dict(user_email: str, db: Session):
-    user = db.query(User).filter(User.email == user_email).first()
-    if not user:
-        return None
+from typing import Any, Dict
 
+def get_user_dict(user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The build_user_prompt fields for a user document (from any repository):
+    the target major if one was selected, else the declared major
+    """
     return {
-        "name": user.name,
-        "community_college": user.community_college,
-        "target_uc": user.target_uc or "Not specified",
-        "major": user.major
+        "name": user.get("name"),
+        "community_college": user.get("community_college"),
+        "target_uc": user.get("target_uc") or "Not specified",
+        "major": user.get("target_major") or user.get("major")
     }
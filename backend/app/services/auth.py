@@ -0,0 +1,236 @@
+"""
+Auth Service
+Firebase ID token verification behind a cache keyed by token hash, and a
+TTL session store, so most requests skip signature checks entirely
+"""
+
+from typing import Dict, Any, Optional, Callable, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+import hashlib
+import heapq
+import secrets
+import threading
+import time
+
+from app.services.shared_cache import INVALIDATE_CHANNEL, SharedTier
+
+
+class AuthError(Exception):
+    """Credentials are missing, invalid or expired"""
+
+
+def token_hash(token: str) -> str:
+    """Cache key for a token (the token itself is never stored)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Session:
+    """An authenticated user, from a verified ID token"""
+    uid: str
+    email: str
+    expires_at: float
+    session_id: Optional[str] = None
+    claims: Dict[str, Any] = field(default_factory=dict)
+
+
+def session_from_claims(claims: Dict[str, Any], expires_at: float, session_id: Optional[str] = None) -> Session:
+    email = claims.get("email")
+    if not email:
+        raise AuthError("Token has no email claim")
+    return Session(
+        uid=claims.get("uid") or claims.get("sub", ""),
+        email=email,
+        expires_at=expires_at,
+        session_id=session_id,
+        claims=claims,
+    )
+
+
+class TokenCache:
+    """
+    Verified token claims by token hash, kept until the token's `exp`
+    (less `leeway_seconds`), so a token's signature is checked once.
+    `verify` is the real verifier (e.g. firebase_admin.auth.verify_id_token)
+    and raises on a bad token; failures are not cached.
+    """
+
+    def __init__(
+        self,
+        verify: Callable[[str], Dict[str, Any]],
+        max_entries: int = 10000,
+        leeway_seconds: float = 30.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self._verify = verify
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._leeway = leeway_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.verify_ms = 0.0
+
+    def cached(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of an already verified, unexpired token (no verification)"""
+        key = token_hash(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] - self._leeway <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a token, verifying it on a cache miss (may block on key fetches)"""
+        claims = self.cached(token)
+        if claims is not None:
+            return claims
+
+        start = time.perf_counter()
+        try:
+            claims = self._verify(token)
+        except Exception as exc:
+            with self._lock:
+                self.failures += 1
+            raise AuthError(f"Invalid token: {exc}") from exc
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.misses += 1
+                self.verify_ms += elapsed
+
+        if "exp" not in claims:
+            raise AuthError("Token has no expiry")
+        with self._lock:
+            self._entries[token_hash(token)] = claims
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+                "avg_verify_ms": round(self.verify_ms / self.misses, 3) if self.misses else 0.0,
+            }
+
+
+class SessionStore:
+    """
+    Sessions by random id, each expiring after `ttl_seconds`.
+    Expiry times sit in a heap, so every call evicts whatever has expired
+    in O(log n) per session; the oldest sessions go first past
+    `max_sessions`. With a `shared` tier, sessions are also visible to
+    (and deletable from) every other worker.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_sessions: int = 100000,
+        clock: Callable[[], float] = time.time,
+        shared: Optional[SharedTier] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._max_sessions = max_sessions
+        self._clock = clock
+        self._sessions: Dict[str, Session] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._shared = shared
+        self.evicted = 0
+        if shared is not None:
+            shared.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    def _on_invalidate(self, message: Dict[str, Any]) -> None:
+        if message.get("namespace") == "sessions":
+            with self._lock:
+                self._sessions.pop(message.get("key"), None)
+
+    def _keep(self, session: Session) -> None:
+        self._sessions[session.session_id] = session
+        heapq.heappush(self._expiry, (session.expires_at, session.session_id))
+
+    def _evict(self, now: float) -> None:
+        while self._expiry and (self._expiry[0][0] <= now or len(self._sessions) > self._max_sessions):
+            expires_at, session_id = heapq.heappop(self._expiry)
+            session = self._sessions.get(session_id)
+            # Skip heap entries of sessions already deleted
+            if session is not None and session.expires_at == expires_at:
+                del self._sessions[session_id]
+                self.evicted += 1
+
+    async def create(self, claims: Dict[str, Any]) -> Session:
+        """Start a session for verified token claims"""
+        now = self._clock()
+        session = session_from_claims(claims, now + self.ttl_seconds, secrets.token_urlsafe(32))
+        if self._shared is not None:
+            await self._shared.aset(f"session:{session.session_id}", asdict(session), self.ttl_seconds)
+        with self._lock:
+            self._keep(session)
+            self._evict(now)
+        return session
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+        if session is None and self._shared is not None:
+            # Created by another worker
+            data = await self._shared.aget(f"session:{session_id}")
+            if data is not None and data["expires_at"] > now:
+                session = Session(**data)
+                with self._lock:
+                    self._keep(session)
+        return session
+
+    async def delete(self, session_id: str) -> bool:
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+        if self._shared is not None:
+            found = found or await self._shared.aget(f"session:{session_id}") is not None
+            await self._shared.adelete(f"session:{session_id}")
+            await self._shared.apublish(INVALIDATE_CHANNEL, {"namespace": "sessions", "key": session_id})
+        return found
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(self._clock())
+            return {"sessions": len(self._sessions), "evicted": self.evicted, "ttl_seconds": self.ttl_seconds}
+
+
+class AuthTimings:
+    """Per-request auth overhead, by how the request was authenticated"""
+
+    def __init__(self):
+        self._totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, elapsed_ms: float) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(source, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += elapsed_ms
+            totals[2] = max(totals[2], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                source: {"requests": count, "avg_ms": round(total / count, 3), "max_ms": round(peak, 3)}
+                for source, (count, total, peak) in self._totals.items()
+            }
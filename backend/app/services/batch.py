@@ -0,0 +1,148 @@
+"""
+Batch Verification Service
+Struct-of-arrays transcript representation so GPA, unit totals and
+threshold checks for a whole cohort are computed column-wise with NumPy
+"""
+
+from typing import List, Dict, Sequence
+
+import numpy as np
+
+from app.services.requirement_plan import RequirementPlan, normalize_course_code
+
+
+class TranscriptBatch:
+    """
+    Many transcripts flattened into parallel column arrays.
+    Row i of every column is one course; `owner[i]` is the index of the
+    transcript it came from.
+    """
+
+    def __init__(self, transcripts: Sequence[List[Dict]], grade_points: Dict[str, float]):
+        self.size = len(transcripts)
+        lengths = np.fromiter((len(t) for t in transcripts), dtype=np.int64, count=self.size)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.owner = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+
+        self.codes: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        code_ids: List[int] = []
+        units: List[float] = []
+        grades: List[str] = []
+
+        # Raw course code -> (normalized code, code id), so each distinct
+        # spelling is normalized once per batch
+        interned: Dict[str, tuple] = {}
+
+        for courses in transcripts:
+            for course in courses:
+                raw = course.get("course_code", "")
+                entry = interned.get(raw)
+                if entry is None:
+                    code = normalize_course_code(raw)
+                    entry = (code, self.vocabulary.setdefault(code, len(self.vocabulary)))
+                    interned[raw] = entry
+                self.codes.append(entry[0])
+                code_ids.append(entry[1])
+                units.append(course.get("units", 0))
+                grades.append(course.get("grade", ""))
+
+        # Ungraded rows (P/NP, W, ...) get NaN grade points
+        grade_lookup = {
+            grade: grade_points.get(str(grade).upper(), np.nan) for grade in set(grades)
+        }
+        self.code_ids = np.array(code_ids, dtype=np.int64)
+        self.units = np.array(units, dtype=np.float64)
+        self.points = np.array([grade_lookup[g] for g in grades], dtype=np.float64)
+        self.graded = ~np.isnan(self.points)
+        self.points[~self.graded] = 0.0
+
+        # Rows grouped by code id, for per-code lookups
+        self._rows_by_code = np.argsort(self.code_ids, kind="stable")
+        self._code_starts = np.searchsorted(
+            self.code_ids[self._rows_by_code], np.arange(len(self.vocabulary) + 1)
+        )
+
+    def course_codes(self, index: int) -> List[str]:
+        """Normalized course codes of one transcript"""
+        return self.codes[self.offsets[index]:self.offsets[index + 1]]
+
+    def rows_for_code(self, code: str) -> np.ndarray:
+        """Row indices of every course with a normalized code"""
+        code_id = self.vocabulary.get(code)
+        if code_id is None:
+            return self._rows_by_code[:0]
+        return self._rows_by_code[self._code_starts[code_id]:self._code_starts[code_id + 1]]
+
+    def match_plan(self, plan: RequirementPlan, members: np.ndarray) -> np.ndarray:
+        """
+        Resolve a requirement plan for a subset of transcripts at once.
+        Returns a (len(members), slots) matrix holding the preference rank
+        of the best matched course per slot, or -1 when unsatisfied.
+        """
+        unmatched = np.iinfo(np.int64).max
+        best = np.full((len(members), len(plan.slots)), unmatched, dtype=np.int64)
+
+        position = np.full(self.size, -1, dtype=np.int64)
+        position[members] = np.arange(len(members))
+
+        for code, hits in plan.index.items():
+            rows = self.rows_for_code(code)
+            if not len(rows):
+                continue
+            owners = position[self.owner[rows]]
+            owners = owners[owners >= 0]
+            for slot_id, rank in hits:
+                best[owners, slot_id] = np.minimum(best[owners, slot_id], rank)
+
+        best[best == unmatched] = -1
+        return best
+
+    def total_units(self) -> np.ndarray:
+        """Total units per transcript"""
+        return np.bincount(self.owner, weights=self.units, minlength=self.size)
+
+    def gpa(self) -> np.ndarray:
+        """Unit-weighted GPA per transcript (0.0 if ungraded)"""
+        graded_units = np.where(self.graded, self.units, 0.0)
+        points = np.bincount(self.owner, weights=self.points * graded_units, minlength=self.size)
+        units = np.bincount(self.owner, weights=graded_units, minlength=self.size)
+        return np.divide(points, units, out=np.zeros(self.size), where=units > 0)
+
+    def igetc_coverage(
+        self,
+        college_index: np.ndarray,
+        college_masks: Sequence[Dict[str, int]],
+        counted_areas: Dict[str, int]
+    ) -> Dict[str, np.ndarray]:
+        """
+        OR-reduce IGETC area masks per transcript over distinct courses.
+        `college_index[j]` selects transcript j's table in `college_masks`,
+        `counted_areas` maps area codes that need per-course counters to
+        their bit. Returns {"covered": masks, <area>: counts, ...}
+        """
+        vocab_size = max(len(self.vocabulary), 1)
+        table = np.zeros((max(len(college_masks), 1), vocab_size), dtype=np.int64)
+        for row, masks in enumerate(college_masks):
+            for code, mask in masks.items():
+                code_id = self.vocabulary.get(code)
+                if code_id is not None:
+                    table[row, code_id] = mask
+
+        masks = table[college_index[self.owner], self.code_ids]
+
+        # Count each (transcript, course) pair once
+        _, first = np.unique(self.owner * vocab_size + self.code_ids, return_index=True)
+        distinct = np.zeros(len(masks), dtype=bool)
+        distinct[first] = True
+        masks = np.where(distinct, masks, 0)
+
+        covered = np.zeros(self.size, dtype=np.int64)
+        np.bitwise_or.at(covered, self.owner, masks)
+
+        coverage = {"covered": covered}
+        for area, bit in counted_areas.items():
+            coverage[area] = np.bincount(
+                self.owner, weights=(masks & bit) != 0, minlength=self.size
+            ).astype(np.int64)
+        return coverage
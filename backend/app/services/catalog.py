@@ -0,0 +1,165 @@
+"""
+Catalog Service
+Immutable in-memory snapshot of the articulation catalog (UC requirements
+and community college course equivalencies) with its compiled plans, and
+a store that swaps snapshots atomically when the source data changes
+"""
+
+from typing import Dict, Any, Optional, Tuple, Callable
+from types import MappingProxyType
+import threading
+
+from app.services.requirement_plan import RequirementPlan, compile_campus_plans, normalize_course_code
+from app.services.igetc import IgetcRequirement, area_mask
+from app.services.eligibility import EligibilityChecker
+from app.services.plan_matrix import PlanMatrix
+from app.services.scheduler import DEFAULT_COURSE_UNITS, TermScheduler
+from app.services.course_planner import CoursePlanMemo
+from app.services.result_cache import catalog_version
+
+
+class Catalog:
+    """
+    One version of the catalog.
+    `requirements` is campus -> major -> requirements and `equivalencies`
+    is campus -> college -> course code -> {uc_equivalent, units, igetc,
+    prerequisites}.
+    A snapshot is never mutated; a changed catalog is a new snapshot.
+    """
+
+    def __init__(self, requirements: Dict[str, Dict[str, Dict]], equivalencies: Dict[str, Dict[str, Dict]]):
+        self.requirements = requirements
+        self.equivalencies = equivalencies
+        self.version = catalog_version(requirements, equivalencies)
+
+        self.plans: Dict[Tuple[str, str], RequirementPlan] = {}
+        self.igetc_plans: Dict[Tuple[str, str], IgetcRequirement] = {}
+        for campus, majors in requirements.items():
+            self.plans.update(compile_campus_plans(campus, majors))
+            for major, reqs in majors.items():
+                self.igetc_plans[(campus, major)] = IgetcRequirement(reqs.get("igetc_areas", {}))
+
+        # (college, normalized course code, campus) -> equivalency
+        index: Dict[Tuple[str, str, str], Dict] = {}
+        # IGETC areas are a property of the college course, whatever the campus
+        masks: Dict[str, Dict[str, int]] = {}
+        # Units and prerequisites, likewise per college course
+        self.course_units: Dict[str, Dict[str, float]] = {}
+        self.prerequisites: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        area_masks: Dict[Tuple[str, ...], int] = {}
+        for campus, colleges in equivalencies.items():
+            for college, courses in colleges.items():
+                college_masks = masks.setdefault(college, {})
+                college_units = self.course_units.setdefault(college, {})
+                college_prereqs = self.prerequisites.setdefault(college, {})
+                for code, info in courses.items():
+                    code = normalize_course_code(code)
+                    index[(college, code, campus)] = info
+                    areas = tuple(info.get("igetc", ()))
+                    mask = area_masks.get(areas)
+                    if mask is None:
+                        mask = area_masks[areas] = area_mask(areas)
+                    college_masks[code] = college_masks.get(code, 0) | mask
+                    college_units.setdefault(code, info.get("units", DEFAULT_COURSE_UNITS))
+                    if info.get("prerequisites"):
+                        college_prereqs[code] = tuple(normalize_course_code(p) for p in info["prerequisites"])
+        self.index = MappingProxyType(index)
+        self.igetc_masks = masks
+
+        self._plan_matrix: Optional[PlanMatrix] = None
+        self._scheduler: Optional[TermScheduler] = None
+        self._course_plans: Optional[CoursePlanMemo] = None
+        self._checkers = {
+            campus: EligibilityChecker(requirements.get(campus, {}), equivalencies.get(campus, {}))
+            for campus in requirements.keys() | equivalencies.keys()
+        }
+
+    @property
+    def plan_matrix(self) -> PlanMatrix:
+        """All plans as one PlanMatrix (built on first use)"""
+        if self._plan_matrix is None:
+            self._plan_matrix = PlanMatrix(self.plans, self.igetc_plans, self.requirements)
+        return self._plan_matrix
+
+    @property
+    def scheduler(self) -> TermScheduler:
+        """TermScheduler over this snapshot's prerequisite graph"""
+        if self._scheduler is None:
+            self._scheduler = TermScheduler(self.prerequisites, self.course_units)
+        return self._scheduler
+
+    @property
+    def course_plans(self) -> CoursePlanMemo:
+        """Memo of remaining-course plans computed against this snapshot"""
+        if self._course_plans is None:
+            self._course_plans = CoursePlanMemo()
+        return self._course_plans
+
+    def lookup(self, college: str, course_code: str, campus: str) -> Optional[Dict]:
+        """Equivalency of a college course at a UC campus, if articulated"""
+        return self.index.get((college, normalize_course_code(course_code), campus))
+
+    def campus_requirements(self, campus: str) -> Dict[str, Dict]:
+        """Requirements by major for one campus"""
+        return self.requirements.get(campus, {})
+
+    def checker(self, campus: str) -> EligibilityChecker:
+        """EligibilityChecker over this snapshot for one campus"""
+        checker = self._checkers.get(campus)
+        if checker is None:
+            checker = EligibilityChecker({}, {})
+        return checker
+
+    def stats(self) -> Dict[str, Any]:
+        """Size of the snapshot"""
+        return {
+            "version": self.version,
+            "campuses": sorted(self.requirements.keys() | self.equivalencies.keys()),
+            "majors": sum(len(majors) for majors in self.requirements.values()),
+            "colleges": len(self.igetc_masks),
+            "equivalencies": len(self.index),
+        }
+
+
+class CatalogStore:
+    """
+    Holds the current Catalog.
+    `signature` is a cheap probe of the source (e.g. row counts and last
+    update time); `refresh` only rebuilds when it changes. Readers take
+    `current` once per request and keep using that snapshot, so a swap
+    never mixes two versions within one request.
+    """
+
+    def __init__(self, load: Callable[[], Catalog], signature: Callable[[], Any]):
+        self._load = load
+        self._signature = signature
+        self._loaded_signature: Any = None
+        self._catalog: Optional[Catalog] = None
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    @property
+    def current(self) -> Catalog:
+        catalog = self._catalog
+        if catalog is None:
+            self.refresh()
+            catalog = self._catalog
+        return catalog
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the catalog if the source changed; returns True on a swap"""
+        with self._lock:
+            signature = self._signature()
+            if not force and self._catalog is not None and signature == self._loaded_signature:
+                return False
+            catalog = self._load()
+            changed = self._catalog is None or catalog.version != self._catalog.version
+            self._catalog = catalog
+            self._loaded_signature = signature
+            if changed:
+                self.swaps += 1
+            return changed
+
+    def stats(self) -> Dict[str, Any]:
+        """Current snapshot stats plus swap counter"""
+        return {**self.current.stats(), "swaps": self.swaps}
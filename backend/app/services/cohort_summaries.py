@@ -0,0 +1,250 @@
+"""
+Cohort Summary Service
+Writes LLM summaries for a whole roster. Students with identical rendered
+prompts share one summary, several prompts are packed into each model
+call, calls run a few at a time under a shared requests/tokens-per-minute
+budget, and finished summaries are appended to a checkpoint so a rerun
+only pays for the rest
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import json
+import os
+import time
+
+from app.services.llm import (
+    Completion, ExplanationService, LLMError, estimate_tokens, pack_prompts, render_user_prompt, unpack_sections
+)
+
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class RateBudget:
+    """
+    Requests and tokens per sliding minute, shared by every call. Callers
+    reserve an estimate before calling and settle it with the real usage;
+    a call larger than the whole token budget still runs, alone.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        window_seconds: float = 60.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        self.waited_seconds = 0.0
+        self._calls: deque = deque()  # [started, tokens] per call in the window
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> List:
+        """Wait until the call fits the budget; returns its reservation"""
+        # Waiters queue on the lock, so calls start in request order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and self._calls[0][0] <= now - self.window_seconds:
+                    self._calls.popleft()
+                requests_ok = self.requests_per_minute is None or len(self._calls) < self.requests_per_minute
+                used = sum(tokens_used for _, tokens_used in self._calls)
+                tokens_ok = self.tokens_per_minute is None or not self._calls or used + tokens <= self.tokens_per_minute
+                if requests_ok and tokens_ok:
+                    reservation = [now, tokens]
+                    self._calls.append(reservation)
+                    return reservation
+                wait = max(self._calls[0][0] + self.window_seconds - now, 0.01)
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    @staticmethod
+    def settle(reservation: List, tokens: int) -> None:
+        """Replace a reservation's estimate with the tokens actually used"""
+        reservation[1] = tokens
+
+
+class Checkpoint:
+    """
+    Append-only JSONL of finished summaries, one line per prompt key.
+    A partly written last line (the run was killed mid-write) is ignored.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as lines:
+                for line in lines:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.done[entry["key"]] = entry
+        self._out = open(path, "a", encoding="utf-8") if path else None
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        self.done[entry["key"]] = entry
+        if self._out is not None:
+            self._out.write(json.dumps(entry) + "\n")
+            self._out.flush()
+
+    def close(self) -> None:
+        if self._out is not None:
+            self._out.close()
+
+
+@dataclass
+class CohortReport:
+    """Counters for a cohort run (only the first MAX_REPORTED_ERRORS errors are kept)"""
+    students: int = 0
+    prompts: int = 0
+    resumed: int = 0
+    cached: int = 0
+    summarized: int = 0
+    failed: int = 0
+    calls: int = 0
+    unpacked: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def error(self, emails: List[str], message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"emails": emails, "error": message})
+
+    def to_dict(self, budget: Optional[RateBudget] = None) -> Dict[str, Any]:
+        return {
+            "students": self.students,
+            "prompts": self.prompts,
+            "resumed": self.resumed,
+            "cached": self.cached,
+            "summarized": self.summarized,
+            "failed": self.failed,
+            "calls": self.calls,
+            "unpacked": self.unpacked,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "budget_wait_ms": round(budget.waited_seconds * 1000, 2) if budget else 0.0,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "errors": self.errors,
+        }
+
+
+async def summarize_cohort(
+    service: ExplanationService,
+    students: Iterable[Dict[str, Any]],
+    checkpoint_path: Optional[str] = None,
+    pack_size: int = 4,
+    concurrency: int = 4,
+    budget: Optional[RateBudget] = None
+) -> Tuple[Dict[str, Dict[str, Any]], CohortReport]:
+    """
+    Summaries for user documents (email, name, community_college,
+    target_uc, major/target_major), keyed by email. Uses the service's
+    backend, model, system prompt and cache; prompts in the checkpoint or
+    cache are not sent again. A packed answer without exactly one section
+    per student is retried one student per call.
+    """
+    report = CohortReport()
+    checkpoint = Checkpoint(checkpoint_path)
+    budget = budget or RateBudget()
+    slots = asyncio.Semaphore(concurrency)
+
+    # Identical prompts are summarized once
+    emails_by_key: Dict[str, List[str]] = {}
+    prompts: Dict[str, str] = {}
+    for student in students:
+        report.students += 1
+        prompt = render_user_prompt(student)
+        key = service.prompt_key(prompt)
+        prompts.setdefault(key, prompt)
+        emails_by_key.setdefault(key, []).append(student["email"])
+    report.prompts = len(prompts)
+
+    todo = []
+    for key, prompt in prompts.items():
+        if key in checkpoint.done:
+            report.resumed += 1
+            continue
+        cached = await service.cache.aget(key)
+        if cached is not None:
+            report.cached += 1
+            checkpoint.add({"key": key, **cached})
+            continue
+        todo.append(key)
+
+    async def call(prompt: str, max_tokens: int) -> Completion:
+        async with slots:
+            reservation = await budget.acquire(estimate_tokens(service.system_prompt + prompt) + max_tokens)
+            start = time.perf_counter()
+            try:
+                completion = await asyncio.to_thread(
+                    service.backend.complete, service.system_prompt, prompt, service.model, max_tokens
+                )
+            except Exception as exc:
+                service.metrics.record((time.perf_counter() - start) * 1000, None)
+                if isinstance(exc, LLMError):
+                    raise
+                raise LLMError(f"LLM backend failed: {exc}") from exc
+            service.metrics.record((time.perf_counter() - start) * 1000, completion)
+        budget.settle(reservation, completion.prompt_tokens + completion.completion_tokens)
+        report.calls += 1
+        report.prompt_tokens += completion.prompt_tokens
+        report.completion_tokens += completion.completion_tokens
+        return completion
+
+    async def finish(key: str, text: str, completion: Completion, share: int) -> None:
+        value = {
+            "text": text,
+            "model": completion.model,
+            "prompt_tokens": completion.prompt_tokens // share,
+            "completion_tokens": completion.completion_tokens // share,
+        }
+        await service.cache.aset(key, value)
+        checkpoint.add({"key": key, **value})
+        report.summarized += 1
+
+    async def summarize(keys: List[str]) -> None:
+        if len(keys) > 1:
+            try:
+                completion = await call(pack_prompts([prompts[key] for key in keys]), service.max_tokens * len(keys))
+            except LLMError as exc:
+                report.failed += len(keys)
+                report.error([email for key in keys for email in emails_by_key[key]], str(exc))
+                return
+            sections = unpack_sections(completion.text, len(keys))
+            if sections is not None:
+                for key, text in zip(keys, sections):
+                    await finish(key, text, completion, len(keys))
+                return
+            report.unpacked += 1
+        for key in keys:
+            try:
+                completion = await call(prompts[key], service.max_tokens)
+            except LLMError as exc:
+                report.failed += 1
+                report.error(emails_by_key[key], str(exc))
+                continue
+            await finish(key, completion.text.strip(), completion, 1)
+
+    pack_size = max(pack_size, 1)
+    try:
+        await asyncio.gather(*(
+            summarize(todo[start:start + pack_size]) for start in range(0, len(todo), pack_size)
+        ))
+    finally:
+        checkpoint.close()
+
+    summaries = {}
+    for key, emails in emails_by_key.items():
+        entry = checkpoint.done.get(key)
+        if entry is not None:
+            for email in emails:
+                summaries[email] = {"summary": entry["text"], "model": entry["model"]}
+    return summaries, report
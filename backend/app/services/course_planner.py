@@ -0,0 +1,240 @@
+"""
+Course Planner Service
+Finds the smallest set of remaining courses at a student's college that
+covers every missing major prep requirement and IGETC area, treating it
+as a set cover over bitsets. Plans are memoized per catalog snapshot
+"""
+
+from typing import List, Dict, Tuple, Optional, Iterable
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+
+from app.services.requirement_plan import RequirementPlan
+from app.services.igetc import AREA_BITS, IgetcRequirement
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """A course the student could take, as the targets it covers"""
+    course_code: str
+    bits: int
+    counted_areas: Tuple[str, ...]
+
+
+class RemainingCoursePlanner:
+    """
+    One student's remaining requirements as numbered targets.
+    Each missing major prep slot and each missing single-course IGETC area
+    is one bit. An area needing n more courses gets n bits, filled in
+    order by distinct courses covering the area.
+    """
+
+    def __init__(
+        self,
+        plan: RequirementPlan,
+        igetc: IgetcRequirement,
+        satisfied_slots: Iterable[int],
+        igetc_counts: Dict[str, int],
+        offered: Dict[str, int],
+        taken: Iterable[str]
+    ):
+        self.labels: List[str] = []
+        slot_bits: Dict[int, int] = {}
+        satisfied = set(satisfied_slots)
+        for slot_id, slot in enumerate(plan.slots):
+            if slot_id not in satisfied:
+                slot_bits[slot_id] = self._add_target(f"Major prep: {slot.name}")
+
+        area_bits: Dict[str, int] = {}
+        self.counted_bits: Dict[str, List[int]] = {}
+        covered = {area for area, count in igetc_counts.items() if count > 0}
+        for area, needed in igetc.courses_needed.items():
+            if not igetc.required_mask & AREA_BITS[area]:
+                continue
+            name = igetc.areas[area].get("name", "")
+            if area in igetc.counted:
+                remaining = needed - igetc_counts.get(area, 0)
+                bits = [self._add_target(f"IGETC {area} {name} ({i + 1} of {remaining})") for i in range(remaining)]
+                if bits:
+                    self.counted_bits[area] = bits
+            elif area not in covered:
+                area_bits[area] = self._add_target(f"IGETC {area} {name}")
+
+        self.target = (1 << len(self.labels)) - 1
+
+        # Courses at the college that would cover something. Courses with
+        # identical coverage are interchangeable, so only as many are kept
+        # as could be useful (several only for multi-course IGETC areas)
+        taken = set(taken)
+        candidates: Dict[Tuple[int, Tuple[str, ...]], List[Candidate]] = {}
+        for code in sorted(offered):
+            if code in taken:
+                continue
+            bits = 0
+            for slot_id, _ in plan.index.get(code, ()):
+                bits |= slot_bits.get(slot_id, 0)
+            mask = offered[code]
+            for area, bit in area_bits.items():
+                if mask & AREA_BITS[area]:
+                    bits |= bit
+            counted = tuple(area for area in self.counted_bits if mask & AREA_BITS[area])
+            if not (bits or counted):
+                continue
+            same = candidates.setdefault((bits, counted), [])
+            if len(same) < max((len(self.counted_bits[area]) for area in counted), default=1):
+                same.append(Candidate(code, bits, counted))
+        self.candidates = [candidate for same in candidates.values() for candidate in same]
+
+    def _add_target(self, label: str) -> int:
+        self.labels.append(label)
+        return 1 << (len(self.labels) - 1)
+
+    def apply(self, state: int, candidate: Candidate) -> int:
+        """Coverage after taking one more course"""
+        state |= candidate.bits
+        for area in candidate.counted_areas:
+            for bit in self.counted_bits[area]:
+                if not state & bit:
+                    state |= bit
+                    break
+        return state
+
+    def reachable(self) -> int:
+        """Targets some offered course can cover"""
+        state = 0
+        for candidate in self.candidates:
+            state |= candidate.bits
+        # Counted areas need one distinct course per bit
+        for area, bits in self.counted_bits.items():
+            providers = sum(area in c.counted_areas for c in self.candidates)
+            for bit in bits[:providers]:
+                state |= bit
+        return state
+
+    def greedy(self, goal: int) -> List[Candidate]:
+        """Repeatedly take the course covering the most remaining targets"""
+        state, chosen, remaining = 0, [], list(self.candidates)
+        while state & goal != goal and remaining:
+            best = max(remaining, key=lambda c: bin(self.apply(state, c) & goal & ~state).count("1"))
+            gained = self.apply(state, best) & goal & ~state
+            if not gained:
+                break
+            chosen.append(best)
+            remaining.remove(best)
+            state |= gained
+        return chosen
+
+    def exact(self, goal: int, deadline: float) -> List[Candidate]:
+        """
+        Minimum cover by branching on the lowest uncovered target, memoized
+        on coverage. Courses counting toward multi-course areas must not be
+        taken twice, so which of them are still available is part of the
+        memo key. Raises _OutOfTime past the deadline.
+        """
+        memo: Dict[Tuple[int, int], Optional[Tuple[int, ...]]] = {}
+        all_courses = (1 << len(self.candidates)) - 1
+        counting = sum(1 << i for i, c in enumerate(self.candidates) if c.counted_areas)
+
+        def solve(state: int, available: int) -> Optional[Tuple[int, ...]]:
+            if state & goal == goal:
+                return ()
+            key = (state & goal, available & counting)
+            if key in memo:
+                return memo[key]
+            if time.perf_counter() > deadline:
+                raise _OutOfTime()
+
+            missing = goal & ~state
+            lowest = missing & -missing
+            best: Optional[Tuple[int, ...]] = None
+            for index, candidate in enumerate(self.candidates):
+                if not available >> index & 1:
+                    continue
+                after = self.apply(state, candidate)
+                if not after & lowest:
+                    continue
+                rest = solve(after, available & ~(1 << index))
+                if rest is not None and (best is None or len(rest) + 1 < len(best)):
+                    best = (index,) + rest
+            memo[key] = best
+            return best
+
+        picks = solve(0, all_courses)
+        return [self.candidates[index] for index in picks or ()]
+
+    def plan(self, budget_seconds: float) -> Dict:
+        """Smallest course set found within the time budget"""
+        start = time.perf_counter()
+        goal = self.reachable()
+        try:
+            chosen = self.exact(goal, start + budget_seconds)
+            optimal = True
+        except _OutOfTime:
+            chosen = self.greedy(goal)
+            optimal = False
+
+        courses, state = [], 0
+        for candidate in chosen:
+            after = self.apply(state, candidate)
+            courses.append({
+                "course_code": candidate.course_code,
+                "covers": self._describe(after & ~state),
+            })
+            state = after
+
+        return {
+            "courses": courses,
+            "optimal": optimal,
+            "uncoverable": self._describe(self.target & ~goal),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def _describe(self, bits: int) -> List[str]:
+        return [label for i, label in enumerate(self.labels) if bits >> i & 1]
+
+
+class CoursePlanMemo:
+    """
+    Computed plans for one catalog snapshot (so the catalog version is
+    implied), keyed on the college, the missing targets and the candidate
+    courses covering them; those fully determine the plan. Taken courses
+    are left out of the candidates, so they are part of the key through
+    them. A plan cut short by the time budget is reused only for budgets
+    no larger than the one it had.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, college: str, planner: RemainingCoursePlanner, budget_seconds: float) -> Dict:
+        """`planner.plan(budget_seconds)` (memoized), plus whether it was cached"""
+        key = (college, tuple(planner.labels), tuple(planner.candidates))
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None and (cached[1]["optimal"] or cached[0] >= budget_seconds):
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return {**cached[1], "cached": True}
+            self.misses += 1
+
+        result = planner.plan(budget_seconds)
+        with self._lock:
+            self._memo[key] = (budget_seconds, result)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return {**result, "cached": False}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._memo), "hits": self.hits, "misses": self.misses}
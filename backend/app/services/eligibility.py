@@ -3,9 +3,15 @@ Eligibility Service
 Core logic for checking transfer eligibility against requirements
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass
 
+import numpy as np
+
+from app.services.requirement_plan import RequirementPlan
+from app.services.igetc import AREA_BITS, IgetcRequirement, compile_equivalency_masks, transcript_masks
+from app.services.batch import TranscriptBatch
+
 
 @dataclass
 class CourseMatch:
@@ -41,6 +47,33 @@ class EligibilityChecker:
     def __init__(self, requirements: Dict, equivalencies: Dict):
         self.requirements = requirements
         self.equivalencies = equivalencies
+        self._plans: Dict[str, RequirementPlan] = {}
+        self._igetc_reqs: Dict[str, IgetcRequirement] = {}
+        self._igetc_masks: Dict[str, Dict[str, int]] = {}
+    
+    def get_plan(self, major: str) -> RequirementPlan:
+        """Get the compiled requirement plan for a major (compiled once)"""
+        plan = self._plans.get(major)
+        if plan is None:
+            plan = RequirementPlan(self.requirements[major].get("required_courses", []))
+            self._plans[major] = plan
+        return plan
+    
+    def get_igetc_requirement(self, major: str) -> IgetcRequirement:
+        """Get the compiled IGETC pattern for a major (compiled once)"""
+        igetc_req = self._igetc_reqs.get(major)
+        if igetc_req is None:
+            igetc_req = IgetcRequirement(self.requirements[major].get("igetc_areas", {}))
+            self._igetc_reqs[major] = igetc_req
+        return igetc_req
+    
+    def get_igetc_masks(self, college: str) -> Dict[str, int]:
+        """Get per-course IGETC bitmasks for a college (compiled once)"""
+        masks = self._igetc_masks.get(college)
+        if masks is None:
+            masks = compile_equivalency_masks(self.equivalencies.get(college, {}))
+            self._igetc_masks[college] = masks
+        return masks
     
     def calculate_gpa(self, courses: List[Dict]) -> float:
         """Calculate GPA from transcript courses"""
@@ -73,26 +106,20 @@ class EligibilityChecker:
         if major not in self.requirements:
             return {"completed": [], "missing": []}
         
-        major_reqs = self.requirements[major].get("required_courses", [])
-        completed_codes = [c.get("course_code", "").upper() for c in courses]
+        plan = self.get_plan(major)
+        matches = plan.resolve(c.get("course_code", "") for c in courses)
         
         completed = []
         missing = []
         
-        for req in major_reqs:
+        for slot, matched_course in zip(plan.slots, matches):
             match = CourseMatch(
-                requirement_name=req["name"],
-                completed=False,
-                matched_course=None,
-                acceptable_courses=req.get("equivalent_codes", [])
+                requirement_name=slot.name,
+                completed=matched_course is not None,
+                matched_course=matched_course,
+                acceptable_courses=list(slot.acceptable_courses)
             )
             
-            for code in req.get("equivalent_codes", []):
-                if code.upper() in completed_codes:
-                    match.completed = True
-                    match.matched_course = code
-                    break
-            
             if match.completed:
                 completed.append(match)
             else:
@@ -113,28 +140,13 @@ class EligibilityChecker:
         if major not in self.requirements:
             return {}
         
-        igetc_reqs = self.requirements[major].get("igetc_areas", {})
-        college_equiv = self.equivalencies.get(college, {})
-        
-        # Find which IGETC areas are satisfied by completed courses
-        satisfied_areas = set()
-        completed_codes = [c.get("course_code", "").upper() for c in courses]
-        
-        for code in completed_codes:
-            if code in college_equiv:
-                areas = college_equiv[code].get("igetc", [])
-                satisfied_areas.update(areas)
-        
-        # Build status for each required area
-        result = {}
-        for area_code, area_info in igetc_reqs.items():
-            result[area_code] = {
-                "name": area_info.get("name", ""),
-                "required": area_info.get("required", True),
-                "completed": area_code in satisfied_areas
-            }
+        igetc_req = self.get_igetc_requirement(major)
+        masks = transcript_masks(
+            (c.get("course_code", "") for c in courses),
+            self.get_igetc_masks(college)
+        )
         
-        return result
+        return igetc_req.evaluate(masks)
     
     def identify_risks(
         self,
@@ -236,6 +248,15 @@ class EligibilityChecker:
         )
         major_prep_ok = len(major_status.get("missing", [])) == 0
         
+        return self.eligibility_from_flags(gpa_ok, units_ok, major_prep_ok)
+    
+    @staticmethod
+    def eligibility_from_flags(
+        gpa_ok: bool,
+        units_ok: bool,
+        major_prep_ok: bool
+    ) -> tuple[str, str]:
+        """Map threshold check results to (status, message)"""
         if gpa_ok and units_ok and major_prep_ok:
             return (
                 "likely_eligible",
@@ -277,6 +298,25 @@ class EligibilityChecker:
             gpa, total_units, major_status, major
         )
         
+        return self.build_result(
+            eligibility_status, eligibility_message, gpa, total_units,
+            major_status, igetc_status, risks, major, target_uc
+        )
+    
+    def build_result(
+        self,
+        eligibility_status: str,
+        eligibility_message: str,
+        gpa: float,
+        total_units: float,
+        major_status: Dict,
+        igetc_status: Dict,
+        risks: List[RiskItem],
+        major: str,
+        target_uc: str,
+        major_payload: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Assemble the verification result payload"""
         reqs = self.requirements.get(major, {})
         
         return {
@@ -284,28 +324,13 @@ class EligibilityChecker:
             "eligibility_message": eligibility_message,
             "summary": {
                 "total_units": total_units,
-                "gpa": gpa,
+                "gpa": round(gpa, 2),
                 "min_gpa_required": reqs.get("min_gpa", 2.5),
                 "units_range": f"{reqs.get('min_units', 60)}-{reqs.get('max_units', 90)}",
                 "major": major,
                 "target_uc": target_uc,
             },
-            "major_requirements": {
-                "completed": [
-                    {
-                        "requirement": m.requirement_name,
-                        "matched_course": m.matched_course,
-                    }
-                    for m in major_status["completed"]
-                ],
-                "missing": [
-                    {
-                        "requirement": m.requirement_name,
-                        "acceptable_courses": m.acceptable_courses,
-                    }
-                    for m in major_status["missing"]
-                ],
-            },
+            "major_requirements": major_payload or self.major_requirements_payload(major_status),
             "igetc_status": igetc_status,
             "risks": [
                 {
@@ -326,3 +351,144 @@ class EligibilityChecker:
                 "It is NOT official advice. Always confirm with an academic counselor."
             )
         }
+    
+    @staticmethod
+    def major_requirements_payload(major_status: Dict) -> Dict[str, List[Dict]]:
+        """Serialize major prep matches for the result payload"""
+        return {
+            "completed": [
+                {
+                    "requirement": m.requirement_name,
+                    "matched_course": m.matched_course,
+                }
+                for m in major_status["completed"]
+            ],
+            "missing": [
+                {
+                    "requirement": m.requirement_name,
+                    "acceptable_courses": m.acceptable_courses,
+                }
+                for m in major_status["missing"]
+            ],
+        }
+    
+    def run_batch_verification(
+        self,
+        transcripts: List[List[Dict]],
+        colleges: List[str],
+        majors: List[str],
+        target_uc: str = "UCSC",
+        assemble: Optional[Callable[[str, float, float, Dict, Dict], Any]] = None
+    ) -> List[Any]:
+        """
+        Run eligibility verification for many transcripts at once.
+        GPA, units, IGETC coverage and threshold checks are computed
+        column-wise over a TranscriptBatch; per-student work is limited
+        to assembling the result. Students with identical major prep or
+        IGETC outcomes share those (read-only) parts of their results.
+        `assemble(major, gpa, total_units, major_payload, igetc_status)`,
+        if given, builds each known major's result instead of build_result;
+        it gets the unrounded GPA and does its own threshold checks.
+        """
+        batch = TranscriptBatch(transcripts, self.GRADE_POINTS)
+        gpas = batch.gpa()
+        units = batch.total_units()
+        known = [major in self.requirements for major in majors]
+        
+        if assemble is None:
+            # Round like calculate_gpa (numpy rounding differs on .xx5 ties)
+            gpas = np.array([round(gpa, 2) for gpa in gpas.tolist()])
+            # Threshold checks (unknown majors fall back to the defaults)
+            reqs = [self.requirements.get(major, {}) for major in majors]
+            min_gpa = np.array([r.get("min_gpa", 2.5) for r in reqs])
+            min_units = np.array([r.get("min_units", 60) for r in reqs])
+            max_units = np.array([r.get("max_units", 90) for r in reqs])
+            gpa_ok = gpas >= min_gpa
+            units_ok = (units >= min_units) & (units <= max_units)
+        
+        # IGETC coverage over every distinct college in the batch
+        college_ids: Dict[str, int] = {}
+        college_index = np.fromiter(
+            (college_ids.setdefault(c, len(college_ids)) for c in colleges),
+            dtype=np.int64,
+            count=len(colleges)
+        )
+        counted = {}
+        for major in set(majors):
+            if major in self.requirements:
+                counted.update(self.get_igetc_requirement(major).counted)
+        coverage = batch.igetc_coverage(
+            college_index,
+            [self.get_igetc_masks(c) for c in college_ids],
+            {area: AREA_BITS[area] for area in counted}
+        )
+        
+        # Major prep resolved per major over all of its students at once
+        major_status_by_student: Dict[int, tuple] = {}
+        majors_array = np.array(majors, dtype=object)
+        for major in set(majors):
+            if major not in self.requirements:
+                continue
+            plan = self.get_plan(major)
+            members = np.flatnonzero(majors_array == major)
+            ranks = batch.match_plan(plan, members)
+            patterns: Dict[tuple, tuple] = {}
+            for row, i in zip(ranks.tolist(), members.tolist()):
+                key = tuple(row)
+                status = patterns.get(key)
+                if status is None:
+                    status = {"completed": [], "missing": []}
+                    for slot, rank in zip(plan.slots, row):
+                        matched = slot.acceptable_courses[rank] if rank >= 0 else None
+                        status["completed" if matched else "missing"].append(CourseMatch(
+                            requirement_name=slot.name,
+                            completed=matched is not None,
+                            matched_course=matched,
+                            acceptable_courses=list(slot.acceptable_courses)
+                        ))
+                    status = (status, self.major_requirements_payload(status))
+                    patterns[key] = status
+                major_status_by_student[i] = status
+        
+        covered = coverage["covered"].tolist()
+        area_counts = {area: coverage[area].tolist() for area in counted}
+        
+        # Students with the same coverage share one IGETC status dict
+        igetc_patterns: Dict[tuple, Dict] = {}
+        
+        results = []
+        for i, major in enumerate(majors):
+            gpa = float(gpas[i])
+            total_units = float(units[i])
+            
+            if not known[i]:
+                results.append(self.build_result(
+                    "unknown", "Major requirements not found", gpa, total_units,
+                    {"completed": [], "missing": []}, {}, [], major, target_uc
+                ))
+                continue
+            
+            major_status, major_payload = major_status_by_student[i]
+            igetc_req = self.get_igetc_requirement(major)
+            counts = {area: area_counts[area][i] for area in igetc_req.counted}
+            key = (major, covered[i], tuple(counts.values()))
+            igetc_status = igetc_patterns.get(key)
+            if igetc_status is None:
+                igetc_status = igetc_req.status(
+                    igetc_req.completed_mask(covered[i], counts), counts
+                )
+                igetc_patterns[key] = igetc_status
+            if assemble is not None:
+                results.append(assemble(major, gpa, total_units, major_payload, igetc_status))
+                continue
+            
+            status, message = self.eligibility_from_flags(
+                bool(gpa_ok[i]), bool(units_ok[i]), not major_status["missing"]
+            )
+            risks = self.identify_risks(gpa, total_units, major_status, igetc_status, major)
+            results.append(self.build_result(
+                status, message, gpa, total_units, major_status,
+                igetc_status, risks, major, target_uc, major_payload
+            ))
+        
+        return results
@@ -0,0 +1,91 @@
+"""
+HTTP Cache
+ETag / If-None-Match handling for GET endpoints. `Conditional` is a
+FastAPI dependency: a matching If-None-Match gets an empty 304, anything
+else gets the JSON body with its ETag and Cache-Control. Bodies that only
+change with their ETag (catalog lists) can be kept pre-serialized.
+"""
+
+from typing import Any, Callable, Dict, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.services.result_cache import ResultCache
+
+
+def make_etag(version: str) -> str:
+    """A strong entity tag for a version string or content hash"""
+    return f'"{version}"'
+
+
+def parse_if_none_match(header: Optional[str]) -> Set[str]:
+    """Entity tags in an If-None-Match header (weak tags compare as strong, "*" matches any)"""
+    if not header:
+        return set()
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class Conditional:
+    """Per-request dependency: `Depends(Conditional)` in a GET endpoint"""
+
+    # Serialized bodies keyed by (path, ETag), shared by every request
+    bodies = ResultCache(max_entries=256, ttl_seconds=3600)
+    not_modified_count = 0
+    sent_count = 0
+
+    def __init__(self, request: Request):
+        self.path = request.url.path
+        self.if_none_match = parse_if_none_match(request.headers.get("if-none-match"))
+
+    def matches(self, etag: str) -> bool:
+        return "*" in self.if_none_match or etag in self.if_none_match
+
+    def not_modified(self, etag: str, cache_control: str) -> Response:
+        Conditional.not_modified_count += 1
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    def respond(
+        self,
+        version: str,
+        build: Callable[[], Any],
+        cache_control: str,
+        cache_body: bool = False
+    ) -> Response:
+        """
+        304 if the client holds `version`, else the JSON of `build()`.
+        With `cache_body`, the serialized body is reused for this path
+        until the version changes.
+        """
+        etag = make_etag(version)
+        if self.matches(etag):
+            return self.not_modified(etag, cache_control)
+
+        key = f"{self.path}:{etag}"
+        entry = self.bodies.get(key) if cache_body else None
+        if entry is None:
+            entry = {"body": JSONResponse(jsonable_encoder(build())).body}
+            if cache_body:
+                self.bodies.set(key, entry)
+        Conditional.sent_count += 1
+        return Response(
+            content=entry["body"],
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": cache_control},
+        )
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "not_modified": cls.not_modified_count,
+            "sent": cls.sent_count,
+            "bodies": cls.bodies.stats(),
+        }
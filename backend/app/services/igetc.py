@@ -0,0 +1,115 @@
+"""
+IGETC Coverage Service
+Precompiles course equivalencies into integer bitmasks over the IGETC
+areas so coverage checks become bitwise OR / AND-NOT operations
+"""
+
+from typing import List, Dict, Tuple, Iterable
+
+from app.services.requirement_plan import normalize_course_code
+
+
+# Bit order for IGETC area codes
+IGETC_AREA_CODES = ("1A", "1B", "1C", "2", "3A", "3B", "4", "5A", "5B", "5C", "6A", "7")
+AREA_BITS = {area: 1 << i for i, area in enumerate(IGETC_AREA_CODES)}
+
+
+def area_mask(areas: Iterable[str]) -> int:
+    """Convert a list of IGETC area codes into a bitmask"""
+    mask = 0
+    for area in areas:
+        if area not in AREA_BITS:
+            raise ValueError(f"Unknown IGETC area '{area}'")
+        mask |= AREA_BITS[area]
+    return mask
+
+
+def mask_to_areas(mask: int) -> List[str]:
+    """Convert a bitmask back into IGETC area codes (in area order)"""
+    return [area for area in IGETC_AREA_CODES if mask & AREA_BITS[area]]
+
+
+def compile_equivalency_masks(college_equiv: Dict[str, Dict]) -> Dict[str, int]:
+    """Map each normalized course code of a college to its IGETC area bitmask"""
+    return {
+        normalize_course_code(code): area_mask(info.get("igetc", []))
+        for code, info in college_equiv.items()
+    }
+
+
+class IgetcRequirement:
+    """
+    Compiled IGETC pattern for one major.
+    Areas with `courses_needed` > 1 are tracked with per-area counters,
+    every other area is satisfied by a single covering course.
+    """
+
+    def __init__(self, igetc_areas: Dict[str, Dict]):
+        self.areas = igetc_areas
+        self.required_mask = area_mask(
+            area for area, info in igetc_areas.items() if info.get("required", True)
+        )
+        self.courses_needed: Dict[str, int] = {
+            area: int(info.get("courses_needed", 1)) for area, info in igetc_areas.items()
+        }
+        self.counted = {area: n for area, n in self.courses_needed.items() if n > 1}
+        self.counted_mask = area_mask(self.counted)
+
+    def coverage(self, course_masks: Iterable[int]) -> Tuple[int, Dict[str, int]]:
+        """
+        Reduce per-course masks into (completed mask, per-area course counts).
+        Each mask should come from a distinct course.
+        """
+        covered = 0
+        counts = dict.fromkeys(self.counted, 0)
+
+        for mask in course_masks:
+            covered |= mask
+            if mask & self.counted_mask:
+                for area in self.counted:
+                    if mask & AREA_BITS[area]:
+                        counts[area] += 1
+
+        return self.completed_mask(covered, counts), counts
+
+    def completed_mask(self, covered: int, counts: Dict[str, int]) -> int:
+        """Combine OR-reduced coverage with per-area counters"""
+        completed = covered & ~self.counted_mask
+        for area, needed in self.counted.items():
+            if counts[area] >= needed:
+                completed |= AREA_BITS[area]
+        return completed
+
+    def missing_areas(self, completed: int) -> List[str]:
+        """Required areas not covered by the completed mask"""
+        return mask_to_areas(self.required_mask & ~completed)
+
+    def status_from_counts(self, area_counts: Dict[str, int]) -> Dict[str, Dict]:
+        """Build the per-area status dict from distinct-course counts per area"""
+        covered = area_mask(area for area, count in area_counts.items() if count > 0)
+        counts = {area: area_counts.get(area, 0) for area in self.counted}
+        return self.status(self.completed_mask(covered, counts), counts)
+
+    def evaluate(self, course_masks: Iterable[int]) -> Dict[str, Dict]:
+        """Build the per-area status dict for a set of course masks"""
+        return self.status(*self.coverage(course_masks))
+
+    def status(self, completed: int, counts: Dict[str, int]) -> Dict[str, Dict]:
+        """Build the per-area status dict from a completed mask and counters"""
+        result = {}
+        for area, info in self.areas.items():
+            done = bool(completed & AREA_BITS[area])
+            result[area] = {
+                "name": info.get("name", ""),
+                "required": info.get("required", True),
+                "completed": done,
+                "courses_needed": self.courses_needed[area],
+                "courses_completed": counts.get(area, int(done)),
+            }
+        return result
+
+
+def transcript_masks(course_codes: Iterable[str], college_masks: Dict[str, int]) -> List[int]:
+    """Look up the IGETC masks for the distinct courses on a transcript"""
+    codes = {normalize_course_code(code) for code in course_codes}
+    return [college_masks[code] for code in codes if code in college_masks]
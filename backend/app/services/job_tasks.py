@@ -0,0 +1,59 @@
+"""
+Job Tasks
+Functions run inside job queue worker processes. Each process keeps its
+own catalog snapshot, loaded from the database on first use and reloaded
+when a job was submitted against a different version
+"""
+
+from typing import Dict, Any, Optional
+import time
+
+from app.services.catalog import Catalog, CatalogStore
+from app.services.verification import batch_verification_results
+
+
+_catalogs: Optional[CatalogStore] = None
+
+
+def _catalog(version: Optional[str] = None) -> Catalog:
+    global _catalogs
+    if _catalogs is None:
+        # Imported late so only worker processes open database connections here
+        from app.db.database import SessionLocal
+        from app.db.catalog_repository import catalog_signature, load_catalog
+        _catalogs = CatalogStore(
+            load=lambda: load_catalog(SessionLocal),
+            signature=lambda: catalog_signature(SessionLocal),
+        )
+    catalog = _catalogs.current
+    if version is not None and catalog.version != version:
+        _catalogs.refresh()
+        catalog = _catalogs.current
+    return catalog
+
+
+def init_worker() -> None:
+    """Process pool initializer: load the catalog before the first job"""
+    _catalog()
+
+
+def verify_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Batch verification of `entries` ({email, transcript, college, major},
+    keyed by email), as in POST /api/verify/batch
+    """
+    start = time.perf_counter()
+    catalog = _catalog(payload.get("catalog_version"))
+    entries = payload["entries"]
+    results = batch_verification_results(
+        catalog,
+        [entry["transcript"] for entry in entries],
+        [entry["college"] for entry in entries],
+        [entry["major"] for entry in entries],
+    )
+    return {
+        "count": len(results),
+        "catalog_version": catalog.version,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": {entry["email"]: result for entry, result in zip(entries, results)},
+    }
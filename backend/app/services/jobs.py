@@ -0,0 +1,288 @@
+"""
+Job Queue Service
+Background jobs for workloads too long for a request handler: submitted
+jobs wait in a bounded queue and run on a process pool, with retries and
+per-job timing recorded in a pluggable JobStore. Jobs a previous run
+left unfinished can be requeued on start
+"""
+
+from typing import Dict, Any, Optional, Callable, List
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import weakref
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, RETRYING, SUCCEEDED, FAILED = "queued", "running", "retrying", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(RuntimeError):
+    """The queue is at its maximum depth"""
+
+
+@dataclass
+class Job:
+    """One unit of background work and its progress"""
+    kind: str
+    payload: Dict[str, Any]
+    max_attempts: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    attempts: int = 0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    submitted_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_ms: Optional[float] = None  # submit -> first start
+    run_ms: Optional[float] = None  # all attempts, excluding retry backoff
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["payload"]
+        if not include_result:
+            del data["result"]
+        for name in ("submitted_at", "started_at", "finished_at"):
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return data
+
+
+class JobStore(ABC):
+    """Base class for job state storage"""
+
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        """Insert or replace a job"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """A job by id, or None"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of stored jobs by status"""
+
+    @abstractmethod
+    def unfinished(self, submitted_before: datetime) -> List[Job]:
+        """Jobs submitted before a time that have not finished, oldest first"""
+
+
+class MemoryJobStore(JobStore):
+    """Jobs kept in this process, oldest dropped past `max_jobs`"""
+
+    def __init__(self, max_jobs: int = 10000):
+        self._jobs: Dict[str, Job] = {}
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._max_jobs:
+                del self._jobs[next(iter(self._jobs))]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def unfinished(self, submitted_before: datetime) -> List[Job]:
+        with self._lock:
+            return sorted(
+                (job for job in self._jobs.values()
+                 if job.status not in FINISHED and job.submitted_at < submitted_before),
+                key=lambda job: job.submitted_at,
+            )
+
+
+class JobQueue:
+    """
+    Bounded asyncio queue drained by one dispatcher per pool process.
+    `handlers` maps a job kind to a picklable top-level function taking
+    the payload. A failed attempt is retried after an exponential backoff
+    until `max_attempts`. An attempt past `timeout_seconds` counts as
+    failed, and its pool's processes are killed and replaced so that
+    stuck attempts cannot take every worker; other attempts killed with
+    them are retried without using up an attempt. `recover` requeues the
+    jobs a stopped server left queued or running.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, Callable[[Dict], Any]],
+        workers: Optional[int] = None,
+        max_depth: int = 1000,
+        max_attempts: int = 3,
+        timeout_seconds: float = 300.0,
+        retry_backoff_seconds: float = 1.0,
+        initializer: Optional[Callable[[], None]] = None,
+        start_method: str = "spawn"
+    ):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.max_attempts = max_attempts
+        self.timeout_seconds = timeout_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._initializer = initializer
+        self._context = multiprocessing.get_context(start_method)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Pools killed over a timeout; their other attempts were not at fault
+        self._killed_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self.started_at: Optional[datetime] = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=self._initializer,
+        )
+
+    def _replace_pool(self, pool: ProcessPoolExecutor, kill: bool = False) -> None:
+        """
+        Shut `pool` down (with `kill`, terminating its processes, since a
+        running call cannot be cancelled) and swap in a fresh one unless
+        another attempt already has
+        """
+        if kill:
+            self._killed_pools.add(pool)
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if self._pool is pool:
+            self._pool = self._new_pool()
+
+    def start(self) -> None:
+        """Create the pool and dispatchers (inside the running event loop)"""
+        self.started_at = datetime.utcnow()
+        self._pool = self._new_pool()
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def recover(self) -> Dict[str, int]:
+        """
+        Requeue jobs submitted before start() that never finished (their
+        server stopped mid-run). A job with no attempts left, or past the
+        queue's free space, is marked failed instead. Only one process
+        sharing the store should call this.
+        """
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        recovered = {"requeued": 0, "failed": 0}
+        for job in await asyncio.to_thread(self.store.unfinished, self.started_at):
+            if job.attempts >= job.max_attempts or self._queue.full():
+                job.status = FAILED
+                job.error = "Interrupted by a server restart"
+                job.finished_at = datetime.utcnow()
+                recovered["failed"] += 1
+            else:
+                job.status = QUEUED
+                recovered["requeued"] += 1
+            await asyncio.to_thread(self.store.save, job)
+            if job.status == QUEUED:
+                self._queue.put_nowait(job)
+        return recovered
+
+    async def stop(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def submit(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        """Queue a job; raises JobQueueFull when the queue is at max depth"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        if self._queue.full():
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+        job = Job(kind=kind, payload=payload, max_attempts=max_attempts or self.max_attempts)
+        await asyncio.to_thread(self.store.save, job)
+        self._queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _dispatch(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                logger.exception("Job %s dispatch failed", job.id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        handler = self.handlers[job.kind]
+        job.run_ms = job.run_ms or 0.0
+        while True:
+            job.attempts += 1
+            job.status = RUNNING
+            if job.started_at is None:
+                job.started_at = datetime.utcnow()
+                job.queue_ms = round((job.started_at - job.submitted_at).total_seconds() * 1000, 2)
+            await asyncio.to_thread(self.store.save, job)
+
+            start = time.perf_counter()
+            pool = self._pool
+            try:
+                future = loop.run_in_executor(pool, handler, job.payload)
+                job.result = await asyncio.wait_for(future, self.timeout_seconds)
+                job.status, job.error = SUCCEEDED, None
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    # Otherwise the attempt keeps running and holds its worker
+                    self._replace_pool(pool, kill=True)
+                elif isinstance(exc, BrokenProcessPool):
+                    if pool in self._killed_pools:
+                        # Killed over another job's timeout
+                        job.attempts -= 1
+                    # Later attempts need a fresh pool
+                    self._replace_pool(pool)
+                job.error = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+                job.status = RETRYING if job.attempts < job.max_attempts else FAILED
+            job.run_ms = round(job.run_ms + (time.perf_counter() - start) * 1000, 2)
+
+            if job.status != RETRYING:
+                job.finished_at = datetime.utcnow()
+                await asyncio.to_thread(self.store.save, job)
+                return
+            await asyncio.to_thread(self.store.save, job)
+            await asyncio.sleep(self.retry_backoff_seconds * 2 ** (job.attempts - 1))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_depth": self.max_depth,
+            "jobs": self.store.counts(),
+        }
@@ -1,18 +1,420 @@
-from string import Template
-
-SYSTEM_PROMPT = """
-You are a college advising assiastnt. 
-Provide transfering guidance based only on the user's academic information.
-State only the facts, and do not include a formal introduction (e.g. greeting the individual).
-Provide only the summary, and seem potentially more robotic. 
-"""
-
-USER_PROMPT_TEMPLATE = Template("""
-Student Information:
-- Name: $name
-- Current Community College: $community_college
-- Target University: $target_uc
-- Target Major: $major
-
-Prompt: Summarize the details of this user and provide feedback.
-""")
+"""
+LLM Service
+Calls a pluggable LLM backend for plain-language explanations. Responses
+are cached by a hash of (system prompt, rendered prompt, model), identical
+in-flight prompts share one call, and every call's latency and token
+usage is recorded
+"""
+
+from typing import Dict, Any, Optional, Callable, List, AsyncIterator, Tuple
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+from app.prompting.prompt_builder import build_user_prompt
+from app.prompting.prompt_data import get_user_dict
+from app.prompting.prompts import SYSTEM_PROMPT
+from app.services.result_cache import content_hash
+from app.services.singleflight import SingleFlight
+
+
+class LLMError(RuntimeError):
+    """The backend failed or returned an unusable response"""
+
+
+@dataclass
+class Completion:
+    text: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for backends without usage data"""
+    return max(1, len(text) // 4)
+
+
+# Packed prompts carry several students, each section under its own header
+PACK_SECTION = re.compile(r"^### Student (\d+)[ \t]*$", re.M)
+
+
+def pack_prompts(prompts: List[str]) -> str:
+    """Several rendered prompts as one, asking for one answer section per prompt"""
+    sections = "\n".join(f"### Student {i}\n{prompt.strip()}\n" for i, prompt in enumerate(prompts, start=1))
+    return (
+        f"Summarize each of the {len(prompts)} students below separately. Answer with exactly "
+        f"{len(prompts)} sections, in order, each starting with its own \"### Student <number>\" line.\n\n"
+        + sections
+    )
+
+
+def unpack_sections(text: str, count: int) -> Optional[List[str]]:
+    """The `count` sections of a packed answer, or None if it doesn't have exactly those"""
+    parts = PACK_SECTION.split(text)
+    if [int(number) for number in parts[1::2]] != list(range(1, count + 1)):
+        return None
+    sections = [section.strip() for section in parts[2::2]]
+    return sections if all(sections) else None
+
+
+class LLMBackend(ABC):
+    """Base class for model backends; `complete` and `stream` are blocking"""
+
+    name = "base"
+
+    @abstractmethod
+    def complete(self, system: str, prompt: str, model: str, max_tokens: int) -> Completion:
+        """One completion for a system and user prompt"""
+
+    def stream(
+        self,
+        system: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        on_chunk: Callable[[str], None]
+    ) -> Completion:
+        """Like `complete`, passing text to `on_chunk` as it is generated (all at once by default)"""
+        completion = self.complete(system, prompt, model, max_tokens)
+        on_chunk(completion.text)
+        return completion
+
+
+class HttpLLMBackend(LLMBackend):
+    """
+    OpenAI-compatible `/chat/completions` endpoint (hosted APIs, vLLM,
+    llama.cpp, Ollama, or scripts/llm_stub_server.py locally)
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout_seconds: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        # One pooled session, so calls reuse connections
+        self._session = requests.Session()
+        if api_key:
+            self._session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _post(self, system: str, prompt: str, model: str, max_tokens: int, stream: bool) -> requests.Response:
+        body = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+        }
+        if stream:
+            body["stream"] = True
+            body["stream_options"] = {"include_usage": True}
+        response = self._session.post(
+            f"{self.base_url}/chat/completions", json=body, timeout=self.timeout_seconds, stream=stream
+        )
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _completion(text: str, model: str, usage: Dict, system: str, prompt: str) -> Completion:
+        return Completion(
+            text=text,
+            model=model,
+            prompt_tokens=usage.get("prompt_tokens") or estimate_tokens(system + prompt),
+            completion_tokens=usage.get("completion_tokens") or estimate_tokens(text),
+        )
+
+    def complete(self, system: str, prompt: str, model: str, max_tokens: int) -> Completion:
+        try:
+            data = self._post(system, prompt, model, max_tokens, stream=False).json()
+            text = data["choices"][0]["message"]["content"]
+        except (requests.RequestException, ValueError, KeyError, IndexError) as exc:
+            raise LLMError(f"LLM request failed: {exc}") from exc
+        return self._completion(text, data.get("model", model), data.get("usage") or {}, system, prompt)
+
+    def stream(
+        self,
+        system: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        on_chunk: Callable[[str], None]
+    ) -> Completion:
+        """Server-sent `data:` chunks of choices[0].delta.content, ending with [DONE]"""
+        parts: List[str] = []
+        usage: Dict = {}
+        try:
+            with self._post(system, prompt, model, max_tokens, stream=True) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    data = json.loads(payload)
+                    model = data.get("model", model)
+                    usage = data.get("usage") or usage
+                    for choice in data.get("choices") or []:
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            parts.append(text)
+                            on_chunk(text)
+        except (requests.RequestException, ValueError) as exc:
+            raise LLMError(f"LLM request failed: {exc}") from exc
+        return self._completion("".join(parts), model, usage, system, prompt)
+
+
+class StubLLMBackend(LLMBackend):
+    """
+    In-process stand-in: echoes the prompt's facts after `latency_seconds`,
+    streaming one word per `token_seconds`. Packed prompts get one section
+    per student.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_seconds: float = 0.0, token_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.token_seconds = token_seconds
+
+    def complete(self, system: str, prompt: str, model: str, max_tokens: int) -> Completion:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        parts = PACK_SECTION.split(prompt)
+        if len(parts) > 1:
+            text = "\n\n".join(
+                f"### Student {number}\n{self._summarize(section)}"
+                for number, section in zip(parts[1::2], parts[2::2])
+            )
+        else:
+            text = self._summarize(prompt)
+        return Completion(text, model, estimate_tokens(system + prompt), estimate_tokens(text))
+
+    @staticmethod
+    def _summarize(prompt: str) -> str:
+        facts = [line.strip("- ").strip() for line in prompt.splitlines() if line.strip().startswith("-")]
+        return "Summary: " + "; ".join(facts) if facts else "Summary: no details provided."
+
+    def stream(
+        self,
+        system: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        on_chunk: Callable[[str], None]
+    ) -> Completion:
+        completion = self.complete(system, prompt, model, max_tokens)
+        for word in re.findall(r"\S+\s*", completion.text):
+            if self.token_seconds:
+                time.sleep(self.token_seconds)
+            on_chunk(word)
+        return completion
+
+
+def create_llm_backend(backend: str) -> LLMBackend:
+    """Build the backend: "http" (LLM_BASE_URL) or "stub" (in-process)"""
+    if backend == "http":
+        return HttpLLMBackend(
+            os.getenv("LLM_BASE_URL", "http://localhost:8089/v1"),
+            api_key=os.getenv("LLM_API_KEY"),
+            timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+        )
+    if backend == "stub":
+        return StubLLMBackend(
+            float(os.getenv("LLM_STUB_LATENCY_MS", "0")) / 1000,
+            float(os.getenv("LLM_STUB_TOKEN_MS", "0")) / 1000,
+        )
+    raise ValueError(f"Unknown LLM_BACKEND '{backend}'")
+
+
+class LLMMetrics:
+    """Backend call counts, token totals and latency percentiles of recent calls"""
+
+    def __init__(self, window: int = 1024):
+        self._latencies: deque = deque(maxlen=window)
+        self._first_chunks: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, latency_ms: float, completion: Optional[Completion], first_chunk_ms: Optional[float] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(latency_ms)
+            if first_chunk_ms is not None:
+                self._first_chunks.append(first_chunk_ms)
+            if completion is None:
+                self.errors += 1
+            else:
+                self.prompt_tokens += completion.prompt_tokens
+                self.completion_tokens += completion.completion_tokens
+
+    def hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            first_chunks = sorted(self._first_chunks)
+
+        def percentile(p: float, values: List[float] = latencies) -> float:
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+            # Streamed calls only: time until the first text arrived
+            "first_chunk_ms": {
+                "p50": percentile(0.50, first_chunks),
+                "p95": percentile(0.95, first_chunks),
+            },
+        }
+
+
+class ExplanationService:
+    """
+    Cached, coalesced LLM completions.
+    `cache` is a ResultCache or TieredCache; at most `max_concurrency`
+    backend calls run at once, the rest wait their turn.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        model: str,
+        cache,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = 400,
+        max_concurrency: int = 8
+    ):
+        self.backend = backend
+        self.model = model
+        self.cache = cache
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.metrics = LLMMetrics()
+        self._flight = SingleFlight()
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def prompt_key(self, prompt: str) -> str:
+        return content_hash(self.system_prompt, prompt, self.model)
+
+    async def complete(self, prompt: str) -> Dict[str, Any]:
+        """
+        The explanation for a rendered prompt: from the cache, from an
+        identical call already in flight, or from a new backend call
+        """
+        key = self.prompt_key(prompt)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            self.metrics.hit()
+            return {**cached, "cached": True}
+        return await self._flight.do(key, lambda: self._call(key, prompt))
+
+    async def stream(self, prompt: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yield ("chunk", text) as the explanation is generated, then
+        ("done", explanation). Cached or already in-flight prompts arrive
+        as a single chunk.
+        """
+        key = self.prompt_key(prompt)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            self.metrics.hit()
+            yield "chunk", cached["text"]
+            yield "done", {**cached, "cached": True}
+            return
+        if self._flight.pending(key) is not None:
+            value = await self._flight.do(key, lambda: self._call(key, prompt))
+            yield "chunk", value["text"]
+            yield "done", value
+            return
+
+        # Lead the call; other callers for this prompt join it through the flight
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(self._flight.do(
+            key, lambda: self._call(key, prompt, lambda text: loop.call_soon_threadsafe(chunks.put_nowait, text))
+        ))
+        task.add_done_callback(lambda _: chunks.put_nowait(None))
+        while True:
+            text = await chunks.get()
+            if text is None:
+                break
+            yield "chunk", text
+        yield "done", await task
+
+    async def _call(self, key: str, prompt: str, on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """One backend call (streamed when `on_chunk` is given); the result is cached"""
+        async with self._slots:
+            start = time.perf_counter()
+            first_chunk: List[float] = []
+
+            def chunk(text: str) -> None:
+                if not first_chunk:
+                    first_chunk.append(round((time.perf_counter() - start) * 1000, 2))
+                on_chunk(text)
+
+            try:
+                if on_chunk is None:
+                    completion = await asyncio.to_thread(
+                        self.backend.complete, self.system_prompt, prompt, self.model, self.max_tokens
+                    )
+                else:
+                    completion = await asyncio.to_thread(
+                        self.backend.stream, self.system_prompt, prompt, self.model, self.max_tokens, chunk
+                    )
+            except Exception as exc:
+                self.metrics.record((time.perf_counter() - start) * 1000, None)
+                if isinstance(exc, LLMError):
+                    raise
+                raise LLMError(f"LLM backend failed: {exc}") from exc
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.metrics.record(latency_ms, completion, first_chunk[0] if first_chunk else None)
+
+        value = {
+            "text": completion.text.strip(),
+            "model": completion.model,
+            "prompt_tokens": completion.prompt_tokens,
+            "completion_tokens": completion.completion_tokens,
+            "latency_ms": latency_ms,
+        }
+        await self.cache.aset(key, value)
+        return {**value, "cached": False}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "model": self.model,
+            **self.metrics.stats(),
+            "coalescing": self._flight.stats(),
+            "cache": self.cache.stats(),
+        }
+
+
+def render_user_prompt(user: Dict[str, Any]) -> str:
+    """USER_PROMPT_TEMPLATE for a user document (target major, else declared major)"""
+    return build_user_prompt(get_user_dict(user))
@@ -0,0 +1,206 @@
+"""
+Plan Matrix Service
+Every (campus, major) plan of a catalog compiled into column arrays, so
+one transcript's features are scored against all plans at once
+"""
+
+from typing import List, Dict, Tuple, Iterable
+from dataclasses import dataclass
+import heapq
+import json
+import time
+
+import numpy as np
+
+from app.services.requirement_plan import RequirementPlan
+from app.services.igetc import IgetcRequirement, area_mask
+
+
+# Eligibility status codes, best first
+STATUSES = ("likely_eligible", "conditional", "not_yet_eligible")
+
+# Distance weights for closest-plan ranking: one missing major prep course
+# counts as two missing IGETC areas, or a quarter grade point below minimum
+PREP_WEIGHT = 1.0
+IGETC_WEIGHT = 0.5
+GPA_WEIGHT = 4.0
+
+
+@dataclass
+class PlanScores:
+    """
+    Per-plan results for one transcript, aligned with PlanMatrix.keys.
+    `status` indexes STATUSES; `gpa_margin` is GPA minus the plan minimum.
+    """
+    status: np.ndarray
+    missing_major_prep: np.ndarray
+    missing_igetc: np.ndarray
+    gpa_margin: np.ndarray
+    units_ok: np.ndarray
+
+    def ranking(self) -> np.ndarray:
+        """
+        Plan indices, best first: status, then fewest missing major prep
+        courses, then fewest missing IGETC areas, then largest GPA margin
+        """
+        return np.lexsort((-self.gpa_margin, self.missing_igetc, self.missing_major_prep, self.status))
+
+    def distance(self) -> np.ndarray:
+        """How far each plan is from being satisfied (0 = nothing missing)"""
+        return (
+            PREP_WEIGHT * self.missing_major_prep
+            + IGETC_WEIGHT * self.missing_igetc
+            + GPA_WEIGHT * np.maximum(-self.gpa_margin, 0.0)
+        )
+
+
+class PlanMatrix:
+    """
+    Column-wise view of all plans.
+    Major prep slots of every plan share one global numbering; `code_slots`
+    maps a normalized course code to the global slots it satisfies.
+    Plans with identical IGETC patterns share one IgetcRequirement.
+    """
+
+    def __init__(
+        self,
+        plans: Dict[Tuple[str, str], RequirementPlan],
+        igetc_plans: Dict[Tuple[str, str], IgetcRequirement],
+        requirements: Dict[str, Dict[str, Dict]]
+    ):
+        self.keys: List[Tuple[str, str]] = list(plans)
+        self.plans = plans
+        size = len(self.keys)
+
+        slot_plan: List[int] = []
+        code_slots: Dict[str, List[int]] = {}
+        for plan_id, key in enumerate(self.keys):
+            plan = plans[key]
+            base = len(slot_plan)
+            slot_plan.extend([plan_id] * len(plan.slots))
+            for code, entries in plan.index.items():
+                code_slots.setdefault(code, []).extend(base + slot_id for slot_id, _ in entries)
+        self.slot_plan = np.array(slot_plan, dtype=np.int64)
+        self.code_slots = {code: np.array(slots, dtype=np.int64) for code, slots in code_slots.items()}
+        self.slot_counts = np.bincount(self.slot_plan, minlength=size).astype(np.int64)
+
+        reqs = [requirements.get(campus, {}).get(major, {}) for campus, major in self.keys]
+        self.min_gpa = np.array([r.get("min_gpa", 0.0) for r in reqs], dtype=np.float64)
+        self.min_units = np.array([r.get("min_units", 0) for r in reqs], dtype=np.float64)
+        self.max_units = np.array([r.get("max_units", np.inf) for r in reqs], dtype=np.float64)
+
+        self.igetc_groups: List[IgetcRequirement] = []
+        groups: Dict[str, int] = {}
+        igetc_group = []
+        for key in self.keys:
+            igetc = igetc_plans[key]
+            pattern = json.dumps(igetc.areas, sort_keys=True)
+            if pattern not in groups:
+                groups[pattern] = len(self.igetc_groups)
+                self.igetc_groups.append(igetc)
+            igetc_group.append(groups[pattern])
+        self.igetc_group = np.array(igetc_group, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def satisfied_slots(self, course_codes: Iterable[str]) -> np.ndarray:
+        """Distinct global slot ids satisfied by normalized course codes"""
+        hits = [self.code_slots[code] for code in course_codes if code in self.code_slots]
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits))
+
+    def igetc_missing(self, igetc_counts: Dict[str, int]) -> np.ndarray:
+        """Missing required IGETC areas per plan, from distinct-course area counts"""
+        covered = area_mask(area for area, count in igetc_counts.items() if count > 0)
+        per_group = np.array([
+            bin(group.required_mask & ~group.completed_mask(
+                covered, {area: igetc_counts.get(area, 0) for area in group.counted}
+            )).count("1")
+            for group in self.igetc_groups
+        ], dtype=np.int64)
+        return per_group[self.igetc_group] if len(per_group) else np.zeros(len(self), dtype=np.int64)
+
+    def score(
+        self,
+        course_codes: Iterable[str],
+        gpa: float,
+        total_units: float,
+        igetc_counts: Dict[str, int]
+    ) -> PlanScores:
+        """
+        Score one transcript's features (normalized codes, GPA, units and
+        IGETC area counts) against every plan
+        """
+        satisfied = self.satisfied_slots(course_codes)
+        completed = np.bincount(self.slot_plan[satisfied], minlength=len(self))
+        missing_prep = self.slot_counts - completed
+
+        gpa_margin = gpa - self.min_gpa
+        gpa_ok = gpa_margin >= 0
+        units_ok = (self.min_units <= total_units) & (total_units <= self.max_units)
+        status = np.where(
+            gpa_ok & units_ok,
+            np.where(missing_prep == 0, 0, 1),
+            2,
+        )
+        return PlanScores(
+            status=status,
+            missing_major_prep=missing_prep,
+            missing_igetc=self.igetc_missing(igetc_counts),
+            gpa_margin=gpa_margin,
+            units_ok=units_ok,
+        )
+
+    def ranked_rows(
+        self,
+        scores: PlanScores,
+        limit: int,
+        deadline: float
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Result rows in rank order, stopping at `limit` rows or when
+        time.perf_counter() passes `deadline`. Returns (rows, complete),
+        where complete is False if the deadline cut the list short.
+        """
+        order = scores.ranking()[:limit]
+        rows = []
+        for position, plan_id in enumerate(order):
+            if position and position % 64 == 0 and time.perf_counter() > deadline:
+                return rows, False
+            campus, major = self.keys[plan_id]
+            rows.append({
+                "rank": position + 1,
+                "campus": campus,
+                "major": major,
+                "eligibility_status": STATUSES[scores.status[plan_id]],
+                "missing_major_prep": int(scores.missing_major_prep[plan_id]),
+                "major_prep_total": int(self.slot_counts[plan_id]),
+                "missing_igetc_areas": int(scores.missing_igetc[plan_id]),
+                "gpa_margin": round(float(scores.gpa_margin[plan_id]), 2),
+                "units_ok": bool(scores.units_ok[plan_id]),
+            })
+        return rows, True
+
+    def closest(self, scores: PlanScores, k: int) -> List[Tuple[float, int]]:
+        """
+        The k plans with the smallest distance as (distance, plan id),
+        ties going to the larger GPA margin. A bounded heap keeps this
+        O(plans * log k).
+        """
+        candidates = zip(scores.distance().tolist(), (-scores.gpa_margin).tolist(), range(len(self)))
+        return [(distance, plan_id) for distance, _, plan_id in heapq.nsmallest(k, candidates)]
+
+    def gaps(self, plan_id: int, course_codes: Iterable[str], igetc_counts: Dict[str, int]) -> Dict[str, List]:
+        """Names of the unmet major prep requirements and IGETC areas of one plan"""
+        plan = self.plans[self.keys[plan_id]]
+        group = self.igetc_groups[self.igetc_group[plan_id]]
+        covered = area_mask(area for area, count in igetc_counts.items() if count > 0)
+        completed = group.completed_mask(covered, {area: igetc_counts.get(area, 0) for area in group.counted})
+        return {
+            "missing_major_prep": [
+                slot.name for slot, match in zip(plan.slots, plan.resolve(course_codes)) if match is None
+            ],
+            "missing_igetc_areas": group.missing_areas(completed),
+        }
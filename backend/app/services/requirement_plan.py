@@ -0,0 +1,74 @@
+"""
+Requirement Plan Service
+Compiles major preparation requirements into an inverted index so a
+transcript can be resolved in a single pass over its courses
+"""
+
+from typing import List, Dict, Tuple, Optional, Iterable
+from dataclasses import dataclass
+
+
+def normalize_course_code(code: str) -> str:
+    """Normalize a course code for matching ("math  1a " -> "MATH 1A")"""
+    return " ".join(str(code or "").upper().split())
+
+
+@dataclass(frozen=True)
+class RequirementSlot:
+    """A single major prep requirement and the courses that satisfy it"""
+    name: str
+    acceptable_courses: Tuple[str, ...]
+
+
+class RequirementPlan:
+    """
+    Compiled major preparation requirements for one (campus, major).
+    Maps every normalized course code to the requirement slots it fills,
+    along with its preference rank inside each slot.
+    """
+
+    def __init__(self, required_courses: List[Dict]):
+        self.slots: List[RequirementSlot] = []
+        self.index: Dict[str, List[Tuple[int, int]]] = {}
+
+        for slot_id, req in enumerate(required_courses):
+            codes = tuple(req.get("equivalent_codes", []))
+            self.slots.append(RequirementSlot(name=req["name"], acceptable_courses=codes))
+
+            seen = set()
+            for rank, code in enumerate(codes):
+                key = normalize_course_code(code)
+                if key in seen:
+                    continue
+                seen.add(key)
+                self.index.setdefault(key, []).append((slot_id, rank))
+
+    def resolve(self, course_codes: Iterable[str]) -> List[Optional[str]]:
+        """
+        Resolve transcript course codes against the plan.
+        Returns the matched course for each slot (None if unsatisfied),
+        preferring the earliest acceptable course like the linear scan did.
+        """
+        best: List[Optional[int]] = [None] * len(self.slots)
+
+        for code in course_codes:
+            for slot_id, rank in self.index.get(normalize_course_code(code), ()):
+                current = best[slot_id]
+                if current is None or rank < current:
+                    best[slot_id] = rank
+
+        return [
+            slot.acceptable_courses[rank] if rank is not None else None
+            for slot, rank in zip(self.slots, best)
+        ]
+
+
+def compile_campus_plans(
+    campus: str,
+    requirements: Dict[str, Dict]
+) -> Dict[Tuple[str, str], RequirementPlan]:
+    """Compile a plan for every major offered by a campus"""
+    return {
+        (campus, major): RequirementPlan(reqs.get("required_courses", []))
+        for major, reqs in requirements.items()
+    }
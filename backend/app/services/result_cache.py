@@ -0,0 +1,118 @@
+"""
+Result Cache Service
+Content-addressed cache of verification results, keyed by a hash of the
+normalized transcript, college, major and requirements catalog version
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+from app.services.requirement_plan import normalize_course_code
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable SHA-256 hex digest of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def catalog_version(requirements: Dict, equivalencies: Dict) -> str:
+    """Version string for a requirements/equivalencies catalog"""
+    return content_hash(requirements, equivalencies)[:16]
+
+
+FINGERPRINT_MOD = 1 << 64
+
+
+def course_fingerprint(course: Dict) -> int:
+    """
+    64-bit hash of the fields of a course that affect verification.
+    A transcript's fingerprint is the sum of its courses' hashes modulo
+    FINGERPRINT_MOD, so it is order-independent and can be updated as
+    courses are added or removed.
+    """
+    key = "|".join((
+        normalize_course_code(course.get("course_code", "")),
+        repr(float(course.get("units", 0))),
+        str(course.get("grade", "")).upper(),
+    ))
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+def verification_key(fingerprint: str, college: str, major: str, version: str) -> str:
+    """Cache key for a verification result (fingerprint from TranscriptStats)"""
+    return content_hash(fingerprint, college, major, version)
+
+
+class ResultCache:
+    """
+    LRU cache with per-entry TTL and hit/miss counters.
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached result, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict) -> None:
+        """Store a result, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Same interface as TieredCache's async methods (this cache never blocks)
+    async def aget(self, key: str) -> Optional[Dict]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Dict) -> None:
+        self.set(key, value)
+
+    def discard(self, key: str) -> None:
+        """Drop one entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a catalog change)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,255 @@
+"""
+Roster Import Service
+Registers many students (with optional transcripts) from a JSONL or CSV
+roster. Records are parsed, validated and turned into user documents in
+chunks on a worker thread, and written through UserRepository.create_many,
+a few chunks at a time
+"""
+
+from typing import Annotated, Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
+import csv
+import itertools
+import json
+import time
+
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError, WrapValidator
+
+from app.db.repository import COURSE_FIELDS, UserRepository
+
+
+STUDENT_FIELDS = ("email", "name", "major", "community_college", "target_uc", "target_major")
+MAX_REPORTED_ERRORS = 1000
+
+
+class RosterCourse(BaseModel):
+    course_code: str
+    course_name: str
+    units: float
+    grade: str
+    semester: str
+
+
+class RosterStudent(BaseModel):
+    email: EmailStr
+    name: str
+    major: str
+    community_college: str
+    target_uc: Optional[str] = None
+    target_major: Optional[str] = None
+    courses: List[RosterCourse] = []
+
+
+def _keep_errors(value: Any, handler) -> Any:
+    """Return a bad record's ValidationError instead of failing the whole chunk"""
+    try:
+        return handler(value)
+    except ValidationError as exc:
+        return exc
+
+
+# Validates a whole chunk in one pass, one result (student or error) per record
+ROSTER_ADAPTER = TypeAdapter(List[Annotated[RosterStudent, WrapValidator(_keep_errors)]])
+
+
+@dataclass
+class RosterReport:
+    """
+    Import counters and per-row errors (rows are 1-based line numbers of
+    each student's first line; only the first MAX_REPORTED_ERRORS are kept)
+    """
+    read: int = 0
+    created: int = 0
+    existing: int = 0
+    invalid: int = 0
+    failed: int = 0
+    chunks: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def error(self, row: int, email: Optional[str], message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "read": self.read,
+            "created": self.created,
+            "existing": self.existing,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "rows_per_second": round(self.read / elapsed) if elapsed > 0 else 0,
+            "errors": self.errors,
+        }
+
+
+def read_roster(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (row, raw student record). JSONL has one student per line with a
+    `courses` list; CSV has one course per line, with a student's
+    consecutive lines merged (a line without course_code adds no course)
+    """
+    if fmt == "jsonl":
+        for row, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield row, {"_error": f"Invalid JSON: {exc}"}
+        return
+    if fmt != "csv":
+        raise ValueError(f"Unknown roster format '{fmt}' (expected jsonl or csv)")
+
+    current: Optional[Dict[str, Any]] = None
+    first_row = 0
+    for row, record in enumerate(csv.DictReader(lines), start=1):
+        email = (record.get("email") or "").strip()
+        if current is None or email != current["email"]:
+            if current is not None:
+                yield first_row, current
+            current = {name: (record.get(name) or "").strip() or None for name in STUDENT_FIELDS}
+            current["email"] = email
+            current["courses"] = []
+            first_row = row
+        if (record.get("course_code") or "").strip():
+            current["courses"].append({name: record.get(name) for name in COURSE_FIELDS})
+    if current is not None:
+        yield first_row, current
+
+
+def validate_chunk(
+    records: List[Tuple[int, Dict[str, Any]]]
+) -> Tuple[List[Tuple[int, RosterStudent]], List[Tuple[int, Optional[str], str]]]:
+    """
+    Validate a chunk in one TypeAdapter call. Returns the valid students
+    and the rejected rows as (row, email, error); touches no shared state,
+    so it can run on a worker thread
+    """
+    rows, rejected = [], []
+    for row, record in records:
+        if "_error" in record:
+            rejected.append((row, None, record["_error"]))
+        else:
+            rows.append((row, record))
+
+    valid = []
+    for (row, record), result in zip(rows, ROSTER_ADAPTER.validate_python([record for _, record in rows])):
+        if isinstance(result, ValidationError):
+            rejected.append((row, record.get("email"), "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in result.errors()
+            )))
+        else:
+            valid.append((row, result))
+    return valid, rejected
+
+
+def take_records(records: Iterator[Tuple[int, Dict[str, Any]]], count: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """The next `count` records of a read_roster iterator (fewer at the end)"""
+    return list(itertools.islice(records, count))
+
+
+def student_document(student: RosterStudent, created_at: str) -> Dict[str, Any]:
+    """A user document shaped like /api/auth/register's, plus the transcript"""
+    return {
+        "email": student.email,
+        "name": student.name,
+        "major": student.major,
+        "community_college": student.community_college,
+        "created_at": created_at,
+        "transcript": [course.model_dump() for course in student.courses],
+        "target_uc": student.target_uc,
+        "target_major": student.target_major or student.major,
+        "verification_results": None,
+    }
+
+
+def chunk_documents(
+    chunk: List[Tuple[int, RosterStudent]],
+    created_at: str,
+    transcript_stats: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """User documents for a validated chunk, keyed by email"""
+    docs = {}
+    for row, student in chunk:
+        doc = student_document(student, created_at)
+        if transcript_stats is not None and doc["transcript"]:
+            doc["transcript_stats"] = transcript_stats(doc)
+        docs[student.email] = doc
+    return docs
+
+
+async def import_roster(
+    repo: UserRepository,
+    stream: IO[str],
+    fmt: str,
+    chunk_size: int = 500,
+    concurrency: int = 4,
+    transcript_stats: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+) -> RosterReport:
+    """
+    Stream a roster into the repository. At most `concurrency` chunks are
+    being written at once; reading waits for a free slot, so memory stays
+    bounded by the chunk size. `transcript_stats` computes the stored
+    aggregates for a user document (otherwise they are built on first use).
+    """
+    report = RosterReport()
+    created_at = datetime.now().isoformat()
+    seen = set()
+    pending = set()
+
+    async def write(chunk: List[Tuple[int, RosterStudent]]) -> None:
+        try:
+            docs = await asyncio.to_thread(chunk_documents, chunk, created_at, transcript_stats)
+            created = set(await repo.create_many(docs))
+        except Exception as exc:
+            report.failed += len(chunk)
+            for row, student in chunk:
+                report.error(row, student.email, f"Write failed: {exc}")
+            return
+        report.created += len(created)
+        for row, student in chunk:
+            if student.email not in created:
+                report.existing += 1
+                report.error(row, student.email, "User already exists")
+
+    async def submit(records: List[Tuple[int, Dict[str, Any]]]) -> None:
+        chunk = []
+        # Off the event loop: email validation is most of the import's CPU time.
+        # The report is only updated here, on the loop, like the writers do
+        valid, rejected = await asyncio.to_thread(validate_chunk, records)
+        report.invalid += len(rejected)
+        for row, email, message in sorted(rejected):
+            report.error(row, email, message)
+        for row, student in valid:
+            if student.email in seen:
+                report.invalid += 1
+                report.error(row, student.email, "Duplicate email in roster")
+                continue
+            seen.add(student.email)
+            chunk.append((row, student))
+        report.chunks += 1
+        if not chunk:
+            return
+        while len(pending) >= concurrency:
+            _, still_pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.intersection_update(still_pending)
+        pending.add(asyncio.create_task(write(chunk)))
+
+    # Parsing runs on a worker thread too, one chunk at a time
+    rows = read_roster(stream, fmt)
+    while True:
+        records = await asyncio.to_thread(take_records, rows, chunk_size)
+        if not records:
+            break
+        report.read += len(records)
+        await submit(records)
+    if pending:
+        await asyncio.wait(pending)
+    return report
@@ -0,0 +1,155 @@
+"""
+Term Scheduler Service
+Orders a set of remaining community college courses into terms along the
+prerequisite graph, under a per-term unit cap
+"""
+
+from typing import List, Dict, Tuple, FrozenSet, Iterable
+from collections import OrderedDict
+import threading
+
+from app.services.requirement_plan import normalize_course_code
+
+
+DEFAULT_COURSE_UNITS = 4.0
+
+
+class PrerequisiteCycle(ValueError):
+    """The prerequisite graph has a cycle among the courses to schedule"""
+
+
+class TermScheduler:
+    """
+    Prerequisite DAG per college plus a memo of computed schedules.
+    `prerequisites` is college -> course code -> codes required first, and
+    `units` is college -> course code -> units. Schedules depend only on
+    the college, the set of courses to place and the unit cap, so they
+    are memoized on exactly that.
+    """
+
+    def __init__(
+        self,
+        prerequisites: Dict[str, Dict[str, Tuple[str, ...]]],
+        units: Dict[str, Dict[str, float]],
+        memo_size: int = 4096
+    ):
+        self.prerequisites = prerequisites
+        self.units = units
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[Tuple, Tuple[Tuple[str, ...], ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def course_units(self, college: str, code: str) -> float:
+        return self.units.get(college, {}).get(code, DEFAULT_COURSE_UNITS)
+
+    def requires(self, college: str, code: str) -> Tuple[str, ...]:
+        return self.prerequisites.get(college, {}).get(code, ())
+
+    def closure(
+        self,
+        college: str,
+        courses: Iterable[str],
+        taken: Iterable[str]
+    ) -> Tuple[FrozenSet[str], List[str]]:
+        """
+        Courses to schedule: the requested ones plus every prerequisite
+        (transitively) not yet taken. Returns (courses, prerequisites the
+        college does not offer).
+        """
+        taken = {normalize_course_code(code) for code in taken}
+        offered = self.units.get(college, {})
+        needed, unavailable = set(), []
+        stack = [normalize_course_code(code) for code in courses]
+        while stack:
+            code = stack.pop()
+            if code in needed or code in taken:
+                continue
+            if code not in offered:
+                unavailable.append(code)
+                continue
+            needed.add(code)
+            stack.extend(self.requires(college, code))
+        return frozenset(needed), sorted(set(unavailable))
+
+    def terms(self, college: str, courses: FrozenSet[str], max_term_units: float) -> Tuple[Tuple[str, ...], ...]:
+        """Courses grouped into terms (memoized)"""
+        key = (college, courses, max_term_units)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        result = self._schedule(college, courses, max_term_units)
+        with self._lock:
+            self._memo[key] = result
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def _schedule(self, college: str, courses: FrozenSet[str], max_term_units: float) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Kahn's algorithm, one term at a time. Among the courses whose
+        prerequisites are done, those heading the longest prerequisite
+        chains go first so the number of terms stays low.
+        """
+        # Edges inside the set; prerequisites outside it are already taken
+        blockers = {code: {p for p in self.requires(college, code) if p in courses} for code in courses}
+        dependents: Dict[str, List[str]] = {code: [] for code in courses}
+        for code, prereqs in blockers.items():
+            for prereq in prereqs:
+                dependents[prereq].append(code)
+
+        depth: Dict[str, int] = {}
+        for code in self._topological(courses, blockers, dependents)[::-1]:
+            depth[code] = 1 + max((depth[d] for d in dependents[code]), default=0)
+
+        remaining = {code: len(prereqs) for code, prereqs in blockers.items()}
+        ready = [code for code, count in remaining.items() if count == 0]
+        schedule = []
+        while ready:
+            ready.sort(key=lambda code: (-depth[code], code))
+            term, units, deferred = [], 0.0, []
+            for code in ready:
+                course_units = self.course_units(college, code)
+                if term and units + course_units > max_term_units:
+                    deferred.append(code)
+                    continue
+                term.append(code)
+                units += course_units
+            schedule.append(tuple(term))
+
+            # Dependents unlock for the following term
+            ready = deferred
+            for code in term:
+                for dependent in dependents[code]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        ready.append(dependent)
+        return tuple(schedule)
+
+    @staticmethod
+    def _topological(
+        courses: FrozenSet[str],
+        blockers: Dict[str, set],
+        dependents: Dict[str, List[str]]
+    ) -> List[str]:
+        remaining = {code: len(blockers[code]) for code in courses}
+        order = [code for code, count in remaining.items() if count == 0]
+        for code in order:
+            for dependent in dependents[code]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    order.append(dependent)
+        if len(order) != len(courses):
+            cycle = sorted(code for code, count in remaining.items() if count > 0)
+            raise PrerequisiteCycle(f"Prerequisite cycle among: {', '.join(cycle)}")
+        return order
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._memo), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,368 @@
+"""
+Shared Cache Service
+Cache and invalidation messages shared by every uvicorn worker. A
+SharedTier stores JSON values with a TTL and carries pub/sub messages;
+TieredCache puts a per-process LRU in front of it. Async code uses the
+`a`-prefixed methods, which run blocking tiers on a worker thread
+"""
+
+from typing import Dict, Any, Optional, Callable, List
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.services.result_cache import ResultCache
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class SharedTier(ABC):
+    """
+    Base class for shared cache backends.
+    Messages published on a channel reach the subscribers of every process
+    (including the publisher), each message carrying the publisher's
+    `origin` so handlers can skip their own.
+    """
+
+    # Calls do I/O; the async variants run them off the event loop
+    blocking = True
+
+    def __init__(self):
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """The value for a key, or None if absent or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store a JSON value for `ttl_seconds`"""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Set only if absent or expired; True if this call set it"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key (no error if absent)"""
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Send a message to the channel's subscribers in every process"""
+
+    async def _offload(self, method: Callable, *args: Any) -> Any:
+        if not self.blocking:
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await self._offload(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self._offload(self.set, key, value, ttl_seconds)
+
+    async def aadd(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return await self._offload(self.add, key, value, ttl_seconds)
+
+    async def adelete(self, key: str) -> None:
+        await self._offload(self.delete, key)
+
+    async def apublish(self, channel: str, message: Dict[str, Any]) -> None:
+        await self._offload(self.publish, channel, message)
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _deliver(self, channel: str, message: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Cache message handler for '%s' failed", channel)
+
+    def start(self) -> None:
+        """Start receiving messages from other processes"""
+
+    def stop(self) -> None:
+        pass
+
+
+class MemorySharedTier(SharedTier):
+    """Single-process stand-in: a dict, with messages delivered inline"""
+
+    blocking = False
+
+    def __init__(self):
+        super().__init__()
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        with self._lock:
+            if self.get(key) is not None:
+                return False
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._deliver(channel, {**message, "origin": self.origin})
+
+
+class SqliteSharedTier(SharedTier):
+    """
+    Shared tier in a local SQLite file (WAL), for several workers on one
+    host. Messages are rows in an append-only log that each process polls
+    every `poll_seconds`; rows older than `retain_seconds` are pruned.
+    """
+
+    def __init__(self, path: str, poll_seconds: float = 0.5, retain_seconds: float = 300.0):
+        super().__init__()
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.retain_seconds = retain_seconds
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._writes = 0
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_messages "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "message TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl_seconds),
+        )
+        self._after_write()
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO cache_entries VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE cache_entries.expires_at <= ?",
+            (key, json.dumps(value), now + ttl_seconds, now),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._connect().execute(
+            "INSERT INTO cache_messages (channel, message, created_at) VALUES (?, ?, ?)",
+            (channel, json.dumps({**message, "origin": self.origin}), time.time()),
+        )
+        self._after_write()
+
+    def _after_write(self) -> None:
+        # Occasional cleanup instead of a separate janitor
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            db = self._connect()
+            now = time.time()
+            db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            db.execute("DELETE FROM cache_messages WHERE created_at <= ?", (now - self.retain_seconds,))
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        last_id = self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM cache_messages").fetchone()[0]
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, args=(last_id,), name="cache-listener", daemon=True)
+        self._listener.start()
+
+    def _listen(self, last_id: int) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                rows = self._connect().execute(
+                    "SELECT id, channel, message FROM cache_messages WHERE id > ? ORDER BY id", (last_id,)
+                ).fetchall()
+            except sqlite3.Error:
+                logger.exception("Cache message poll failed")
+                continue
+            for message_id, channel, message in rows:
+                last_id = message_id
+                self._deliver(channel, json.loads(message))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=self.poll_seconds * 4)
+            self._listener = None
+
+
+class RedisSharedTier(SharedTier):
+    """Shared tier on a Redis-protocol server (requires the `redis` package)"""
+
+    def __init__(self, url: str, prefix: str = "uctv:"):
+        super().__init__()
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._pubsub = None
+        self._listener = None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._client.set(self._prefix + key, json.dumps(value), px=int(ttl_seconds * 1000))
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return bool(self._client.set(self._prefix + key, json.dumps(value), px=int(ttl_seconds * 1000), nx=True))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._client.publish(self._prefix + channel, json.dumps({**message, "origin": self.origin}))
+
+    def start(self) -> None:
+        if self._listener is not None or not self._handlers:
+            return
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{
+            self._prefix + channel: (
+                lambda raw, channel=channel: self._deliver(channel, json.loads(raw["data"]))
+            )
+            for channel in self._handlers
+        })
+        self._listener = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def create_shared_tier(backend: str) -> SharedTier:
+    """Build the shared tier: "memory" (one worker), "sqlite" or "redis" """
+    if backend == "memory":
+        return MemorySharedTier()
+    if backend == "sqlite":
+        return SqliteSharedTier(
+            os.getenv("CACHE_SQLITE_PATH", "./shared_cache.db"),
+            poll_seconds=float(os.getenv("CACHE_POLL_SECONDS", "0.5")),
+        )
+    if backend == "redis":
+        return RedisSharedTier(os.getenv("CACHE_URL", "redis://localhost:6379/0"))
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}'")
+
+
+INVALIDATE_CHANNEL = "invalidate"
+
+
+class TieredCache:
+    """
+    A ResultCache per process in front of a SharedTier.
+    Reads fall through to the shared tier and fill the local one; writes
+    go to both. `discard` and `clear` reach every process's local tier
+    through an invalidation message (`clear` leaves shared entries to
+    expire by TTL). Request handlers use `aget`/`aset`, which only leave
+    the event loop when the local tier misses.
+    """
+
+    def __init__(self, namespace: str, local: ResultCache, shared: SharedTier):
+        self.namespace = namespace
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+        shared.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = self.shared.get(self._key(key))
+        if value is not None:
+            self.shared_hits += 1
+            self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        self.shared.set(self._key(key), value, self.local.ttl_seconds)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.shared.aget(self._key(key))
+        if value is not None:
+            self.shared_hits += 1
+            self.local.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        await self.shared.aset(self._key(key), value, self.local.ttl_seconds)
+
+    def discard(self, key: str) -> None:
+        self.shared.delete(self._key(key))
+        self.shared.publish(INVALIDATE_CHANNEL, {"namespace": self.namespace, "key": key})
+
+    def clear(self) -> None:
+        self.shared.publish(INVALIDATE_CHANNEL, {"namespace": self.namespace, "key": None})
+
+    def _on_invalidate(self, message: Dict[str, Any]) -> None:
+        if message.get("namespace") != self.namespace:
+            return
+        if message.get("key") is None:
+            self.local.clear()
+        else:
+            self.local.discard(message["key"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.local.stats(), "shared_hits": self.shared_hits, "shared_tier": type(self.shared).__name__}
@@ -0,0 +1,70 @@
+"""
+Single-Flight Service
+Coalesces concurrent async calls for the same key so they share one
+in-flight computation, and serializes read-modify-write sequences per key
+"""
+
+from typing import Dict, Any, Optional, Callable, Awaitable
+import asyncio
+import weakref
+
+
+class SingleFlight:
+    """
+    In-process request coalescing.
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` for `key`, or join the call already in flight"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+
+        # A cancelled caller (e.g. client disconnect) must not cancel the
+        # work other callers are waiting on
+        return await asyncio.shield(task)
+
+    def pending(self, key: str) -> Optional[asyncio.Task]:
+        """The in-flight task for a key, if any"""
+        return self._inflight.get(key)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for started and coalesced calls"""
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+class KeyedLock:
+    """
+    Per-key asyncio locks, created on demand.
+    A lock is dropped once nobody holds or waits on it.
+    """
+
+    def __init__(self):
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __call__(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
@@ -0,0 +1,209 @@
+"""
+Transcript Stats Service
+Running aggregates over a transcript (grade points, units, course counts,
+satisfied requirements, IGETC counters) that are updated per course
+edit, so verification does not rescan the whole transcript
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+
+from app.services.requirement_plan import RequirementPlan, normalize_course_code
+from app.services.igetc import AREA_BITS
+from app.services.result_cache import FINGERPRINT_MOD, course_fingerprint
+
+
+def _tidy(value):
+    """Keep running float sums from drifting (ints pass through unchanged)"""
+    return round(value, 6)
+
+
+@dataclass
+class TranscriptStats:
+    """
+    Aggregates stored on the user record as `transcript_stats`.
+    `fingerprint` is the transcript_fingerprint of the transcript,
+    `satisfied` maps requirement slot index -> rank of the best matched
+    course for the plan named by `plan_key`, and `igetc_counts` counts
+    distinct courses per IGETC area for `igetc_college`, both computed
+    against catalog `catalog_version`.
+    """
+    grade_points: float = 0
+    graded_units: float = 0
+    total_units: float = 0
+    fingerprint: str = "0"
+    course_counts: Dict[str, int] = field(default_factory=dict)
+    plan_key: Optional[str] = None
+    satisfied: Dict[str, int] = field(default_factory=dict)
+    igetc_college: Optional[str] = None
+    igetc_counts: Dict[str, int] = field(default_factory=dict)
+    catalog_version: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TranscriptStats":
+        return cls(**{
+            **data,
+            "course_counts": dict(data.get("course_counts", {})),
+            "satisfied": dict(data.get("satisfied", {})),
+            "igetc_counts": dict(data.get("igetc_counts", {})),
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_transcript(
+        cls,
+        transcript: List[Dict],
+        grade_table: Dict[str, float],
+        plan_key: str,
+        plan: RequirementPlan,
+        college: str,
+        college_masks: Dict[str, int],
+        catalog_version: Optional[str] = None
+    ) -> "TranscriptStats":
+        """Build stats from scratch (one pass over the transcript)"""
+        stats = cls(plan_key=plan_key, igetc_college=college, catalog_version=catalog_version)
+        for course in transcript:
+            stats.add_course(course, grade_table, plan, college_masks)
+        return stats
+
+    @property
+    def gpa(self) -> float:
+        return self.grade_points / self.graded_units if self.graded_units > 0 else 0.0
+
+    def add_course(
+        self,
+        course: Dict,
+        grade_table: Dict[str, float],
+        plan: RequirementPlan,
+        college_masks: Dict[str, int]
+    ) -> None:
+        """Account for one added course"""
+        self._apply_units(course, grade_table, 1)
+
+        code = normalize_course_code(course.get("course_code", ""))
+        count = self.course_counts.get(code, 0)
+        self.course_counts[code] = count + 1
+        if count:
+            return
+
+        # First copy of this course: it may satisfy new slots / areas
+        for slot_id, rank in plan.index.get(code, ()):
+            current = self.satisfied.get(str(slot_id))
+            if current is None or rank < current:
+                self.satisfied[str(slot_id)] = rank
+        self._apply_igetc(college_masks.get(code, 0), 1)
+
+    def remove_course(
+        self,
+        course: Dict,
+        grade_table: Dict[str, float],
+        plan: RequirementPlan,
+        college_masks: Dict[str, int]
+    ) -> None:
+        """Account for one removed course"""
+        code = normalize_course_code(course.get("course_code", ""))
+        count = self.course_counts.get(code, 0)
+        if not count:
+            raise ValueError(f"Course '{code}' is not on the transcript")
+
+        self._apply_units(course, grade_table, -1)
+
+        if count > 1:
+            self.course_counts[code] = count - 1
+            return
+        del self.course_counts[code]
+
+        # Last copy removed: re-resolve only the slots this course filled
+        for slot_id, rank in plan.index.get(code, ()):
+            if self.satisfied.get(str(slot_id)) == rank:
+                self._resolve_slot(plan, slot_id)
+        self._apply_igetc(college_masks.get(code, 0), -1)
+
+    def bind(
+        self,
+        plan_key: str,
+        plan: RequirementPlan,
+        college: str,
+        college_masks: Dict[str, int],
+        catalog_version: Optional[str] = None
+    ) -> None:
+        """
+        Point the stats at a (possibly different) plan and college.
+        Only needed after the target major, college or catalog changes;
+        rebuilds from `course_counts`, never from the transcript.
+        """
+        if self.catalog_version != catalog_version:
+            # Plans and masks may differ under the new catalog
+            self.catalog_version = catalog_version
+            self.plan_key = None
+            self.igetc_college = None
+
+        if self.plan_key != plan_key:
+            self.plan_key = plan_key
+            self.satisfied = {}
+            for slot_id in range(len(plan.slots)):
+                self._resolve_slot(plan, slot_id)
+
+        if self.igetc_college != college:
+            self.igetc_college = college
+            self.igetc_counts = {}
+            for code in self.course_counts:
+                self._apply_igetc(college_masks.get(code, 0), 1)
+
+    def matches(self, plan: RequirementPlan) -> List[Optional[str]]:
+        """Matched course per slot, in the same shape as RequirementPlan.resolve"""
+        result = []
+        for slot_id, slot in enumerate(plan.slots):
+            rank = self.satisfied.get(str(slot_id))
+            result.append(slot.acceptable_courses[rank] if rank is not None else None)
+        return result
+
+    def changed_fields(self, before: Dict[str, Any]) -> Dict[Tuple[str, ...], Any]:
+        """
+        Field paths (relative to transcript_stats) that differ from a
+        previous `to_dict()` snapshot. Removed map keys map to None.
+        """
+        changes: Dict[Tuple[str, ...], Any] = {}
+        after = self.to_dict()
+        for name, value in after.items():
+            old = before.get(name)
+            if isinstance(value, dict):
+                old = old or {}
+                for key in value.keys() | old.keys():
+                    if value.get(key) != old.get(key):
+                        changes[(name, key)] = value.get(key)
+            elif value != old:
+                changes[(name,)] = value
+        return changes
+
+    def _apply_units(self, course: Dict, grade_table: Dict[str, float], sign: int) -> None:
+        units = course.get("units", 0)
+        grade = str(course.get("grade", "")).upper()
+
+        self.total_units = _tidy(self.total_units + sign * units)
+        if grade in grade_table:
+            self.grade_points = _tidy(self.grade_points + sign * grade_table[grade] * units)
+            self.graded_units = _tidy(self.graded_units + sign * units)
+
+        fingerprint = int(self.fingerprint, 16) + sign * course_fingerprint(course)
+        self.fingerprint = format(fingerprint % FINGERPRINT_MOD, "x")
+
+    def _apply_igetc(self, mask: int, sign: int) -> None:
+        if not mask:
+            return
+        for area, bit in AREA_BITS.items():
+            if mask & bit:
+                count = self.igetc_counts.get(area, 0) + sign
+                if count:
+                    self.igetc_counts[area] = count
+                else:
+                    self.igetc_counts.pop(area, None)
+
+    def _resolve_slot(self, plan: RequirementPlan, slot_id: int) -> None:
+        for rank, code in enumerate(plan.slots[slot_id].acceptable_courses):
+            if self.course_counts.get(normalize_course_code(code)):
+                self.satisfied[str(slot_id)] = rank
+                return
+        self.satisfied.pop(str(slot_id), None)
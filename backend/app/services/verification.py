@@ -0,0 +1,163 @@
+"""
+Verification Results
+The result returned by POST /api/verify/{email}: eligibility status,
+summary, major prep and IGETC status, risks and sources for one UCSC
+major. Built from transcript aggregates for one student, or from the
+vectorized EligibilityChecker for a batch
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.services.catalog import Catalog
+from app.services.requirement_plan import RequirementPlan
+
+
+def major_requirements(plan: RequirementPlan, matches: List[Optional[str]]) -> Dict[str, List[Dict]]:
+    """Completed and missing major prep, from the matched course per plan slot (None if missing)"""
+    major_requirements_status = []
+    for slot, matched_course in zip(plan.slots, matches):
+        major_requirements_status.append({
+            "requirement": slot.name,
+            "completed": matched_course is not None,
+            "matched_course": matched_course,
+            "acceptable_courses": list(slot.acceptable_courses),
+        })
+    return {
+        "completed": [r for r in major_requirements_status if r["completed"]],
+        "missing": [r for r in major_requirements_status if not r["completed"]],
+    }
+
+
+def verification_result(
+    requirements: Dict[str, Any],
+    major: str,
+    gpa: float,
+    total_units: float,
+    major_status: Dict[str, List[Dict]],
+    igetc_status: Dict[str, Dict]
+) -> Dict[str, Any]:
+    """Check a student against a major's requirements (`major_status` from major_requirements)"""
+    # Identify risks and warnings
+    risks = []
+
+    if gpa < requirements["min_gpa"]:
+        risks.append({
+            "type": "GPA",
+            "severity": "high",
+            "message": f"Your GPA ({gpa:.2f}) is below the minimum requirement ({requirements['min_gpa']})",
+            "source": requirements["source_url"]
+        })
+    elif gpa < requirements["min_gpa"] + 0.3:
+        risks.append({
+            "type": "GPA",
+            "severity": "medium",
+            "message": f"Your GPA ({gpa:.2f}) is close to the minimum. A higher GPA improves your chances.",
+            "source": requirements["source_url"]
+        })
+
+    if total_units < requirements["min_units"]:
+        risks.append({
+            "type": "Units",
+            "severity": "high",
+            "message": f"You have {total_units} units but need at least {requirements['min_units']} to transfer",
+            "source": requirements["source_url"]
+        })
+
+    if total_units > requirements["max_units"]:
+        risks.append({
+            "type": "Units",
+            "severity": "medium",
+            "message": f"You have {total_units} units which exceeds the {requirements['max_units']} unit cap. Some units may not transfer.",
+            "source": requirements["source_url"]
+        })
+
+    # Missing major prep courses
+    missing_major_prep = major_status["missing"]
+    if missing_major_prep:
+        risks.append({
+            "type": "Major Prep",
+            "severity": "high",
+            "message": f"You are missing {len(missing_major_prep)} required major preparation course(s)",
+            "source": "https://assist.org"
+        })
+
+    # Missing IGETC areas
+    missing_igetc = [area for area, info in igetc_status.items()
+                    if info["required"] and not info["completed"]]
+    if missing_igetc:
+        risks.append({
+            "type": "IGETC",
+            "severity": "medium",
+            "message": f"IGETC areas not yet satisfied: {', '.join(missing_igetc)}",
+            "source": "https://assist.org/transfer/institution/113/115"
+        })
+
+    # Overall eligibility determination
+    major_prep_complete = len(missing_major_prep) == 0
+    units_ok = requirements["min_units"] <= total_units <= requirements["max_units"]
+    gpa_ok = gpa >= requirements["min_gpa"]
+
+    if major_prep_complete and units_ok and gpa_ok:
+        eligibility_status = "likely_eligible"
+        eligibility_message = "Based on official requirements, you appear to meet the basic transfer eligibility criteria."
+    elif gpa_ok and units_ok:
+        eligibility_status = "conditional"
+        eligibility_message = "You meet some requirements but have missing coursework. Complete the missing courses before applying."
+    else:
+        eligibility_status = "not_yet_eligible"
+        eligibility_message = "You do not yet meet the transfer requirements. See the issues below."
+
+    # Build the result
+    result = {
+        "eligibility_status": eligibility_status,
+        "eligibility_message": eligibility_message,
+        "summary": {
+            "total_units": total_units,
+            "gpa": round(gpa, 2),
+            "min_gpa_required": requirements["min_gpa"],
+            "units_range": f"{requirements['min_units']}-{requirements['max_units']}",
+            "major": major,
+            "target_uc": "UC Santa Cruz",
+        },
+        "major_requirements": major_status,
+        "igetc_status": igetc_status,
+        "risks": risks,
+        "notes": requirements["notes"],
+        "sources": {
+            "ucsc_transfer": requirements["source_url"],
+            "assist_org": f"https://assist.org/transfer/institution/113/115",
+            "igetc": "https://assist.org/transfer/igetc",
+        },
+        "disclaimer": "This is a verification tool using official sources. It is NOT official advice. Always confirm with an academic counselor before making decisions."
+    }
+
+    return result
+
+
+def batch_verification_results(
+    catalog: Catalog,
+    transcripts: List[List[Dict]],
+    colleges: List[str],
+    majors: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    verification_result for many transcripts at once. GPA, units, major
+    prep and IGETC coverage are computed column-wise by
+    EligibilityChecker.run_batch_verification; every major must be a
+    UCSC major in the catalog. Students with the same major prep outcome
+    share that (read-only) part of their results, as in the checker
+    """
+    requirements = catalog.campus_requirements("UCSC")
+    # Keyed by the checker's shared major prep payload for the outcome
+    major_statuses: Dict[int, Dict[str, List[Dict]]] = {}
+
+    def assemble(major: str, gpa: float, total_units: float, payload: Dict, igetc_status: Dict) -> Dict[str, Any]:
+        major_status = major_statuses.get(id(payload))
+        if major_status is None:
+            plan = catalog.plans[("UCSC", major)]
+            matched = {m["requirement"]: m["matched_course"] for m in payload["completed"]}
+            major_status = major_requirements(plan, [matched.get(slot.name) for slot in plan.slots])
+            major_statuses[id(payload)] = major_status
+        return verification_result(requirements[major], major, gpa, total_units, major_status, igetc_status)
+
+    return catalog.checker("UCSC").run_batch_verification(transcripts, colleges, majors, assemble=assemble)
@@ -0,0 +1,116 @@
+"""
+Verification Index
+Reverse index from catalog entries to the students whose stored
+verification results were computed from them, so a catalog change only
+re-verifies the students it can affect
+"""
+
+from typing import Dict, Set, Tuple, FrozenSet, Iterable, Any
+from dataclasses import dataclass, field
+import threading
+
+from app.services.catalog import Catalog
+from app.services.requirement_plan import normalize_course_code
+
+
+@dataclass
+class CatalogChange:
+    """
+    Catalog entries that differ between two snapshots, limited to what a
+    verification reads: the IGETC areas of (college, course code) pairs and
+    the requirements of (campus, major) plans
+    """
+    courses: Set[Tuple[str, str]] = field(default_factory=set)
+    plans: Set[Tuple[str, str]] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.courses or self.plans)
+
+
+def catalog_changes(old: Catalog, new: Catalog) -> CatalogChange:
+    """Diff two snapshots (IGETC masks per college course, requirements per plan)"""
+    change = CatalogChange()
+    for college in old.igetc_masks.keys() | new.igetc_masks.keys():
+        before = old.igetc_masks.get(college, {})
+        after = new.igetc_masks.get(college, {})
+        if before == after:
+            continue
+        for code in before.keys() | after.keys():
+            if before.get(code, 0) != after.get(code, 0):
+                change.courses.add((college, code))
+
+    for campus in old.requirements.keys() | new.requirements.keys():
+        before = old.requirements.get(campus, {})
+        after = new.requirements.get(campus, {})
+        for major in before.keys() | after.keys():
+            if before.get(major) != after.get(major):
+                change.plans.add((campus, major))
+    return change
+
+
+class VerificationIndex:
+    """
+    (college, course code) -> emails and (campus, major) -> emails, for
+    students with a stored verification result. Each student is indexed
+    under the plan they were verified against and every course on their
+    transcript; recording a student again replaces their old entries.
+    """
+
+    def __init__(self):
+        self._courses: Dict[Tuple[str, str], Set[str]] = {}
+        self._plans: Dict[Tuple[str, str], Set[str]] = {}
+        self._entries: Dict[str, Tuple[Tuple[str, str], FrozenSet[Tuple[str, str]]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, email: str, college: str, campus: str, major: str, course_codes: Iterable[str]) -> bool:
+        """Index a student's latest verification inputs; False if unchanged"""
+        plan = (campus, major)
+        courses = frozenset((college, normalize_course_code(code)) for code in course_codes)
+        with self._lock:
+            previous = self._entries.get(email)
+            if previous == (plan, courses):
+                return False
+            if previous is not None:
+                self._unlink(email, *previous)
+            self._entries[email] = (plan, courses)
+            self._plans.setdefault(plan, set()).add(email)
+            for key in courses:
+                self._courses.setdefault(key, set()).add(email)
+        return True
+
+    def discard(self, email: str) -> None:
+        """Drop a student from the index"""
+        with self._lock:
+            previous = self._entries.pop(email, None)
+            if previous is not None:
+                self._unlink(email, *previous)
+
+    def _unlink(self, email: str, plan: Tuple[str, str], courses: FrozenSet[Tuple[str, str]]) -> None:
+        for index, keys in ((self._plans, (plan,)), (self._courses, courses)):
+            for key in keys:
+                emails = index.get(key)
+                if emails is not None:
+                    emails.discard(email)
+                    if not emails:
+                        del index[key]
+
+    def affected(self, change: CatalogChange) -> Set[str]:
+        """Students whose stored results could differ after `change`"""
+        emails: Set[str] = set()
+        with self._lock:
+            for key in change.plans:
+                emails |= self._plans.get(key, set())
+            for key in change.courses:
+                emails |= self._courses.get(key, set())
+        return emails
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "plans": len(self._plans),
+                "courses": len(self._courses),
+            }
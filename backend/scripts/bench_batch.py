@@ -0,0 +1,74 @@
+"""
+Batch Verification Benchmark
+Measures transcripts/second for EligibilityChecker.run_batch_verification
+against the per-student run_full_verification loop.
+
+Usage (from backend/):
+    python -m scripts.bench_batch --students 20000
+"""
+
+import argparse
+import random
+import time
+
+from app.catalog_data import UCSC_REQUIREMENTS, ASSIST_EQUIVALENCIES
+from app.services.eligibility import EligibilityChecker
+
+
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "D", "F", "P"]
+EXTRA_CODES = ["HIST 17A", "PSYCH 1", "STAT 1", "CS 18", "MATH 21", "ART 1", "SPAN 1"]
+
+
+def make_cohort(students: int, max_courses: int, seed: int):
+    """Generate synthetic transcripts drawn from the mock catalog"""
+    rng = random.Random(seed)
+    colleges = list(ASSIST_EQUIVALENCIES)
+    majors = list(UCSC_REQUIREMENTS)
+
+    transcripts, student_colleges, student_majors = [], [], []
+    for _ in range(students):
+        college = rng.choice(colleges)
+        codes = list(ASSIST_EQUIVALENCIES[college]) + EXTRA_CODES
+        transcripts.append([
+            {
+                "course_code": rng.choice(codes),
+                "units": rng.choice([3, 4, 4.5, 5]),
+                "grade": rng.choice(GRADES),
+            }
+            for _ in range(rng.randint(5, max_courses))
+        ])
+        student_colleges.append(college)
+        student_majors.append(rng.choice(majors))
+    return transcripts, student_colleges, student_majors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--max-courses", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    checker = EligibilityChecker(UCSC_REQUIREMENTS, ASSIST_EQUIVALENCIES)
+    transcripts, colleges, majors = make_cohort(args.students, args.max_courses, args.seed)
+
+    start = time.perf_counter()
+    batch_results = checker.run_batch_verification(transcripts, colleges, majors)
+    batch_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single_results = [
+        checker.run_full_verification(t, c, m)
+        for t, c, m in zip(transcripts, colleges, majors)
+    ]
+    single_elapsed = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(batch_results, single_results) if a != b)
+    print(f"students:      {args.students}")
+    print(f"batch:         {args.students / batch_elapsed:,.0f} transcripts/s")
+    print(f"per-student:   {args.students / single_elapsed:,.0f} transcripts/s")
+    print(f"mismatches:    {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Storage Backend Benchmark
+Times the user repository operations (create, get, get_many, transcript
+upload, single-course edit) for the SQL and/or Firestore backends.
+
+Usage (from backend/):
+    DATABASE_URL=sqlite:///./bench.db python -m scripts.bench_storage --backend sql
+    python -m scripts.bench_storage --backend sql --backend firestore --users 500
+
+The Firestore backend uses the default credentials (or FIRESTORE_EMULATOR_HOST).
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from app.catalog_data import ASSIST_EQUIVALENCIES
+from app.db.repository import UserRepository, field_path
+
+
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "P"]
+
+
+def make_repository(backend: str) -> UserRepository:
+    if backend == "sql":
+        from app.db.database import SessionLocal, init_db
+        from app.db.sql_repository import SqlUserRepository
+        init_db()
+        return SqlUserRepository(SessionLocal)
+
+    import firebase_admin
+    from firebase_admin import firestore
+    from app.db.firestore_repository import FirestoreUserRepository
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    return FirestoreUserRepository(firestore.client(), collection="bench_users")
+
+
+def make_transcript(rng: random.Random, college: str, courses: int):
+    codes = list(ASSIST_EQUIVALENCIES[college])
+    return [
+        {
+            "course_code": rng.choice(codes),
+            "course_name": "Benchmark course",
+            "units": rng.choice([3, 4, 4.5, 5]),
+            "grade": rng.choice(GRADES),
+            "semester": f"Term {i}",
+        }
+        for i in range(courses)
+    ]
+
+
+async def timed(label: str, ops: int, calls, concurrency: int):
+    """Run coroutine factories with bounded concurrency and print ops/s"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(call):
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(call) for call in calls))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<16} {ops:>7} ops  {elapsed:8.3f}s  {ops / elapsed:10.0f} ops/s")
+
+
+async def bench(backend: str, args) -> None:
+    repo = make_repository(backend)
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.users)]
+    colleges = {email: rng.choice(list(ASSIST_EQUIVALENCIES)) for email in emails}
+    transcripts = {
+        email: make_transcript(rng, colleges[email], args.courses) for email in emails
+    }
+
+    print(f"{backend}: {args.users} users, {args.courses} courses each")
+
+    await timed("create", len(emails), [
+        (lambda e=email: repo.create(e, {
+            "email": e,
+            "name": "Bench",
+            "major": "Computer Science",
+            "community_college": colleges[e],
+            "transcript": [],
+            "target_uc": "UCSC",
+            "target_major": "Computer Science",
+            "verification_results": None,
+        }))
+        for email in emails
+    ], args.concurrency)
+
+    await timed("upload", len(emails), [
+        (lambda e=email: repo.update(e, {
+            "transcript": transcripts[e],
+            "transcript_stats": {"total_units": sum(c["units"] for c in transcripts[e])},
+        }))
+        for email in emails
+    ], args.concurrency)
+
+    await timed("get", len(emails), [
+        (lambda e=email: repo.get(e)) for email in emails
+    ], args.concurrency)
+
+    chunks = [emails[i:i + 100] for i in range(0, len(emails), 100)]
+    await timed("get_many(100)", len(emails), [
+        (lambda c=chunk: repo.get_many(c)) for chunk in chunks
+    ], args.concurrency)
+
+    def edit(email):
+        removed = transcripts[email][0]
+        added = dict(removed, grade="A", semester="Retake")
+        return repo.edit_transcript(
+            email,
+            remove=[removed],
+            add=[added],
+            fields={field_path("transcript_stats", "total_units"): args.courses * 4},
+        )
+
+    await timed("edit_transcript", len(emails), [
+        (lambda e=email: edit(e)) for email in emails
+    ], args.concurrency)
+
+    repo.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", action="append", choices=["sql", "firestore"])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for backend in args.backend or ["sql"]:
+        asyncio.run(bench(backend, args))
+
+
+if __name__ == "__main__":
+    main()
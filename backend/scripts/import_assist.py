@@ -0,0 +1,121 @@
+"""
+Assist.org Articulation Import
+Streams a JSONL or CSV articulation dump (optionally .gz) into the
+course_equivalencies table of DATABASE_URL, upserting on
+(community_college, cc_course_code, uc_campus). Running servers pick the
+new rows up on their next catalog refresh.
+
+Usage (from backend/):
+    python -m scripts.import_assist dumps/assist-2026.jsonl.gz
+    python -m scripts.import_assist --make-fixture /tmp/assist.jsonl --rows 1000000
+    python -m scripts.import_assist /tmp/assist.jsonl --batch-size 10000
+
+Dump fields: community_college, cc_course_code, uc_campus, uc_course_code,
+units, igetc_areas (list or "2;5A"), and optional cc_course_name,
+uc_course_name, source_url, prerequisites (list or "MATH 1A;MATH 1B").
+Records missing a required field, with non-numeric units or an unknown
+IGETC area, and malformed JSONL lines, are skipped and counted.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import random
+import sys
+import time
+
+from app.db.assist_import import ImportStats, dump_format, import_dump
+
+
+UC_CAMPUSES = ["UCB", "UCD", "UCI", "UCLA", "UCM", "UCR", "UCSB", "UCSC", "UCSD"]
+SUBJECTS = ["MATH", "CS", "CIS", "PHYS", "CHEM", "BIOL", "ENGL", "HIST", "PSYC", "ECON"]
+IGETC = ["", "1A", "1B", "2", "3A", "3B", "4", "5A", "5B", "5C", "6A", "7", "2;5A", "5A;5C"]
+FIELDS = [
+    "community_college", "cc_course_code", "cc_course_name", "uc_campus",
+    "uc_course_code", "uc_course_name", "units", "igetc_areas", "source_url",
+]
+
+
+def make_fixture(path: str, rows: int, colleges: int, seed: int) -> None:
+    """Write a synthetic dump (every college x every campus) for offline runs"""
+    rng = random.Random(seed)
+    fmt = dump_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    courses_per_pair = max(1, rows // (colleges * len(UC_CAMPUSES)))
+
+    with opener(path, "wt", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=FIELDS) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        written = 0
+        for college in range(colleges):
+            for campus in UC_CAMPUSES:
+                for course in range(courses_per_pair):
+                    if written >= rows:
+                        return
+                    subject = SUBJECTS[course % len(SUBJECTS)]
+                    record = {
+                        "community_college": f"Community College {college:03d}",
+                        "cc_course_code": f"{subject} {course // len(SUBJECTS) + 1}",
+                        "cc_course_name": f"{subject} course {course}",
+                        "uc_campus": campus,
+                        "uc_course_code": f"{subject} {rng.randint(1, 199)}",
+                        "uc_course_name": None,
+                        "units": rng.choice([3, 4, 4.5, 5]),
+                        "igetc_areas": rng.choice(IGETC),
+                        "source_url": "https://assist.org",
+                    }
+                    if writer:
+                        writer.writerow(record)
+                    else:
+                        record["igetc_areas"] = [a for a in record["igetc_areas"].split(";") if a]
+                        out.write(json.dumps(record) + "\n")
+                    written += 1
+
+
+def report(stats: ImportStats) -> None:
+    print(
+        f"  {stats.written:>10,} rows  {stats.skipped:>7,} skipped  "
+        f"{stats.elapsed:8.1f}s  {stats.rows_per_second:10,.0f} rows/s",
+        file=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="dump to import (.jsonl, .csv, optionally .gz)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--progress-every", type=int, default=100000)
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--make-fixture", action="store_true", help="write a synthetic dump to PATH instead")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--colleges", type=int, default=116)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.make_fixture:
+        start = time.perf_counter()
+        make_fixture(args.path, args.rows, args.colleges, args.seed)
+        print(f"wrote {args.path} in {time.perf_counter() - start:.1f}s")
+        return
+
+    # Imported late so --make-fixture needs no database
+    from app.db.database import SessionLocal, init_db
+    init_db()
+
+    stats = import_dump(
+        SessionLocal,
+        args.path,
+        batch_size=args.batch_size,
+        fmt=args.format,
+        progress=report,
+        progress_every=args.progress_every,
+    )
+    report(stats)
+    print(f"imported {stats.written:,} of {stats.read:,} rows in {stats.batches} batches "
+          f"({stats.rows_per_second:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Student Roster Import
+Registers a partner college's students (and their transcripts) from a
+JSONL or CSV roster (optionally .gz) into the configured user storage,
+with batched writes. Existing users are skipped; every rejected row is
+reported. Transcript aggregates are built on each student's first
+verification.
+
+Usage (from backend/):
+    STORAGE_BACKEND=sql python -m scripts.import_roster rosters/deanza.jsonl
+    python -m scripts.import_roster --make-fixture /tmp/roster.csv --students 5000
+    python -m scripts.import_roster /tmp/roster.csv --chunk-size 500 --concurrency 8 --errors /tmp/errors.jsonl
+
+JSONL: one student per line (email, name, major, community_college,
+optional target_uc, target_major, and a `courses` list of course_code,
+course_name, units, grade, semester). CSV: one course per line with the
+student columns repeated; a student's lines must be consecutive.
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import random
+import time
+
+from app.catalog_data import ASSIST_EQUIVALENCIES
+from app.db.assist_import import dump_format, open_dump
+from app.db.repository import COURSE_FIELDS
+from app.services.roster_import import STUDENT_FIELDS, import_roster
+
+
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "P"]
+
+
+def make_fixture(path: str, students: int, courses: int, seed: int) -> None:
+    """Write a synthetic roster, with a few invalid rows, for offline runs"""
+    rng = random.Random(seed)
+    fmt = dump_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    colleges = list(ASSIST_EQUIVALENCIES)
+
+    with opener(path, "wt", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=list(STUDENT_FIELDS + COURSE_FIELDS)) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for i in range(students):
+            college = rng.choice(colleges)
+            student = {
+                "email": f"student{i}@example.com" if i % 1000 != 999 else f"not-an-email-{i}",
+                "name": f"Student {i}",
+                "major": "Computer Science",
+                "community_college": college,
+                "target_uc": "UCSC",
+                "target_major": "Computer Science",
+            }
+            transcript = [
+                {
+                    "course_code": rng.choice(list(ASSIST_EQUIVALENCIES[college])),
+                    "course_name": "Roster course",
+                    "units": rng.choice([3, 4, 4.5, 5]),
+                    "grade": rng.choice(GRADES),
+                    "semester": f"Term {term}",
+                }
+                for term in range(rng.randint(0, courses))
+            ]
+            if writer:
+                for course in transcript or [{}]:
+                    writer.writerow({**student, **course})
+            else:
+                out.write(json.dumps({**student, "courses": transcript}) + "\n")
+
+
+def make_repository(backend: str):
+    if backend == "sql":
+        from app.db.database import SessionLocal, init_db
+        from app.db.sql_repository import SqlUserRepository
+        init_db()
+        return SqlUserRepository(SessionLocal)
+
+    import firebase_admin
+    from firebase_admin import firestore
+    from app.db.firestore_repository import FirestoreUserRepository
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    return FirestoreUserRepository(firestore.client())
+
+
+async def run(args) -> None:
+    repo = make_repository(args.backend)
+    try:
+        with open_dump(args.path) as stream:
+            report = await import_roster(
+                repo,
+                stream,
+                args.format or dump_format(args.path),
+                chunk_size=args.chunk_size,
+                concurrency=args.concurrency,
+            )
+    finally:
+        repo.close()
+
+    summary = report.to_dict()
+    errors = summary.pop("errors")
+    print(
+        f"read {summary['read']:,} students: {summary['created']:,} created, "
+        f"{summary['existing']:,} existing, {summary['invalid']:,} invalid "
+        f"in {summary['elapsed_ms'] / 1000:.1f}s ({summary['rows_per_second']:,} students/s)"
+    )
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8") as out:
+            for error in errors:
+                out.write(json.dumps(error) + "\n")
+        print(f"wrote {len(errors):,} row errors to {args.errors}")
+    else:
+        for error in errors[:20]:
+            print(f"  row {error['row']}: {error['email']}: {error['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="roster to import (.jsonl, .csv, optionally .gz)")
+    parser.add_argument("--backend", choices=["sql", "firestore"], default=os.getenv("STORAGE_BACKEND", "firestore").lower())
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--errors", help="write every row error to this JSONL file")
+    parser.add_argument("--make-fixture", action="store_true", help="write a synthetic roster to PATH instead")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--courses", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.make_fixture:
+        start = time.perf_counter()
+        make_fixture(args.path, args.students, args.courses, args.seed)
+        print(f"wrote {args.path} in {time.perf_counter() - start:.1f}s")
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+LLM Stub Server
+A local OpenAI-compatible `/v1/chat/completions` endpoint that answers
+with a canned summary after a configurable delay, so the explanation
+service can be developed and load-tested without a model or API key.
+Requests with `"stream": true` get server-sent-event chunks, one word
+every `--token-ms`. `GET /stats` returns the number of completions served.
+
+Usage (from backend/):
+    python -m scripts.llm_stub_server --port 8089 --latency-ms 800 --jitter-ms 400 --token-ms 20
+    LLM_BACKEND=http LLM_BASE_URL=http://localhost:8089/v1 uvicorn app.main:app
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import threading
+import time
+
+from app.services.llm import StubLLMBackend
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+    served = 0
+    lock = threading.Lock()
+    backend = StubLLMBackend()
+
+    def _event(self, body: dict) -> None:
+        self.wfile.write(b"data: " + json.dumps(body).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+    def _stream(self, messages: dict, model: str) -> None:
+        """Send the completion as SSE chunks; the connection closes after [DONE]"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        completion = self.backend.stream(
+            messages.get("system", ""), messages.get("user", ""), model, 0,
+            lambda text: self._event({"model": model, "choices": [{"index": 0, "delta": {"content": text}}]}),
+        )
+        self._event({
+            "model": completion.model,
+            "choices": [],
+            "usage": {
+                "prompt_tokens": completion.prompt_tokens,
+                "completion_tokens": completion.completion_tokens,
+                "total_tokens": completion.prompt_tokens + completion.completion_tokens,
+            },
+        })
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, {"completions": StubHandler.served})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": "not found"})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = {message["role"]: message["content"] for message in request.get("messages", [])}
+        time.sleep(self.latency_seconds + random.uniform(0, self.jitter_seconds))
+
+        if request.get("stream"):
+            self._stream(messages, request.get("model", "stub"))
+            with StubHandler.lock:
+                StubHandler.served += 1
+            return
+        completion = self.backend.complete(
+            messages.get("system", ""), messages.get("user", ""), request.get("model", "stub"), 0
+        )
+        with StubHandler.lock:
+            StubHandler.served += 1
+        self._send(200, {
+            "model": completion.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": completion.text}}],
+            "usage": {
+                "prompt_tokens": completion.prompt_tokens,
+                "completion_tokens": completion.completion_tokens,
+                "total_tokens": completion.prompt_tokens + completion.completion_tokens,
+            },
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--token-ms", type=float, default=20, help="delay between streamed words")
+    args = parser.parse_args()
+
+    StubHandler.latency_seconds = args.latency_ms / 1000
+    StubHandler.jitter_seconds = args.jitter_ms / 1000
+    StubHandler.backend = StubLLMBackend(token_seconds=args.token_ms / 1000)
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Verify Endpoint Load Test
+Fires concurrent POST /api/verify/{email} requests against a running
+server and compares the wall time with the single-request latency.
+If handlers serialize on blocking Firestore calls, N concurrent requests
+take about N times as long as one; otherwise they overlap.
+
+Usage (server running on localhost:8000):
+    python -m scripts.loadtest_verify --users 20 --setup
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+DEMO_COURSES = [
+    {"course_code": "MATH 1A", "course_name": "Calculus I", "units": 5, "grade": "A", "semester": "Fall 2024"},
+    {"course_code": "MATH 1B", "course_name": "Calculus II", "units": 5, "grade": "B+", "semester": "Winter 2025"},
+    {"course_code": "CIS 22A", "course_name": "Programming in C++", "units": 4.5, "grade": "A-", "semester": "Fall 2024"},
+    {"course_code": "EWRT 1A", "course_name": "Composition", "units": 5, "grade": "B", "semester": "Fall 2024"},
+    {"course_code": "PHYS 4A", "course_name": "Mechanics", "units": 5, "grade": "B", "semester": "Spring 2025"},
+]
+
+
+def setup_users(base_url: str, emails):
+    """Register demo users with a target UC and transcript"""
+    for email in emails:
+        requests.post(f"{base_url}/api/auth/register", json={
+            "email": email,
+            "name": "Load Test",
+            "major": "Computer Science",
+            "community_college": "De Anza College",
+        })
+        requests.post(f"{base_url}/api/select-uc", json={
+            "user_email": email,
+            "target_uc": "UCSC",
+            "target_major": "Computer Science",
+        }).raise_for_status()
+        requests.post(f"{base_url}/api/transcript/upload", json={
+            "user_email": email,
+            "courses": DEMO_COURSES,
+        }).raise_for_status()
+
+
+def verify(base_url: str, email: str) -> float:
+    """Run one verification and return its latency in seconds"""
+    start = time.perf_counter()
+    requests.post(f"{base_url}/api/verify/{email}").raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--setup", action="store_true", help="register the load test users first")
+    args = parser.parse_args()
+
+    emails = [f"loadtest+{i}@example.com" for i in range(args.users)]
+    if args.setup:
+        setup_users(args.base_url, emails)
+
+    # Warm up, then measure uncontended latency
+    verify(args.base_url, emails[0])
+    single = statistics.median(verify(args.base_url, emails[0]) for _ in range(5))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        latencies = list(pool.map(lambda email: verify(args.base_url, email), emails))
+    wall = time.perf_counter() - start
+
+    print(f"requests:            {args.users}")
+    print(f"single latency:      {single * 1000:.1f} ms")
+    print(f"concurrent wall:     {wall * 1000:.1f} ms")
+    print(f"p50 / max latency:   {statistics.median(latencies) * 1000:.1f} / {max(latencies) * 1000:.1f} ms")
+    print(f"serialized estimate: {single * args.users * 1000:.1f} ms")
+    print(f"overlap factor:      {single * args.users / wall:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Firestore Layout Migration
+Moves each `users/{email}` document's `transcript` array and
+`verification_results` blob into the `transcript` and `results`
+subcollections read by FirestoreUserRepository, then deletes both fields
+from the user document. Documents keyed by Firebase uid (written by the
+frontend, no '@' in the id) are left alone. Safe to re-run.
+
+Also reports Firestore bytes read per endpoint before and after the
+split, using Firestore's documented storage size rules.
+
+Usage (from backend/):
+    python -m scripts.migrate_firestore_layout --dry-run
+    python -m scripts.migrate_firestore_layout --batch-size 400
+    DATABASE_URL=sqlite:///./uc_transfer.db python -m scripts.migrate_firestore_layout --estimate
+
+--estimate sizes the user documents of the SQL store instead of
+Firestore (same document shape) and writes nothing.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import datetime
+
+from app.db.firestore_repository import BATCH_LIMIT, RESULTS, SUBCOLLECTION_FIELDS, TRANSCRIPT, commit_writes, course_id
+
+
+# Mirrors of the projections in app.main
+PROFILE_FIELDS = ["email", "name", "major", "community_college", "created_at", "target_uc", "target_major"]
+STATS_FIELDS = ["major", "community_college", "target_uc", "target_major", "verification_key", "transcript_stats"]
+
+
+# ---------- Firestore storage size ----------
+
+def value_size(value: Any) -> int:
+    """Stored size of a field value (strings are UTF-8 bytes + 1)"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime.datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(value_size(key) + value_size(item) for key, item in value.items())
+    return value_size(str(value))
+
+
+def document_size(path: List[str], data: Dict[str, Any]) -> int:
+    """Stored size of a document: name + fields + 32 bytes"""
+    name = sum(value_size(segment) for segment in path) + 16
+    return name + value_size(data) + 32
+
+
+def project(data: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    return {name: data[name] for name in fields if name in data}
+
+
+# ---------- before/after read sizes ----------
+
+def split_user(email: str, data: Dict[str, Any]) -> Tuple[Dict, List[Tuple[str, Dict]], Optional[Dict]]:
+    """The new user document, course documents and latest result document"""
+    user = {name: value for name, value in data.items() if name not in SUBCOLLECTION_FIELDS}
+    courses = [
+        (course_id(None, position), {**course, "email": email, "position": position})
+        for position, course in enumerate(data.get("transcript") or [])
+    ]
+    result = None
+    if data.get("verification_results"):
+        result = {
+            "result": data["verification_results"],
+            "verification_key": data.get("verification_key"),
+            "created_at": datetime.datetime.utcnow(),
+        }
+    return user, courses, result
+
+
+def endpoint_reads(email: str, data: Dict[str, Any]) -> Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Endpoint -> ((documents, bytes) before, (documents, bytes) after).
+    Before, every endpoint read the whole user document (update_user twice)
+    """
+    path = ["users", email]
+    full = document_size(path, data)
+    user, courses, result = split_user(email, data)
+
+    def reads(fields: Optional[List[str]]) -> Tuple[int, int]:
+        return 1, document_size(path, {} if fields is None else project(user, fields))
+
+    course_bytes = sum(document_size(path + [TRANSCRIPT, doc_id], doc) for doc_id, doc in courses)
+    transcript = (1 + len(courses), reads(None)[1] + course_bytes)
+    with_courses = (1 + len(courses), reads(STATS_FIELDS)[1] + course_bytes)
+    results = (2, reads(None)[1] + document_size(path + [RESULTS, "x" * 20], project(result or {}, ["result"])))
+
+    return {
+        "GET /api/auth/user/{email}": ((1, full), reads(PROFILE_FIELDS)),
+        "PUT /api/auth/user/{email}": ((2, 2 * full), reads(PROFILE_FIELDS)),
+        "POST /api/select-uc": ((1, full), reads(None)),
+        "POST /api/transcript/upload": ((1, full), reads(STATS_FIELDS)),
+        "GET /api/transcript/{email}": ((1, full), transcript),
+        "POST /api/transcript/{email}/courses": ((1, full), with_courses),
+        "POST /api/verify/{email}": ((1, full), reads(STATS_FIELDS)),
+        "POST /api/verify/{email}/matrix": ((1, full), reads(STATS_FIELDS)),
+        "GET /api/recommendations/{email}": ((1, full), reads(STATS_FIELDS)),
+        "GET /api/planner/{email}": ((1, full), reads(STATS_FIELDS)),
+        "GET /api/results/{email}": ((1, full), results),
+    }
+
+
+def report(users: Dict[str, Dict[str, Any]]) -> None:
+    """Average documents and bytes read per request, per endpoint"""
+    if not users:
+        print("No user documents to size")
+        return
+    totals: Dict[str, List[int]] = {}
+    for email, data in users.items():
+        for endpoint, ((docs_before, bytes_before), (docs_after, bytes_after)) in endpoint_reads(email, data).items():
+            total = totals.setdefault(endpoint, [0, 0, 0, 0])
+            for i, value in enumerate((docs_before, bytes_before, docs_after, bytes_after)):
+                total[i] += value
+
+    count = len(users)
+    print(f"Average reads per request over {count} users (documents / bytes):")
+    print(f"  {'endpoint':<38} {'before':>14} {'after':>14} {'bytes':>7}")
+    for endpoint, (docs_before, bytes_before, docs_after, bytes_after) in totals.items():
+        change = (bytes_after - bytes_before) / bytes_before * 100
+        print(
+            f"  {endpoint:<38} {docs_before / count:>4.0f} / {bytes_before / count:>7.0f}"
+            f" {docs_after / count:>4.0f} / {bytes_after / count:>7.0f} {change:>+6.0f}%"
+        )
+
+
+# ---------- migration ----------
+
+def migrate(client, collection: str, batch_size: int, dry_run: bool) -> Dict[str, Dict[str, Any]]:
+    """Split every old-layout user document; returns them as they were"""
+    from firebase_admin import firestore
+
+    migrated: Dict[str, Dict[str, Any]] = {}
+    batch_size = min(batch_size, BATCH_LIMIT)
+    pending: List[Tuple] = []
+    for doc in client.collection(collection).stream():
+        data = doc.to_dict() or {}
+        if "@" not in doc.id or not any(name in data for name in SUBCOLLECTION_FIELDS):
+            continue
+        migrated[doc.id] = data
+        if dry_run:
+            continue
+
+        _, courses, result = split_user(doc.id, data)
+        ref = doc.reference
+        pending.extend(("set", ref.collection(TRANSCRIPT).document(doc_id), course) for doc_id, course in courses)
+        if result is not None:
+            result["created_at"] = firestore.SERVER_TIMESTAMP
+            pending.append(("set", ref.collection(RESULTS).document(), result))
+        # Batches commit in order, so the fields are only deleted once
+        # their copies are written (a user may span several batches)
+        pending.append(("update", ref, {name: firestore.DELETE_FIELD for name in SUBCOLLECTION_FIELDS if name in data}))
+        if len(pending) >= batch_size:
+            full = len(pending) - len(pending) % batch_size
+            commit_writes(client, pending[:full], batch_size)
+            del pending[:full]
+    commit_writes(client, pending, batch_size)
+    return migrated
+
+
+async def sql_users() -> Dict[str, Dict[str, Any]]:
+    from sqlalchemy import select
+    from app.db.database import SessionLocal
+    from app.db.sql_repository import SqlUserRepository
+    from app.models.models import User
+
+    with SessionLocal() as session:
+        emails = list(session.execute(select(User.email)).scalars())
+    repo = SqlUserRepository(SessionLocal)
+    try:
+        found = await repo.get_many(emails) if emails else {}
+    finally:
+        repo.close()
+    # Stored like the old layout: no empty results field, no SQL-only nulls
+    return {
+        email: {name: value for name, value in data.items() if value is not None}
+        for email, data in found.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="users")
+    parser.add_argument("--batch-size", type=int, default=400, help="writes per batch (at most 500, Firestore's limit)")
+    parser.add_argument("--dry-run", action="store_true", help="report without writing")
+    parser.add_argument("--estimate", action="store_true", help="size SQL-store users instead of Firestore")
+    args = parser.parse_args()
+
+    if args.estimate:
+        report(asyncio.run(sql_users()))
+        return
+
+    import firebase_admin
+    from firebase_admin import firestore
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    migrated = migrate(firestore.client(), args.collection, args.batch_size, args.dry_run)
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {len(migrated)} user documents")
+    report(migrated)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Cohort Summaries
+Writes an LLM summary for every student in a roster (the JSONL/CSV format
+of scripts/import_roster.py, optionally .gz), using the same prompts,
+model and cache settings as GET /api/explain. Identical prompts are sent
+once and several students are packed into each call; calls stay within
+--rpm/--tpm. Finished summaries are checkpointed, so rerunning a killed
+run only summarizes the rest.
+
+Usage (from backend/):
+    python -m scripts.llm_stub_server --latency-ms 800 &
+    python -m scripts.summarize_cohort rosters/deanza.csv --out summaries.jsonl --pack 8 --concurrency 4 --rpm 500 --tpm 200000
+    LLM_BACKEND=stub python -m scripts.summarize_cohort /tmp/roster.csv --out /tmp/summaries.jsonl
+    STORAGE_BACKEND=sql python -m scripts.summarize_cohort rosters/deanza.csv --from-storage --out summaries.jsonl
+
+The checkpoint defaults to OUT.checkpoint; delete it to summarize again
+from scratch.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from app.db.assist_import import dump_format, open_dump
+from app.services.cohort_summaries import RateBudget, summarize_cohort
+from app.services.llm import ExplanationService, create_llm_backend
+from app.services.result_cache import ResultCache
+from app.services.roster_import import read_roster
+from app.services.shared_cache import TieredCache, create_shared_tier
+
+
+PROFILE_FIELDS = ["email", "name", "major", "community_college", "target_uc", "target_major"]
+STORAGE_CHUNK = 500
+
+
+def make_repository(backend: str):
+    if backend == "sql":
+        from app.db.database import SessionLocal
+        from app.db.sql_repository import SqlUserRepository
+        return SqlUserRepository(SessionLocal)
+
+    import firebase_admin
+    from firebase_admin import firestore
+    from app.db.firestore_repository import FirestoreUserRepository
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app()
+    return FirestoreUserRepository(firestore.client())
+
+
+async def load_students(args):
+    """Roster records, or (--from-storage) the stored profiles of the roster's emails"""
+    with open_dump(args.path) as stream:
+        students = [
+            record for _, record in read_roster(stream, args.format or dump_format(args.path))
+            if record.get("email")
+        ]
+    if not args.from_storage:
+        return students
+
+    repo = make_repository(args.backend)
+    try:
+        emails = [student["email"] for student in students]
+        profiles = {}
+        for start in range(0, len(emails), STORAGE_CHUNK):
+            profiles.update(await repo.get_many(emails[start:start + STORAGE_CHUNK], PROFILE_FIELDS))
+    finally:
+        repo.close()
+    missing = len(emails) - len(profiles)
+    if missing:
+        print(f"skipping {missing:,} students not in storage")
+    return [{**profiles[email], "email": email} for email in emails if email in profiles]
+
+
+async def run(args) -> None:
+    students = await load_students(args)
+    service = ExplanationService(
+        create_llm_backend(os.getenv("LLM_BACKEND", "http").lower()),
+        model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+        cache=TieredCache("llm", ResultCache(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "4096")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        ), create_shared_tier(os.getenv("CACHE_BACKEND", "memory").lower())),
+        max_tokens=int(os.getenv("LLM_MAX_TOKENS", "400")),
+    )
+    budget = RateBudget(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    summaries, report = await summarize_cohort(
+        service,
+        students,
+        checkpoint_path=args.checkpoint or args.out + ".checkpoint",
+        pack_size=args.pack,
+        concurrency=args.concurrency,
+        budget=budget,
+    )
+
+    with open(args.out, "w", encoding="utf-8") as out:
+        for student in students:
+            summary = summaries.get(student["email"])
+            if summary is not None:
+                out.write(json.dumps({"email": student["email"], **summary}) + "\n")
+
+    result = report.to_dict(budget)
+    errors = result.pop("errors")
+    print(
+        f"{result['students']:,} students, {result['prompts']:,} distinct prompts: "
+        f"{result['summarized']:,} summarized in {result['calls']:,} calls, {result['resumed']:,} from the checkpoint, "
+        f"{result['cached']:,} cached, {result['failed']:,} failed; "
+        f"{result['prompt_tokens'] + result['completion_tokens']:,} tokens, "
+        f"{result['budget_wait_ms'] / 1000:.1f}s waiting on the budget, {result['elapsed_ms'] / 1000:.1f}s total"
+    )
+    if result["unpacked"]:
+        print(f"{result['unpacked']:,} packed answers were malformed and retried one student per call")
+    print(f"wrote {len(summaries):,} summaries to {args.out}")
+    for error in errors[:20]:
+        print(f"  {', '.join(error['emails'][:3])}: {error['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="roster (.jsonl, .csv, optionally .gz)")
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument("--out", required=True, help="JSONL of {email, summary, model}")
+    parser.add_argument("--checkpoint", help="default: OUT.checkpoint")
+    parser.add_argument("--pack", type=int, default=4, help="students per model call (1 disables packing)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, help="requests per minute")
+    parser.add_argument("--tpm", type=int, help="prompt + completion tokens per minute")
+    parser.add_argument("--from-storage", action="store_true", help="summarize the stored profiles of the roster's students")
+    parser.add_argument("--backend", choices=["sql", "firestore"], default=os.getenv("STORAGE_BACKEND", "firestore").lower())
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()